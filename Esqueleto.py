@@ -3,8 +3,11 @@ from mesa.space import MultiGrid
 from mesa.time import RandomActivation
 from mesa.visualization.modules import CanvasGrid
 from mesa.visualization.ModularVisualization import ModularServer
+import os
 import random
 
+from model.mapas import leer_mapa
+
 # ---------- CELDAS (sean pared, fuego, salida, etc.) ----------
 class MapaCell(Agent):
     def __init__(self, unique_id, model, cell_type):
@@ -131,28 +134,7 @@ class EvacuacionModel(Model):
         self.salidas = []         # se rellenará al construir el mapa
 
         # 1. ---- Crear mapa fijo ----
-        mapa_txt = [
-            "####S####S#####S####",
-            "#LL...DF..LLLLL..LL#",
-            "#LL.F.D...LDFDL..LL#",
-            "#LL..FD...LDFFL..FL#",
-            "#FF...D...LFFFL..DF#",
-            "#FFLLFDD...FFF...DD#",
-            "#FDLLLLL...........#",
-            "#LDFLLLL..LLL..L...#",
-            "#....LLL..LLL..L...#",
-            "S....LLL.......L...S",
-            "#....LFL.......L...#",
-            "#....LLF...LLLLL...#",
-            "#..........DDDLL...#",
-            "#.........DD.D...LL#",
-            "#LL....FFFDD.....LL#",
-            "#LL...LFFFDDLL...LL#",
-            "#LL...LLLLLFFL...LL#",
-            "#LL...LLLLLFFL..LLL#",
-            "#LL...LLLLLFLL..LLL#",
-            "####S##########S####"
-        ]
+        mapa_txt = leer_mapa(os.path.join(os.path.dirname(os.path.abspath(__file__)), "mapas", "esqueleto.txt"))
         uid = 0
         for y, row in enumerate(mapa_txt):
             for x, ch in enumerate(row):
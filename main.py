@@ -1,3 +1,105 @@
 # main.py
-from model.entorno import server
-server.launch()
+"""
+Punto de entrada de la simulación.
+
+    python main.py [opciones]       # igual que 'serve [opciones]'
+    python main.py serve [--mapa ARCHIVO] [--puerto 8521] [--ticks-por-segundo N]
+    python main.py run [--usuarios 7] [--semilla 0] [--max-ticks 500] [--animacion corrida.png]
+                       [--almacen resultados.sqlite]
+    python main.py bench [opciones de model.benchmark]
+
+Solo 'serve' carga la visualización; 'run' y 'bench' usan el núcleo sin servidor web.
+"""
+import argparse
+import json
+import sys
+
+
+def serve(args):
+    from model.servidor import crear_servidor
+    server = crear_servidor(args.mapa, args.puerto, args.ticks_por_segundo)
+    server.launch()
+
+
+def run(args):
+    from model.lotes import ejecutar_replica
+    parametros = {"probabilidad_fuego": args.probabilidad_fuego, "poblacion": args.poblacion,
+                  "longitud_derrumbe": args.longitud_derrumbe, "intervalo_derrumbe": args.intervalo_derrumbe,
+                  "navegacion": args.navegacion, "brigadistas": args.brigadistas,
+                  "radio_brigadista": args.radio_brigadista}
+    if args.mapa:
+        parametros["mapa"] = args.mapa
+    resultado = ejecutar_replica(args.usuarios, args.semilla, args.max_ticks, metricas=args.metricas,
+                                 metricas_cada=args.metricas_cada, perfiles=args.perfil,
+                                 particiones=args.particiones, eventos=args.eventos, almacen=args.almacen,
+                                 limite_almacen=int(args.almacen_limite * 2**20), animacion=args.animacion,
+                                 cada=args.cada, **parametros)
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+
+
+def bench(args, opciones):
+    from model.benchmark import main as benchmark
+    benchmark(opciones)
+
+
+def main(argv=None):
+    from model.entorno import ShoppingModel
+    from model.almacen import LIMITE_ALMACEN
+    parser = argparse.ArgumentParser(description="Simulación de evacuación del centro comercial.")
+    comandos = parser.add_subparsers(dest="comando")
+
+    p_serve = comandos.add_parser("serve", help="Servidor web con la visualización")
+    p_serve.add_argument("--mapa", default=None, help="Archivo de mapa (por defecto, el centro comercial)")
+    p_serve.add_argument("--puerto", type=int, default=8521)
+    p_serve.add_argument("--ticks-por-segundo", type=float, default=None,
+                         help="Ritmo de simulación; si el navegador se atrasa, se saltan cuadros")
+    p_serve.set_defaults(funcion=serve)
+
+    p_run = comandos.add_parser("run", help="Una corrida sin navegador (resultado en JSON)")
+    p_run.add_argument("--usuarios", type=int, default=7)
+    p_run.add_argument("--semilla", type=int, default=0)
+    p_run.add_argument("--mapa", default=None)
+    p_run.add_argument("--max-ticks", type=int, default=500)
+    p_run.add_argument("--probabilidad-fuego", type=float, default=0.3)
+    p_run.add_argument("--longitud-derrumbe", type=int, default=4)
+    p_run.add_argument("--intervalo-derrumbe", type=int, default=8, help="Ticks entre derrumbes (0 = sin derrumbes)")
+    p_run.add_argument("--poblacion", choices=ShoppingModel.MOTORES_POBLACION, default="agentes")
+    p_run.add_argument("--navegacion", choices=ShoppingModel.NAVEGACIONES, default="campo",
+                       help="Campo de distancias compartido (ve todos los peligros) o planificador D* Lite "
+                       "por evacuante (solo los peligros que ve); en los dos casos se sigue una ruta "
+                       "desde que el evacuante ve una salida o lo instruye un brigadista")
+    p_run.add_argument("--brigadistas", type=int, default=0, help="Brigadistas ubicados al azar en pasillos")
+    p_run.add_argument("--radio-brigadista", type=int, default=2, help="Alcance de las instrucciones de cada brigadista")
+    p_run.add_argument("--particiones", type=int, default=None,
+                       help="Reparte cada tick entre N procesos por franjas del mapa (requiere --poblacion arreglos)")
+    p_run.add_argument("--animacion", default=None, help="Guarda la corrida como APNG en este archivo")
+    p_run.add_argument("--cada", type=int, default=1, help="Un cuadro de animación cada N ticks")
+    p_run.add_argument("--metricas", default=None, help="Carpeta donde guardar las series por tick (CSV)")
+    p_run.add_argument("--metricas-cada", type=int, default=1, help="Una fila de métricas cada N ticks")
+    p_run.add_argument("--eventos", default=None, help="Carpeta donde guardar la traza de eventos")
+    p_run.add_argument("--almacen", default=None,
+                       help="Archivo SQLite de resultados: si el escenario ya se corrió, no se vuelve a simular")
+    p_run.add_argument("--almacen-limite", type=float, default=LIMITE_ALMACEN / 2**20,
+                       help="Tamaño máximo del almacén en MiB (se descartan las corridas usadas hace más tiempo)")
+    p_run.add_argument("--perfil", default=None,
+                       help="Carpeta donde guardar el perfil por fases (tabla y pilas plegadas para flamegraphs)")
+    p_run.set_defaults(funcion=run)
+
+    p_bench = comandos.add_parser("bench", add_help=False,
+                                  help="Benchmarks de rendimiento (opciones de model.benchmark)")
+    p_bench.set_defaults(funcion=bench)
+
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] not in comandos.choices and argv[0] not in ("-h", "--help"):
+        argv = ["serve", *argv]                          # Sin subcomando, las opciones son las de 'serve'
+    args, resto = parser.parse_known_args(argv)
+    if args.funcion is bench:
+        bench(args, resto)                               # Las opciones las interpreta model.benchmark
+    elif resto:
+        parser.error(f"argumentos no reconocidos: {' '.join(resto)}")
+    else:
+        args.funcion(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# aleatorio.py
+
+import random
+import zlib
+import numpy as np
+
+
+class FlujosAleatorios:
+    """
+    Flujos aleatorios con nombre ("fuego", "derrumbe", "movimiento", ...) derivados
+    de la semilla de un modelo. Cada flujo es independiente de los demás: cambiar
+    cuántas veces se usa uno (por ejemplo, con más evacuantes) no altera los otros.
+    Misma semilla y mismos parámetros => misma secuencia en cada flujo.
+    """
+
+    def __init__(self, semilla=None):
+        """
+        :param semilla: Semilla entera. Si es None se toma entropía del sistema
+                        y se guarda en self.semilla para poder repetir la corrida.
+        """
+        raiz = np.random.SeedSequence(semilla)
+        self.semilla  = raiz.entropy
+        self._raiz    = raiz
+        self._numpy   = {}
+        self._python  = {}
+
+    def _secuencia(self, nombre: str, tipo: int) -> np.random.SeedSequence:
+        """Subsecuencia estable para el nombre dado (no depende del orden de creación)."""
+        return np.random.SeedSequence(self._raiz.entropy, spawn_key=(zlib.crc32(nombre.encode()), tipo))
+
+    def numpy(self, nombre: str) -> np.random.Generator:
+        """Generador de NumPy del flujo 'nombre' (para operaciones vectorizadas)."""
+        if nombre not in self._numpy:
+            self._numpy[nombre] = np.random.Generator(np.random.PCG64(self._secuencia(nombre, 0)))
+        return self._numpy[nombre]
+
+    def python(self, nombre: str) -> random.Random:
+        """Generador de la librería estándar del flujo 'nombre' (para decisiones sueltas)."""
+        if nombre not in self._python:
+            estado = self._secuencia(nombre, 1).generate_state(4, np.uint64)
+            self._python[nombre] = random.Random(int.from_bytes(estado.tobytes(), "little"))
+        return self._python[nombre]
@@ -0,0 +1,208 @@
+# almacen.py
+"""
+Almacén persistente de resultados de corridas (SQLite con los arreglos como blobs).
+
+Cada corrida se guarda bajo la clave de su escenario: un hash del contenido del
+mapa (no de su ruta), de los parámetros del modelo (con los valores por defecto
+completados, así dar un parámetro igual al de por defecto no cambia la clave),
+de la semilla, del tope de ticks y de la versión del código (el contenido de los
+módulos de 'model'). Por cada clave se guarda el resumen final, las series por
+tick de las métricas y, si se pidió, la traza de eventos.
+
+El tamaño total está acotado: al pasarse del límite se borran las corridas
+usadas hace más tiempo (LRU). Varios procesos pueden usar el mismo archivo a la
+vez (modo WAL de SQLite).
+
+Uso:
+    with AlmacenResultados("resultados.sqlite") as almacen:
+        clave = clave_escenario(50, 7, 500, 1, {"probabilidad_fuego": 0.3})
+        guardada = almacen.buscar(clave)
+"""
+
+import glob
+import hashlib
+import inspect
+import io
+import json
+import os
+import sqlite3
+import time
+from functools import lru_cache
+from typing import Dict
+import numpy as np
+
+from .entorno import ShoppingModel, MAPA_CENTRO_COMERCIAL
+from .mapas import como_terreno
+
+LIMITE_ALMACEN = 1 << 30                               # Bytes por defecto (1 GiB)
+
+# Parámetros del modelo que no cambian el resultado (o que entran por otro lado)
+FUERA_DE_CLAVE = {"mapa", "estaticos", "eventos", "metricas"}
+
+
+# ================================
+# CLAVE DEL ESCENARIO
+# ================================
+
+@lru_cache(maxsize=1)
+def version_codigo() -> str:
+    """Hash del código del modelo: cualquier cambio en un módulo invalida las corridas guardadas."""
+    h = hashlib.sha256()
+    for ruta in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "*.py"))):
+        h.update(os.path.basename(ruta).encode())
+        with open(ruta, "rb") as archivo:
+            h.update(archivo.read())
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=1)
+def _por_defecto() -> Dict[str, object]:
+    firma = inspect.signature(ShoppingModel.__init__)
+    return {nombre: p.default for nombre, p in firma.parameters.items()
+            if p.default is not inspect.Parameter.empty and nombre not in FUERA_DE_CLAVE}
+
+
+def clave_escenario(num_users, seed, max_ticks, metricas_cada, parametros) -> str:
+    """
+    Clave canónica de una corrida de ejecutar_replica.
+    :param parametros: Parámetros de ShoppingModel (el mapa puede venir como 'mapa' o 'estaticos')
+    """
+    if parametros.get("estaticos") is not None:
+        terreno = parametros["estaticos"].terreno()
+    else:
+        mapa = parametros.get("mapa")
+        terreno = como_terreno(mapa if mapa is not None else MAPA_CENTRO_COMERCIAL)
+    escenario = {**_por_defecto(), **{k: v for k, v in parametros.items() if k not in FUERA_DE_CLAVE}}
+    escenario.update(num_users=num_users, seed=seed, max_ticks=max_ticks, metricas_cada=metricas_cada)
+
+    h = hashlib.sha256(json.dumps(escenario, sort_keys=True, default=_a_json).encode())
+    h.update(repr(terreno.vista.shape).encode())
+    h.update(np.ascontiguousarray(terreno.vista).tobytes())
+    h.update(version_codigo().encode())
+    return h.hexdigest()
+
+
+def _a_json(valor):
+    """Arreglos y escalares de NumPy (por ejemplo, posiciones de brigadistas) como listas y números."""
+    return valor.tolist() if hasattr(valor, "tolist") else list(valor)
+
+
+# ================================
+# ALMACÉN
+# ================================
+
+class AlmacenResultados:
+    """
+    Tabla 'corridas' de un archivo SQLite: clave, resumen (JSON), series y
+    eventos (arreglos .npz comprimidos), tamaño en bytes y último uso.
+    """
+
+    def __init__(self, ruta: str, limite: int = LIMITE_ALMACEN):
+        """
+        :param ruta: Archivo SQLite (se crea si no existe)
+        :param limite: Bytes guardados como máximo (se descartan las corridas menos usadas)
+        """
+        self.ruta   = ruta
+        self.limite = limite
+        carpeta = os.path.dirname(os.path.abspath(ruta))
+        os.makedirs(carpeta, exist_ok=True)
+        self._conexion = sqlite3.connect(ruta, timeout=60, isolation_level=None)   # Transacciones explícitas
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("""
+            CREATE TABLE IF NOT EXISTS corridas (
+                clave     TEXT PRIMARY KEY,
+                resultado TEXT NOT NULL,
+                series    BLOB,
+                eventos   BLOB,
+                bytes     INTEGER NOT NULL,
+                usada     REAL NOT NULL
+            )""")
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS corridas_usada ON corridas (usada)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *error):
+        self.cerrar()
+        return False
+
+    def cerrar(self):
+        self._conexion.close()
+
+    def __len__(self):
+        return self._conexion.execute("SELECT COUNT(*) FROM corridas").fetchone()[0]
+
+    def __contains__(self, clave: str):
+        return self._conexion.execute("SELECT 1 FROM corridas WHERE clave = ?", (clave,)).fetchone() is not None
+
+    def tamano(self) -> int:
+        """Bytes guardados (resúmenes y blobs)."""
+        return self._conexion.execute("SELECT COALESCE(SUM(bytes), 0) FROM corridas").fetchone()[0]
+
+    # ================================
+    # LECTURA Y ESCRITURA
+    # ================================
+
+    def buscar(self, clave: str, con_eventos: bool = False) -> dict | None:
+        """
+        Corrida guardada con esa clave como {"resultado", "series", "eventos"}, o None.
+        Con 'con_eventos', una corrida guardada sin traza cuenta como ausente.
+        Marca la corrida como recién usada.
+        """
+        fila = self._conexion.execute("SELECT resultado, series, eventos FROM corridas WHERE clave = ?",
+                                      (clave,)).fetchone()
+        if fila is None or (con_eventos and fila[2] is None):
+            return None
+        self._conexion.execute("UPDATE corridas SET usada = ? WHERE clave = ?", (time.time(), clave))
+        resultado, series, eventos = fila
+        return {"resultado": json.loads(resultado), "series": _desempacar(series), "eventos": _desempacar(eventos)}
+
+    def guardar(self, clave: str, resultado: dict, series: Dict[str, np.ndarray] | None = None,
+                eventos: Dict[str, np.ndarray] | None = None):
+        """Guarda (o reemplaza) una corrida y descarta las menos usadas si se pasa del límite."""
+        texto = json.dumps(resultado)
+        series, eventos = _empacar(series), _empacar(eventos)
+        tamano = len(texto) + len(series or b"") + len(eventos or b"")
+        conexion = self._conexion
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            conexion.execute("INSERT OR REPLACE INTO corridas VALUES (?, ?, ?, ?, ?, ?)",
+                             (clave, texto, series, eventos, tamano, time.time()))
+            self._recortar(clave)
+            conexion.execute("COMMIT")
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+
+    def _recortar(self, nueva: str):
+        """
+        Borra corridas, de la usada hace más tiempo a la más reciente, hasta entrar
+        en el límite. La recién guardada ('nueva') nunca se borra: si ella sola
+        pasa del límite, queda únicamente ella.
+        """
+        sobra = self.tamano() - self.limite
+        if sobra <= 0:
+            return
+        borrar = []
+        for clave, tamano in self._conexion.execute("SELECT clave, bytes FROM corridas WHERE clave != ? "
+                                                    "ORDER BY usada", (nueva,)):
+            borrar.append((clave,))
+            sobra -= tamano
+            if sobra <= 0:
+                break
+        self._conexion.executemany("DELETE FROM corridas WHERE clave = ?", borrar)
+
+
+def _empacar(arreglos: Dict[str, np.ndarray] | None) -> bytes | None:
+    if arreglos is None:
+        return None
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arreglos)
+    return buffer.getvalue()
+
+
+def _desempacar(datos: bytes | None) -> Dict[str, np.ndarray] | None:
+    if datos is None:
+        return None
+    with np.load(io.BytesIO(datos)) as npz:
+        return {nombre: npz[nombre] for nombre in npz.files}
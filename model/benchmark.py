@@ -0,0 +1,196 @@
+# benchmark.py
+"""
+Benchmarks de rendimiento de ShoppingModel.step.
+
+Mide ticks por segundo y el tiempo de cada fase del tick (scheduler, fuego,
+derrumbes, percepción y ruteo de los agentes) variando el número de
+evacuantes, el tamaño del mapa y la intensidad del fuego. Los resultados se
+guardan en JSON y se pueden comparar contra una línea base guardada: si algún
+caso es más lento que la base por encima del umbral, el proceso termina con
+código 1.
+
+Uso:
+    python -m model.benchmark --salida bench.json
+    python -m model.benchmark --rapido --base bench_base.json --umbral 0.15
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import numpy as np
+
+from .entorno import ShoppingModel, MAPA_CENTRO_COMERCIAL
+from .mapas import como_terreno, generar_centro_comercial
+from .terreno import PASILLO
+from .perfilador import Perfilador
+
+# ================================
+# MAPAS
+# ================================
+
+def mapa_de_prueba(tamano):
+    """
+    Mapa de un caso del barrido: 0 es el centro comercial de 49x40;
+    cualquier otro valor es un centro comercial generado de tamano x tamano.
+    """
+    if tamano == 0:
+        return "mall", como_terreno(MAPA_CENTRO_COMERCIAL)
+    return f"gen{tamano}", generar_centro_comercial(tamano, tamano, semilla=0)
+
+
+# ================================
+# MEDICIÓN
+# ================================
+
+def medir_caso(usuarios, tamano, probabilidad_fuego, ticks=50, repeticiones=3, semilla=0,
+               poblacion="agentes", perfiles=None, navegacion="campo", brigadistas=0):
+    """
+    Mide un caso del barrido. Devuelve la mediana de ticks por segundo
+    (sin instrumentar) y los milisegundos por tick de cada fase y las consultas
+    por tick (con el perfilador). Si se da la carpeta 'perfiles', guarda ahí
+    las pilas plegadas del caso.
+    """
+    nombre, mapa = mapa_de_prueba(tamano)
+
+    def nuevo_modelo():
+        return ShoppingModel(num_users=usuarios, seed=semilla, mapa=mapa,
+                             probabilidad_fuego=probabilidad_fuego, poblacion=poblacion,
+                             navegacion=navegacion, brigadistas=brigadistas)
+
+    tasas = []
+    for _ in range(repeticiones):
+        model = nuevo_modelo()
+        gc.collect()
+        inicio = time.perf_counter()
+        for _ in range(ticks):
+            model.step()
+        tasas.append(ticks / (time.perf_counter() - inicio))
+
+    model = nuevo_modelo()
+    with Perfilador(model) as perfil:
+        for _ in range(ticks):
+            model.step()
+
+    sufijo = "" if poblacion == "agentes" else f"/{poblacion}"
+    sufijo += "" if navegacion == "campo" else f"/{navegacion}"
+    sufijo += f"/b{brigadistas}" if brigadistas else ""
+    caso   = f"{nombre}/u{usuarios}/p{probabilidad_fuego}{sufijo}"
+    if perfiles:
+        os.makedirs(perfiles, exist_ok=True)
+        perfil.guardar_pilas(os.path.join(perfiles, caso.replace("/", "_") + ".folded"))
+    resultado = {
+        "caso":               caso,
+        "mapa":               f"{model.width}x{model.height}",
+        "usuarios":           len(model.evacuantes),
+        "probabilidad_fuego": probabilidad_fuego,
+        "ticks":              ticks,
+        "ticks_por_segundo":  statistics.median(tasas),
+        "fases_ms_por_tick":  perfil.ms_por_tick(),
+        "consultas_por_tick": perfil.resumen()["consultas_por_tick"],
+    }
+    if navegacion == "incremental":
+        resultado["reparaciones"] = perfil.resumen()["reparaciones"]
+    return resultado
+
+
+def barrido(usuarios, tamanos, fuegos, ticks, repeticiones, semilla=0, salida_progreso=sys.stderr,
+            poblacion="agentes", perfiles=None, navegacion="campo", brigadistas=0):
+    """Corre todos los casos (se saltan los que no caben en los pasillos del mapa)."""
+    resultados = []
+    for tamano in tamanos:
+        libres = int((mapa_de_prueba(tamano)[1].vista == PASILLO).sum())
+        for n in usuarios:
+            if n > libres:
+                continue
+            for p in fuegos:
+                r = medir_caso(n, tamano, p, ticks, repeticiones, semilla, poblacion, perfiles, navegacion,
+                               brigadistas)
+                print(f"{r['caso']:<38} {r['ticks_por_segundo']:10.1f} ticks/s", file=salida_progreso)
+                resultados.append(r)
+    return resultados
+
+
+def entorno_de_medicion():
+    """Datos de la máquina para saber si dos archivos de resultados son comparables."""
+    return {
+        "python":     platform.python_version(),
+        "numpy":      np.__version__,
+        "plataforma": platform.platform(),
+        "procesador": platform.processor() or platform.machine(),
+        "nucleos":    os.cpu_count(),
+    }
+
+
+# ================================
+# COMPARACIÓN CONTRA LA BASE
+# ================================
+
+def comparar(resultados, base, umbral):
+    """
+    Compara ticks por segundo caso por caso contra la base.
+    Devuelve la lista de regresiones (casos más lentos que base * (1 - umbral)).
+    """
+    base_por_caso = {r["caso"]: r for r in base["resultados"]}
+    regresiones = []
+    for r in resultados:
+        anterior = base_por_caso.get(r["caso"])
+        if anterior is None:
+            continue
+        cambio = r["ticks_por_segundo"] / anterior["ticks_por_segundo"] - 1
+        if cambio < -umbral:
+            regresiones.append({"caso": r["caso"], "base": anterior["ticks_por_segundo"],
+                                "actual": r["ticks_por_segundo"], "cambio": cambio})
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de ShoppingModel.step.")
+    parser.add_argument("--usuarios", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[0, 200, 500],
+                        help="Lado de los mapas generados (0 = centro comercial de 49x40)")
+    parser.add_argument("--fuego", type=float, nargs="+", default=[0.1, 0.3, 0.6],
+                        help="Probabilidades de propagación del fuego")
+    parser.add_argument("--ticks", type=int, default=50)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--poblacion", choices=ShoppingModel.MOTORES_POBLACION, default="agentes",
+                        help="Motor de población: objetos Evacuante o arreglos de NumPy")
+    parser.add_argument("--navegacion", choices=ShoppingModel.NAVEGACIONES, default="campo",
+                        help="Campo de distancias compartido (ve todos los peligros) o planificador D* Lite "
+                        "por evacuante (solo los peligros que ve); en los dos casos se sigue una ruta "
+                        "desde que el evacuante ve una salida o lo instruye un brigadista")
+    parser.add_argument("--brigadistas", type=int, default=0, help="Brigadistas ubicados al azar en pasillos")
+    parser.add_argument("--perfiles", default=None,
+                        help="Carpeta donde guardar las pilas plegadas de cada caso (para flamegraphs)")
+    parser.add_argument("--rapido", action="store_true", help="Barrido corto (para revisar regresiones)")
+    parser.add_argument("--salida", default="bench.json", help="Archivo JSON de resultados")
+    parser.add_argument("--base", default=None, help="Resultados guardados contra los que comparar")
+    parser.add_argument("--umbral", type=float, default=0.10,
+                        help="Caída relativa de ticks/s tolerada antes de fallar (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    if args.rapido:
+        args.usuarios, args.tamanos, args.fuego = [10, 100, 500], [0, 200], [0.3]
+
+    resultados = barrido(args.usuarios, args.tamanos, args.fuego, args.ticks, args.repeticiones, args.semilla,
+                         poblacion=args.poblacion, perfiles=args.perfiles, navegacion=args.navegacion,
+                         brigadistas=args.brigadistas)
+    with open(args.salida, "w") as archivo:
+        json.dump({"entorno": entorno_de_medicion(), "resultados": resultados}, archivo, indent=2)
+
+    if args.base:
+        with open(args.base) as archivo:
+            regresiones = comparar(resultados, json.load(archivo), args.umbral)
+        for r in regresiones:
+            print(f"REGRESIÓN {r['caso']}: {r['base']:.1f} -> {r['actual']:.1f} ticks/s ({r['cambio']:+.1%})")
+        if regresiones:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# brigadista.py
+
+from typing import List
+from mesa import Agent
+
+from .terreno import TRANSITABLE
+
+
+class Brigadista(Agent):
+    """
+    Agente fijo del personal de seguridad. Mientras suena la alarma, en cada
+    tick da una sola instrucción a todos los evacuantes que tiene a distancia
+    'radio' (cuadrado de lado 2 * radio + 1): la ruta a la salida más cercana.
+    Recibirla equivale a haber visto una salida: desde ahí el evacuante sigue
+    el campo de distancias del modelo (la tabla por celda de la salida más
+    cercana), tanto con objetos Evacuante como con el motor de arreglos.
+    Con la navegación "incremental" los evacuantes siguen su propio plan.
+
+    Los cercanos salen de la rejilla de cubetas del modelo (se rearma una vez
+    por tick), no de recorrer la grilla de Mesa alrededor de cada brigadista.
+    No ocupa celda: los evacuantes pueden pasar por donde está. Si su celda
+    se incendia o se derrumba, muere: el modelo lo saca del activador.
+    """
+
+    def __init__(self, unique_id: str, model, radio: int = 2):
+        """
+        :param unique_id: ID único del agente
+        :param model: Referencia al modelo global (ShoppingModel)
+        :param radio: Alcance de sus instrucciones (distancia de Chebyshev)
+        """
+        super().__init__(unique_id, model)
+        self.radio      = radio
+        self.instruidos = 0                        # Evacuantes que recibieron su instrucción
+        self.causa_muerte = None                   # "fuego" o "derrumbe" si murió
+
+    def dormido(self) -> bool:
+        """Antes de la alarma no tiene nada que hacer (el activador lo salta)."""
+        return not self.model.alarma_activa
+
+    @property
+    def vivo(self) -> bool:
+        return self.causa_muerte is None
+
+    def step(self):
+        if not self.vivo or not TRANSITABLE[self.model.terreno.codigo(self.pos)]:
+            return                                 # Desde una celda en llamas o derrumbada no instruye a nadie
+        cercanos: List[int] = self.model.evacuantes_cerca(self.pos, self.radio)
+        if cercanos:
+            self.instruidos += self.model.instruir(cercanos)
+
+    def advance(self):
+        pass                                       # No se mueve
@@ -0,0 +1,216 @@
+# campo.py
+
+from heapq import heapify, heappush, heappop
+from typing import Iterable, List, Tuple
+import numpy as np
+
+from .terreno import Terreno, SALIDA, TRANSITABLE
+
+INFINITO = np.iinfo(np.int32).max                      # Distancia de las celdas sin ruta a una salida
+
+VECINOS = [(1, 0), (-1, 0), (0, 1), (0, -1)]           # Vecinos cardinales (mismos que la BFS del evacuante)
+
+
+class CampoSalidas:
+    """
+    Campo de distancias compartido desde todas las salidas ('S') del mapa.
+    Guarda, para cada celda, cuántos pasos faltan hasta la salida más cercana
+    y cuál es esa salida (si hay empate, la de menor índice en 'salidas').
+    Evita muros ('#'), fuego ('F') y derrumbes ('D').
+    Cuando el fuego o un derrumbe cambian celdas, solo se repara la zona afectada.
+    """
+
+    def __init__(self, terreno: Terreno, distancia: np.ndarray | None = None,
+                 salida: np.ndarray | None = None, salidas: List[Tuple[int, int]] | None = None):
+        """
+        :param terreno: Capa de terreno del modelo
+        :param distancia, salida, salidas: Campo ya calculado para este mismo terreno
+            (por ejemplo, mapeado desde datos compartidos); se usa tal cual, sin copiarlo
+        """
+        self.terreno   = terreno
+        self.width     = terreno.width
+        self.height    = terreno.height
+        self.expandidos = 0                            # Nodos expandidos en la última reparación
+        if distancia is not None:
+            self.distancia = distancia
+            self.salida    = salida
+            self.salidas   = [tuple(s) for s in salidas]
+            return
+        self.distancia = np.full((self.width, self.height), INFINITO, dtype=np.int32)
+        self.salida    = np.full((self.width, self.height), -1, dtype=np.int32)   # Índice en self.salidas
+        self.salidas: List[Tuple[int, int]] = terreno.posiciones("S")
+        self._construir()
+
+    # ================================
+    # CONSTRUCCIÓN INICIAL
+    # ================================
+
+    def _construir(self):
+        """
+        BFS multi-fuente desde todas las salidas, nivel por nivel y vectorizada
+        (cada nivel de distancia se expande con una sola operación de NumPy).
+        """
+        alto      = self.height
+        distancia = self.distancia.reshape(-1)               # Vistas planas: índice = x * alto + y
+        salida    = self.salida.reshape(-1)
+        transitable = TRANSITABLE[self.terreno.vista].reshape(-1)
+
+        frontera = np.array([x * alto + y for x, y in self.salidas], dtype=np.int64)
+        distancia[frontera] = 0
+        salida[frontera]    = np.arange(len(frontera))
+
+        d = 0
+        while frontera.size:
+            d += 1
+            xs, ys = np.divmod(frontera, alto)
+            movimientos = [
+                (frontera[xs < self.width - 1] + alto, frontera[xs < self.width - 1]),
+                (frontera[xs > 0] - alto,              frontera[xs > 0]),
+                (frontera[ys < alto - 1] + 1,          frontera[ys < alto - 1]),
+                (frontera[ys > 0] - 1,                 frontera[ys > 0]),
+            ]
+            vecinos = np.concatenate([v for v, _ in movimientos])
+            padres  = np.concatenate([p for _, p in movimientos])
+            libres  = transitable[vecinos] & (distancia[vecinos] == INFINITO)
+            frontera = np.unique(vecinos[libres])
+            distancia[frontera] = d
+            salida[frontera]    = len(self.salidas)             # Se queda con la menor etiqueta del nivel anterior
+            np.minimum.at(salida, vecinos[libres], salida[padres[libres]])
+
+    # ================================
+    # CONSULTAS
+    # ================================
+
+    def _vecinos(self, x: int, y: int):
+        for dx, dy in VECINOS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < self.width and 0 <= ny < self.height:
+                yield nx, ny
+
+    def siguiente_paso(self, pos: Tuple[int, int]) -> Tuple[int, int] | None:
+        """
+        Devuelve la celda vecina que acerca un paso a la salida más cercana.
+        Si ya está en una salida o no hay ruta posible, devuelve None.
+        """
+        d = self.distancia[pos]
+        if d == 0 or d == INFINITO:
+            return None
+        for vecino in self._vecinos(*pos):
+            if self.distancia[vecino] == d - 1:
+                return vecino
+        return None
+
+    def salida_mas_cercana(self, pos: Tuple[int, int]) -> Tuple[int, int] | None:
+        """Devuelve la salida más cercana (por ruta) a pos, o None si no hay ruta."""
+        i = self.salida[pos]
+        return self.salidas[i] if i >= 0 else None
+
+    # ================================
+    # REPARACIÓN INCREMENTAL
+    # ================================
+
+    def actualizar(self, celdas: Iterable[Tuple[int, int]]):
+        """
+        Repara el campo después de que cambió el tipo de las celdas indicadas.
+        1. Invalida las celdas que dependían de una celda ahora bloqueada.
+        2. Vuelve a propagar distancias solo dentro de la zona invalidada
+           (y desde las celdas que se abrieron, si las hay).
+        3. Reetiqueta la salida de las celdas cuyo soporte cambió, aunque
+           conserven la distancia, y propaga el cambio hacia afuera.
+        Los nodos expandidos en las tres etapas quedan en 'expandidos'.
+        """
+        codigos   = self.terreno.vista
+        distancia = self.distancia
+        salida    = self.salida
+
+        # --- 1. Invalidación: se procesa por distancia creciente para que el soporte sea correcto ---
+        pendientes = []       # (distancia anterior, celda)
+        invalidas  = []
+        abiertas   = []
+        cambiadas  = set()    # Celdas cuya distancia cambió
+        expandidos = 0
+        for pos in set(celdas):
+            if TRANSITABLE[codigos[pos]]:
+                abiertas.append(pos)
+            elif distancia[pos] != INFINITO:
+                heappush(pendientes, (int(distancia[pos]), pos))
+                distancia[pos] = INFINITO
+                salida[pos]    = -1
+                cambiadas.add(pos)
+
+        while pendientes:
+            d, (x, y) = heappop(pendientes)
+            expandidos += 1
+            for v in self._vecinos(x, y):
+                if distancia[v] == d + 1 and not self._tiene_soporte(v):
+                    distancia[v] = INFINITO
+                    salida[v]    = -1
+                    invalidas.append(v)
+                    cambiadas.add(v)
+                    heappush(pendientes, (d + 1, v))
+
+        # --- 2. Repropagación desde el borde de la zona invalidada ---
+        frontera = []
+        for pos in abiertas:
+            if codigos[pos] == SALIDA and distancia[pos] != 0:
+                if pos not in self.salidas:
+                    self.salidas.append(pos)
+                distancia[pos] = 0
+                salida[pos]    = self.salidas.index(pos)
+                cambiadas.add(pos)
+                heappush(frontera, (0, pos))
+            else:
+                invalidas.append(pos)
+
+        for pos in invalidas:
+            mejor = min(self._vecinos(*pos), key=lambda v: distancia[v], default=None)
+            if mejor is not None and distancia[mejor] != INFINITO and distancia[mejor] + 1 < distancia[pos]:
+                distancia[pos] = distancia[mejor] + 1
+                cambiadas.add(pos)
+                heappush(frontera, (int(distancia[pos]), pos))
+
+        while frontera:
+            d, (x, y) = heappop(frontera)
+            if d > distancia[x, y]:
+                continue
+            expandidos += 1
+            for v in self._vecinos(x, y):
+                if d + 1 < distancia[v] and TRANSITABLE[codigos[v]]:
+                    distancia[v] = d + 1
+                    cambiadas.add(v)
+                    heappush(frontera, (d + 1, v))
+
+        # --- 3. Reetiquetado por distancia creciente: el soporte de cada celda ya es definitivo ---
+        revisar = []
+        for pos in cambiadas:
+            revisar.append(pos)
+            revisar.extend(self._vecinos(*pos))
+        revisar = [(int(distancia[pos]), pos) for pos in set(revisar) if distancia[pos] != INFINITO]
+        heapify(revisar)
+        vistas = set()
+        while revisar:
+            d, pos = heappop(revisar)
+            if pos in vistas:
+                continue
+            vistas.add(pos)
+            expandidos += 1
+            etiqueta = self._etiqueta(pos)
+            if etiqueta == salida[pos] and pos not in cambiadas:
+                continue
+            salida[pos] = etiqueta
+            for v in self._vecinos(*pos):
+                if distancia[v] == d + 1 and v not in vistas:
+                    heappush(revisar, (d + 1, v))
+        self.expandidos = expandidos
+
+    def _etiqueta(self, pos: Tuple[int, int]) -> int:
+        """Salida de menor índice entre las que sostienen a pos (la propia, si pos es una salida)."""
+        d = self.distancia[pos]
+        if d == 0:
+            return self.salidas.index(pos)
+        return min(int(self.salida[v]) for v in self._vecinos(*pos) if self.distancia[v] == d - 1)
+
+    def _tiene_soporte(self, pos: Tuple[int, int]) -> bool:
+        """Indica si algún vecino válido está un paso más cerca de una salida."""
+        d = self.distancia[pos]
+        return d == 0 or any(self.distancia[v] == d - 1 for v in self._vecinos(*pos))
@@ -0,0 +1,39 @@
+# colores.py
+# Única fuente de colores de la simulación: la usan el canvas web (visualizacion.py)
+# y el exportador de cuadros (exportador.py)
+
+# Colores del terreno por símbolo del mapa
+COLORES_TERRENO = {
+    '#': "saddlebrown",  # Muro
+    '.': "white",        # Pasillo
+    'F': "red",          # Fuego
+    'D': "black",        # Derrumbe
+    'S': "green",        # Salida
+    'L': "blue",         # Local comercial
+    ' ': "white"
+}
+
+# Colores de los evacuantes por estado (None = no se dibuja)
+COLORES_ESTADO = {
+    "idle":       "purple",
+    "evacuating": "purple",
+    "blocked":    "purple",
+    "evacuated":  None,      # Ya no está en el edificio
+    "muerto":     "gray",
+}
+
+# Color de los brigadistas
+COLOR_BRIGADISTA = "orange"
+
+# Valores RGB de los nombres de color usados (para dibujar sin navegador)
+RGB = {
+    "saddlebrown": (139, 69, 19),
+    "white":       (255, 255, 255),
+    "red":         (255, 0, 0),
+    "black":       (0, 0, 0),
+    "green":       (0, 128, 0),
+    "blue":        (0, 0, 255),
+    "purple":      (128, 0, 128),
+    "gray":        (128, 128, 128),
+    "orange":      (255, 165, 0),
+}
@@ -0,0 +1,115 @@
+# compartido.py
+"""
+Datos estáticos de un mapa publicados una sola vez para muchos modelos.
+
+Todo lo que depende solo del mapa inicial (códigos del terreno, salidas, campo
+de distancias, tablas de salidas visibles y sitios de derrumbe) se calcula una
+vez y se guarda como archivos .npy en memoria compartida (/dev/shm si existe).
+Cada modelo los abre con np.load(mmap_mode="c"): las páginas son las del
+archivo, compartidas por todos los procesos que lo abrieron, y solo las
+páginas que el modelo modifica (fuego, derrumbes, reparaciones del campo)
+pasan a ser copias privadas de ese modelo.
+
+La grilla de Mesa y los agentes son objetos de Python: cada modelo sigue
+armando los suyos.
+
+Uso:
+    with publicar("mapas/grande.txt", visiones=(3,)) as datos:
+        model = ShoppingModel(num_users=500, seed=1, estaticos=datos)
+        ...
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from typing import Dict, Iterable
+import numpy as np
+
+from .terreno import Terreno
+from .campo import CampoSalidas
+from .percepcion import Percepcion
+from .derrumbes import IndiceDerrumbes
+from .mapas import como_terreno
+
+CARPETA_MEMORIA = "/dev/shm"                           # tmpfs de Linux: los archivos viven en RAM
+
+
+class DatosEstaticos:
+    """
+    Carpeta con los datos estáticos de un mapa. Solo guarda la ruta y la
+    descripción, así se envía a otros procesos sin copiar los arreglos.
+    """
+
+    def __init__(self, carpeta: str):
+        self.carpeta = carpeta
+        with open(os.path.join(carpeta, "meta.json")) as archivo:
+            meta = json.load(archivo)
+        self.width    = meta["width"]
+        self.height   = meta["height"]
+        self.visiones = tuple(meta["visiones"])              # Radios con tabla de salidas visibles
+        self.longitud_derrumbe = meta["longitud_derrumbe"]   # Longitud de los sitios de derrumbe guardados
+
+    def __repr__(self):
+        return f"DatosEstaticos({self.carpeta!r})"
+
+    def mapear(self) -> Dict[str, np.ndarray]:
+        """
+        Abre todos los arreglos en modo copia-al-escribir. Cada llamada es un
+        mapeo nuevo: lo que escribe un modelo no lo ve ningún otro.
+        """
+        return {nombre[:-4]: np.asarray(np.load(os.path.join(self.carpeta, nombre), mmap_mode="c"))
+                for nombre in sorted(os.listdir(self.carpeta)) if nombre.endswith(".npy")}
+
+    def terreno(self, arreglos: Dict[str, np.ndarray] | None = None) -> Terreno:
+        """Terreno propio (copia-al-escribir) con los códigos iniciales del mapa."""
+        arreglos = arreglos if arreglos is not None else self.mapear()
+        return Terreno(arreglos["codigos"])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *error):
+        self.liberar()
+        return False
+
+    def liberar(self):
+        """Borra la carpeta. Los modelos que ya la abrieron siguen funcionando hasta terminar."""
+        shutil.rmtree(self.carpeta, ignore_errors=True)
+
+
+def publicar(mapa, carpeta: str | None = None, visiones: Iterable[int] = (3,),
+             longitud_derrumbe: int = 4) -> DatosEstaticos:
+    """
+    Calcula los datos estáticos de 'mapa' (cualquier forma que acepta
+    como_terreno) y los escribe en 'carpeta' (por defecto, una carpeta nueva
+    en /dev/shm, o en la carpeta temporal del sistema si no existe).
+    :param visiones: Radios de visión cuyas tablas se guardan (el resto se construye al usarse)
+    :param longitud_derrumbe: Longitud de los sitios de derrumbe que se guardan
+    """
+    terreno = como_terreno(mapa)
+    if carpeta is None:
+        raiz = CARPETA_MEMORIA if os.path.isdir(CARPETA_MEMORIA) else tempfile.gettempdir()
+        carpeta = tempfile.mkdtemp(prefix="mapa_", dir=raiz)
+    else:
+        os.makedirs(carpeta, exist_ok=True)
+
+    campo      = CampoSalidas(terreno)
+    percepcion = Percepcion(terreno)
+    derrumbes  = IndiceDerrumbes(terreno, longitud_derrumbe)
+    visiones   = sorted(set(visiones))
+    arreglos = {
+        "codigos":            terreno.vista,
+        "salidas":            np.array(campo.salidas, dtype=np.int64).reshape(-1, 2),
+        "distancia":          campo.distancia,
+        "salida":             campo.salida,
+        "derrumbe_sitios":    derrumbes.sitios,
+        "derrumbe_posicion":  derrumbes._posicion,
+        **{f"vision_{v}": percepcion.tabla(v) for v in visiones},
+    }
+    for nombre, arreglo in arreglos.items():
+        np.save(os.path.join(carpeta, f"{nombre}.npy"), np.ascontiguousarray(arreglo))
+    with open(os.path.join(carpeta, "meta.json"), "w") as archivo:
+        json.dump({"width": terreno.width, "height": terreno.height, "visiones": visiones,
+                   "longitud_derrumbe": longitud_derrumbe}, archivo)
+    return DatosEstaticos(carpeta)
@@ -0,0 +1,163 @@
+# derrumbes.py
+
+from typing import Iterable, List, Tuple
+import numpy as np
+
+from .terreno import Terreno
+
+# Tabla código -> ¿puede caer un derrumbe sobre la celda? (solo pasillo '.' y local 'L')
+DERRUMBABLE = np.array([False, True, True, False, False, False])
+
+DIRECCIONES = [(1, 0), (0, 1)]                         # Horizontal y vertical
+
+
+class IndiceDerrumbes:
+    """
+    Índice de los sitios válidos para un derrumbe: segmentos horizontales o
+    verticales de 'longitud' celdas, todas de pasillo o local.
+    Cada sitio es un entero (x * alto + y) * 2 + dirección, con (x, y) la celda
+    de origen. Los sitios se guardan en un arreglo denso (se quitan cambiando de
+    lugar con el último), así elegir uno al azar es un sorteo uniforme sin
+    importar cuánto piso quede. El arreglo siempre contiene todos los sitios
+    válidos; los que dejaron de serlo se quitan recién cuando salen sorteados,
+    así el fuego (que cierra decenas de celdas por tick) no paga nada por el índice.
+    """
+
+    def __init__(self, terreno: Terreno, longitud: int = 4, sitios: np.ndarray | None = None,
+                 posicion: np.ndarray | None = None):
+        """
+        :param terreno: Capa de terreno del modelo
+        :param longitud: Celdas de cada derrumbe
+        :param sitios, posicion: Índice ya construido para este mismo terreno y longitud
+            (por ejemplo, mapeado desde datos compartidos); se usa tal cual, sin copiarlo
+        """
+        self.terreno  = terreno
+        self.longitud = longitud
+        self.width    = terreno.width
+        self.height   = terreno.height
+        if sitios is not None and len(sitios):
+            self._sitios   = sitios
+            self._posicion = posicion
+            self._n        = len(sitios)
+            return
+        self._posicion = np.full(self.width * self.height * 2, -1, dtype=np.int64)   # sitio -> índice en _sitios
+        validos = self._construir()
+        self._sitios = np.empty(max(len(validos), 16), dtype=np.int64)
+        self._sitios[:len(validos)] = validos
+        self._n = len(validos)
+        self._posicion[validos] = np.arange(len(validos))
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def sitios(self) -> np.ndarray:
+        """Sitios del índice, en orden (el orden define qué sale en cada sorteo). Puede incluir inválidos."""
+        return self._sitios[:self._n]
+
+    # ================================
+    # CONSTRUCCIÓN Y MANTENIMIENTO
+    # ================================
+
+    def _construir(self) -> np.ndarray:
+        """Todos los sitios válidos, con sumas acumuladas por ventana en cada dirección."""
+        largo = self.longitud
+        suelo = DERRUMBABLE[self.terreno.vista].astype(np.int32)
+        validos = []
+        for d, eje in enumerate((0, 1)):
+            acumulado = np.cumsum(np.insert(suelo, 0, 0, axis=eje), axis=eje)
+            if eje == 0:
+                ventana = acumulado[largo:] - acumulado[:-largo]       # (ancho - largo + 1, alto)
+            else:
+                ventana = acumulado[:, largo:] - acumulado[:, :-largo]
+            xs, ys = np.nonzero(ventana == largo)
+            validos.append((xs.astype(np.int64) * self.height + ys) * 2 + d)
+        return np.sort(np.concatenate(validos))
+
+    def _agregar(self, sitio: int):
+        if self._n == len(self._sitios):
+            self._sitios = np.concatenate([self._sitios, np.empty_like(self._sitios)])
+        self._sitios[self._n] = sitio
+        self._posicion[sitio] = self._n
+        self._n += 1
+
+    def _quitar(self, sitio: int):
+        i = self._posicion[sitio]
+        self._n -= 1
+        ultimo = self._sitios[self._n]
+        self._sitios[i] = ultimo
+        self._posicion[ultimo] = i
+        self._posicion[sitio] = -1
+
+    def actualizar(self, celdas: Iterable[Tuple[int, int]]):
+        """
+        Agrega los sitios nuevos que forman las celdas que volvieron a ser piso.
+        Las que dejan de ser piso (fuego, derrumbes) no cuestan nada aquí: sus
+        sitios se descartan cuando salen sorteados (ver sortear()).
+        """
+        vista = self.terreno.vista
+        abiertas = [(x, y) for x, y in celdas if DERRUMBABLE[vista[x, y]]]
+        if not abiertas:
+            return
+        sitios = self._cubren(np.array(abiertas, dtype=np.int64))
+        origen, d = np.divmod(sitios, 2)
+        x, y  = np.divmod(origen, self.height)
+        pasos = np.arange(self.longitud)
+        xs = x[:, None] + (d == 0)[:, None] * pasos
+        ys = y[:, None] + (d == 1)[:, None] * pasos
+        nuevos = DERRUMBABLE[vista[xs, ys]].all(axis=1) & (self._posicion[sitios] < 0)
+        for sitio in sitios[nuevos].tolist():
+            self._agregar(sitio)
+
+    def _cubren(self, celdas: np.ndarray) -> np.ndarray:
+        """Sitios (dentro del mapa, sin repetir) que cubren alguna de las celdas (N, 2)."""
+        largo = self.longitud
+        pasos = np.arange(largo)
+        sitios = []
+        for d, (dx, dy) in enumerate(DIRECCIONES):
+            # Orígenes posibles: la celda menos 0..largo-1 pasos en la dirección
+            ox = (celdas[:, 0, None] - pasos * dx).ravel()
+            oy = (celdas[:, 1, None] - pasos * dy).ravel()
+            dentro = ((ox >= 0) & (oy >= 0) & (ox + dx * (largo - 1) < self.width)
+                      & (oy + dy * (largo - 1) < self.height))
+            sitios.append((ox[dentro] * self.height + oy[dentro]) * 2 + d)
+        return np.unique(np.concatenate(sitios))
+
+    def valido(self, sitio: int) -> bool:
+        """Indica si todas las celdas del sitio siguen siendo pasillo o local."""
+        vista = self.terreno.vista
+        return all(DERRUMBABLE[vista[c]] for c in self.celdas(sitio))
+
+    def restaurar(self, sitios: np.ndarray):
+        """Reemplaza el contenido del índice (en ese orden), por ejemplo desde una instantánea."""
+        self._posicion[self.sitios] = -1
+        self._sitios = np.array(sitios, dtype=np.int64)
+        self._n = len(self._sitios)
+        if self._n == 0:
+            self._sitios = np.empty(16, dtype=np.int64)
+        self._posicion[self.sitios] = np.arange(self._n)
+
+    # ================================
+    # SORTEO
+    # ================================
+
+    def celdas(self, sitio: int) -> List[Tuple[int, int]]:
+        """Celdas que cubre un sitio."""
+        origen, d = divmod(int(sitio), 2)
+        x, y = divmod(origen, self.height)
+        dx, dy = DIRECCIONES[d]
+        return [(x + i * dx, y + i * dy) for i in range(self.longitud)]
+
+    def sortear(self, rng) -> List[Tuple[int, int]] | None:
+        """
+        Celdas de un sitio válido elegido uniformemente (con rng.randrange), o None
+        si no queda ninguno. Un sitio sorteado que ya no es válido se quita del
+        índice para siempre y se vuelve a sortear: cada sitio inválido se revisa
+        una sola vez en toda la corrida y el resultado es uniforme entre los válidos.
+        """
+        while self._n:
+            sitio = int(self._sitios[rng.randrange(self._n)])
+            if self.valido(sitio):
+                return self.celdas(sitio)
+            self._quitar(sitio)
+        return None
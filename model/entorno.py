@@ -1,31 +1,76 @@
+import hashlib
+import random
+import numpy as np
+
 # === LIBRERÍAS DE MESA ===
-from random import random
-from mesa import Agent, Model                          # Agente base y modelo
+from mesa import Model                                 # Modelo base
 from mesa.space import MultiGrid                       # Espacio tipo grilla con múltiples agentes por celda
-from mesa.time import SimultaneousActivation           # Activador para que todos los agentes actúen simultáneamente
-from mesa.visualization.modules import CanvasGrid      # Visualización de la grilla en HTML
-from mesa.visualization.ModularVisualization import ModularServer  # Servidor web para ejecutar la simulación
 
 # === AGENTE MÓVIL: EVACUANTE ===
 from .evacuante import Evacuante                       # Importamos el agente Evacuante definido en otro archivo
-
-# === PARÁMETROS DE LA VISTA ===
-CELL_SIZE = 15                                         # Tamaño de cada celda en píxeles
-canvas_width = CELL_SIZE * 49                          # Ancho del canvas en píxeles (49 columnas)
-canvas_height = CELL_SIZE * 40                         # Alto del canvas en píxeles (40 filas)
-
-# === AGENTE FIJO: CELDA DEL MAPA ===
-class ShoppingCell(Agent):
-    """
-    Representa una celda del entorno: puede ser un muro, pasillo, local, salida, fuego, etc.
-    Es estático, no tiene comportamiento propio.
-    """
-    def __init__(self, unique_id, model, cell_type):
-        super().__init__(unique_id, model)
-        self.cell_type = cell_type   # Tipo de celda (carácter del mapa)
-
-    def step(self):
-        pass  # No hace nada cada tick (es una celda fija)
+from .brigadista import Brigadista                     # Personal fijo que guía a los evacuantes cercanos
+
+# === CAPA DE TERRENO ===
+from .terreno import LOCAL, PASILLO                    # Tipos de celda guardados en un arreglo de NumPy
+from .campo import CampoSalidas                        # Distancias compartidas hacia las salidas
+from .fuego import MotorFuego                          # Propagación del fuego por frente activo
+from .aleatorio import FlujosAleatorios                # Flujos aleatorios con nombre, propios de cada modelo
+from .eventos import RegistroEventos, IGNICION, DERRUMBE, MUERTE, CAUSAS   # Registro de eventos tipados
+from .mapas import como_terreno, como_texto            # Mapas desde texto, archivo o generador
+from .percepcion import Percepcion                     # Tablas precalculadas de salidas visibles
+from .ocupacion import Ocupacion                       # Evacuantes vivos por celda
+from .planificador import ActivacionActiva             # Activador simultáneo que solo despacha agentes activos
+from .poblacion import Poblacion, EVACUATED, estado_agentes   # Evacuantes como arreglos de NumPy (para poblaciones grandes)
+from .espacial import RejillaCubetas                   # Índice por cubetas de los evacuantes (consultas de los brigadistas)
+from .movimiento import ORDENES, resolver_conflictos   # Resolución en lote de los movimientos propuestos
+from .derrumbes import IndiceDerrumbes                 # Sitios válidos para un derrumbe
+from .metricas import Metricas                         # Contadores y series por tick
+from .replanificacion import Plano                     # Plano del edificio para la navegación incremental
+
+# === MAPA DEL CENTRO COMERCIAL (49 x 40) ===
+# '#' muro, '.' pasillo, 'L' local, 'S' salida, 'F' fuego, 'D' derrumbe
+MAPA_CENTRO_COMERCIAL = [
+    "####################SS###########################",
+    "#.LLL...LL...LLL........LLLLLLLLLLLLLLLLLLLLLL..#",
+    "#.LLL...L..LLLLLL.......LLLLL.......LLLLLLLLLL..#",
+    "#.LLL.....LLLLLLLL......LLLL.........LLLLLLLLL..#",
+    "#.LLL....LLLLLLLLL......LLL...LL..LL..LLLLLLLL..#",
+    "S.LLL...LLLLLLLLLL......LL....LL..LL...LLLLLLL..#",
+    "S.......LLLLLLLLLL......L.....LL..LL....LLLLLL..#",
+    "S.......LLLLLLLLLL......L.....LL..LL.....LLLLL..#",
+    "S.......LLLLLLLLLL..............................#",
+    "#LLLLL..LLLLLLLLLLLLL...........................#",
+    "#LLLLL..LLLLLLLLLLLLL.....LLLLLLLLLLLLLLLLL..LLL#",
+    "#LLLLL..LLL..............LLLLLLLLLLLLLLLLLL..LLL#",
+    "#LLLLL..LLL.............LLLLLLLLLLLLLLLLLLL..LLL#",
+    "#LLLLL..LLL.....................................#",
+    "#LLLLL..LLL.....................................S",
+    "#L......LLLLLLLLLLLL.....LL.....................S",
+    "#L......LLLLLLLLLLLL...LLLLL....................S",
+    "#LLLL...LLLLLLLLLLLL...LLLLL...LLLLLLLL..LLL....#",
+    "#LLLL..................LLLLL..LLLLLLLL...LLLL...#",
+    "#......................LLLLLLLLLLLLLL...LLLLLL..#",
+    "#..........LL..........LLLLLLLLLLLLL...LLLLLLL..#",
+    "#..........LL..........LLLLLLLLLLLL...LLLLLLLL..#",
+    "#LLLLLLLL..LL..LLLLL...LLLLLLLLLLL...LLLLLLLLL..#",
+    "#LLLLLLLL..LL..LLLLL...LLLLLLLLLL...LLLLLLLLLL..#",
+    "#LLLLLLLL..LL..LLLLL...LLLLLLLLL...LLLLLLLLLLL..#",
+    "#..........LL............LLLLLL...LLLLLLLLLLL...#",
+    "#...............LLL......LLLLL...LLLLLLLLLLLL...#",
+    "#...............LLL..LL..LLLL...LLLLLLLLLLLLLL..#",
+    "#LLLLLLLLLLL....LLL..LL..LLLL..LLLLLLLLLLLLLLL..#",
+    "#LLLLLLLLLLL....LLL......LLLL..LLLLLLLLL....LL..#",
+    "#LLLLLLLLLLL....LLL......LLL...LLLLLLLLL....LL..#",
+    "#........LLL....LLL......LLL...LLLLLLLLL....LL..#",
+    "#.........LL....LLL..LL..LLL...LLLLLLLLL....LL..#",
+    "#......L...L....LLL..LL.........................#",
+    "#LL....LL.......................................#",
+    "#LL....LLL...LLLLLLLLLL..........LLLL.....LLL...#",
+    "#LL....LLLL..LLLLLLLLLL..LLL..LLLLLLLL..........#",
+    "#LL....LLLL..LLLLLLLLLL..LLL..LLLLLLLLLLL.......#",
+    "#LL....LLLL..LLLLLLLLLL..LLL..LLLLLLLLLLLLLL....#",
+    "####SS########################################SS#"
+]
 
 # === MODELO PRINCIPAL ===
 class ShoppingModel(Model):
@@ -33,87 +78,130 @@ class ShoppingModel(Model):
     Modelo principal del centro comercial.
     Contiene el mapa, los evacuantes y la lógica general del entorno.
     """
-    def __init__(self, num_users=7, seed=None):
+    MOTORES_POBLACION = ("agentes", "arreglos")
+    NAVEGACIONES      = ("campo", "incremental")
+
+    def __init__(self, num_users=7, seed=None, probabilidad_fuego=0.3, eventos=None,
+                 mapa=None, llamas_iniciales=5, poblacion="agentes", longitud_derrumbe=4,
+                 intervalo_derrumbe=8, metricas=None, navegacion="campo", brigadistas=0,
+                 radio_brigadista=2, estaticos=None):
         super().__init__(seed=seed)              # Crea el generador aleatorio de Mesa
+        if poblacion not in self.MOTORES_POBLACION:
+            raise ValueError(f"Motor de población desconocido: {poblacion!r} (opciones: {self.MOTORES_POBLACION})")
+        if navegacion not in self.NAVEGACIONES:
+            raise ValueError(f"Navegación desconocida: {navegacion!r} (opciones: {self.NAVEGACIONES})")
+        if navegacion == "incremental" and poblacion != "agentes":
+            raise ValueError("La navegación incremental requiere el motor de población 'agentes'")
+        if estaticos is not None and mapa is not None:
+            raise ValueError("Con 'estaticos' el mapa sale de los datos compartidos: no se da 'mapa'")
+        # --- ALEATORIEDAD ---
+        # Toda decisión aleatoria usa flujos propios del modelo (nunca el módulo global 'random'),
+        # así dos modelos en el mismo proceso no se interfieren y una semilla repite la corrida exacta.
+        self.flujos          = FlujosAleatorios(seed)
+        self.random          = random.Random(self.flujos.semilla)   # Flujo general (ubicación inicial)
+        self.rng_fuego       = self.flujos.numpy("fuego")
+        self.rng_derrumbe    = self.flujos.python("derrumbe")
+        self.rng_movimiento  = self.flujos.numpy("movimiento")     # Orden en que cada agente prueba sus vecinos
+        self.rng_conflictos  = self.flujos.numpy("conflictos")     # Desempate de movimientos simultáneos
+        self.sorteo_vecinos  = None                                # Sorteos del tick, indexados por agente
+        self.claves_conflicto = None
         self.num_users = num_users               # Número de evacuantes a crear
+        self.llamas_iniciales = llamas_iniciales # Focos de fuego que se encienden al activar la alarma
+        self.longitud_derrumbe  = longitud_derrumbe    # Celdas de cada derrumbe
+        self.intervalo_derrumbe = intervalo_derrumbe   # Ticks entre derrumbes (0 o None = sin derrumbes)
+        self.radio_brigadista   = radio_brigadista     # Alcance de las instrucciones de cada brigadista
         self.tick_counter  = 0                   # Contador global de ticks
         self.alarma_activa = False               # Bandera de alarma (fuego activado)
-
-        # --- MAPA ---
-        self.map_2d = [
-            "####################SS###########################",
-            "#.LLL...LL...LLL........LLLLLLLLLLLLLLLLLLLLLL..#",
-            "#.LLL...L..LLLLLL.......LLLLL.......LLLLLLLLLL..#",
-            "#.LLL.....LLLLLLLL......LLLL.........LLLLLLLLL..#",
-            "#.LLL....LLLLLLLLL......LLL...LL..LL..LLLLLLLL..#",
-            "S.LLL...LLLLLLLLLL......LL....LL..LL...LLLLLLL..#",
-            "S.......LLLLLLLLLL......L.....LL..LL....LLLLLL..#",
-            "S.......LLLLLLLLLL......L.....LL..LL.....LLLLL..#",
-            "S.......LLLLLLLLLL..............................#",
-            "#LLLLL..LLLLLLLLLLLLL...........................#",
-            "#LLLLL..LLLLLLLLLLLLL.....LLLLLLLLLLLLLLLLL..LLL#",
-            "#LLLLL..LLL..............LLLLLLLLLLLLLLLLLL..LLL#",
-            "#LLLLL..LLL.............LLLLLLLLLLLLLLLLLLL..LLL#",
-            "#LLLLL..LLL.....................................#",
-            "#LLLLL..LLL.....................................S",
-            "#L......LLLLLLLLLLLL.....LL.....................S",
-            "#L......LLLLLLLLLLLL...LLLLL....................S",
-            "#LLLL...LLLLLLLLLLLL...LLLLL...LLLLLLLL..LLL....#",
-            "#LLLL..................LLLLL..LLLLLLLL...LLLL...#",
-            "#......................LLLLLLLLLLLLLL...LLLLLL..#",
-            "#..........LL..........LLLLLLLLLLLLL...LLLLLLL..#",
-            "#..........LL..........LLLLLLLLLLLL...LLLLLLLL..#",
-            "#LLLLLLLL..LL..LLLLL...LLLLLLLLLLL...LLLLLLLLL..#",
-            "#LLLLLLLL..LL..LLLLL...LLLLLLLLLL...LLLLLLLLLL..#",
-            "#LLLLLLLL..LL..LLLLL...LLLLLLLLL...LLLLLLLLLLL..#",
-            "#..........LL............LLLLLL...LLLLLLLLLLL...#",
-            "#...............LLL......LLLLL...LLLLLLLLLLLL...#",
-            "#...............LLL..LL..LLLL...LLLLLLLLLLLLLL..#",
-            "#LLLLLLLLLLL....LLL..LL..LLLL..LLLLLLLLLLLLLLL..#",
-            "#LLLLLLLLLLL....LLL......LLLL..LLLLLLLLL....LL..#",
-            "#LLLLLLLLLLL....LLL......LLL...LLLLLLLLL....LL..#",
-            "#........LLL....LLL......LLL...LLLLLLLLL....LL..#",
-            "#.........LL....LLL..LL..LLL...LLLLLLLLL....LL..#",
-            "#......L...L....LLL..LL.........................#",
-            "#LL....LL.......................................#",
-            "#LL....LLL...LLLLLLLLLL..........LLLL.....LLL...#",
-            "#LL....LLLL..LLLLLLLLLL..LLL..LLLLLLLL..........#",
-            "#LL....LLLL..LLLLLLLLLL..LLL..LLLLLLLLLLL.......#",
-            "#LL....LLLL..LLLLLLLLLL..LLL..LLLLLLLLLLLLLL....#",
-            "####SS########################################SS#"
-        ]
-
-        # --- AJUSTAR MAPA Y DIMENSIONES ---
-        self.height = len(self.map_2d)
-        self.width  = max(len(row) for row in self.map_2d)
-        self.map_2d = [row.ljust(self.width, '.') for row in self.map_2d]  # Asegura que todas las filas tengan el mismo largo
+        self.eventos = eventos if eventos is not None else RegistroEventos()   # Traza de la corrida
+        self.metricas = metricas if metricas is not None else Metricas(cada=0) # Por defecto, solo contadores
+        # "campo": al ver una salida siguen el campo de distancias compartido (que conoce todo el fuego).
+        # "incremental": cada evacuante planifica con el plano del edificio y lo que ve (D* Lite).
+        self.navegacion = navegacion
+
+        # --- MAPA Y CAPA DE TERRENO (MUROS, SALIDAS, ETC.) ---
+        # 'mapa' puede ser una lista de filas de texto, la ruta de un archivo de mapa o un Terreno.
+        # Con 'estaticos' (ver compartido.publicar) el terreno y sus tablas derivadas se mapean
+        # desde datos ya calculados, compartidos entre procesos y con copia-al-escribir.
+        # Las celdas fijas no son agentes: viven en un arreglo de códigos y no pasan por el scheduler
+        campo_previo, tablas_previas, sitios_previos = (), None, ()
+        if estaticos is not None:
+            compartidos    = estaticos.mapear()
+            self.terreno   = estaticos.terreno(compartidos)
+            campo_previo   = (compartidos["distancia"], compartidos["salida"], compartidos["salidas"].tolist())
+            tablas_previas = {v: compartidos[f"vision_{v}"] for v in estaticos.visiones}
+            if estaticos.longitud_derrumbe == longitud_derrumbe:
+                sitios_previos = (compartidos["derrumbe_sitios"], compartidos["derrumbe_posicion"])
+        else:
+            self.terreno = como_terreno(mapa if mapa is not None else MAPA_CENTRO_COMERCIAL)
+        self.width   = self.terreno.width
+        self.height  = self.terreno.height
 
         self.grid     = MultiGrid(self.width, self.height, torus=False)    # Grilla sin bordes envolventes
-        self.schedule = SimultaneousActivation(self)                       # Activador simultáneo
-
-        # --- CREAR CELDAS FIJAS (MUROS, SALIDAS, ETC.) ---
-        for y, row in enumerate(self.map_2d):
-            for x, symbol in enumerate(row):
-                uid         = y * self.width + x
-                inverted_y  = self.height - 1 - y            # Invertimos el eje Y para que la visualización no salga al revés
-                cell        = ShoppingCell(uid, self, symbol)
-                self.grid.place_agent(cell, (x, inverted_y)) # Coloca la celda en el grid
-                self.schedule.add(cell)                      # Agrega la celda al scheduler (aunque no hace nada)
+        self.schedule = ActivacionActiva(self, entre_fases=self._resolver_movimientos)   # Solo agentes activos
+        self.evacuantes = []                                               # Todos los evacuantes creados
+        self.poblacion  = None                                             # Motor de arreglos (si se eligió)
+        self.pos_evacuantes    = None                                      # Motor de agentes: posición de cada evacuante (N, 2)
+        self.dentro_evacuantes = None                                      # Motor de agentes: sigue dentro del edificio (N,)
+
+        self.campo   = CampoSalidas(self.terreno, *campo_previo)   # Campo de distancias a las salidas (compartido por todos)
+        self.fuego   = MotorFuego(self.terreno, probabilidad_fuego, self.rng_fuego)  # Frente activo del fuego
+        self.percepcion = Percepcion(self.terreno, tablas_previas)   # Salida visible desde cada celda, por radio de visión
+        self.ocupacion  = Ocupacion(self.width, self.height)   # Evacuantes vivos por celda
+        self.derrumbes  = IndiceDerrumbes(self.terreno, longitud_derrumbe, *sitios_previos)   # Segmentos donde puede caer un derrumbe
+        self.plano = Plano(self.terreno, self.campo.distancia) if navegacion == "incremental" else None
+
+        # --- BRIGADISTAS: antes que los evacuantes en el activador, así su instrucción vale desde el mismo tick ---
+        self.brigadistas = []
+        self._brigadistas_en = {}                                          # Celda -> brigadistas vivos parados ahí
+        self.cercania    = None                                            # Rejilla de evacuantes (solo con brigadistas)
+        self._tick_cercania = -1                                           # Tick en que se armó la rejilla
+        if brigadistas:
+            self._colocar_brigadistas(brigadistas, radio_brigadista)
 
         # --- COLOCAR EVACUANTES EN POSICIONES BLANCAS ('.') ---
-        empty_positions = [
-            (x, self.height - 1 - y)
-            for y, row in enumerate(self.map_2d)
-            for x, symbol in enumerate(row)
-            if symbol == "."
-        ]
-        self.random.shuffle(empty_positions)  # Aleatoriza posiciones disponibles
-
-        for i in range(min(self.num_users, len(empty_positions))):
-            pos   = empty_positions[i]
-            agent = Evacuante(f"U{i}", self)     # Crea un evacuante con ID único
-            self.grid.place_agent(agent, pos)    # Lo ubica en la posición
-            self.schedule.add(agent)             # Lo añade al scheduler
+        empty_positions = np.argwhere(self.terreno.vista == PASILLO)
+        elegidas = self.random.sample(range(len(empty_positions)), min(self.num_users, len(empty_positions)))
+
+        # Con el motor de arreglos los evacuantes no son agentes de Mesa: viven en la Poblacion
+        # y 'evacuantes' son vistas compatibles con Evacuante (pos, state, ...)
+        if poblacion == "arreglos":
+            self.poblacion  = Poblacion(self, empty_positions[elegidas])
+            self.evacuantes = self.poblacion.vistas
+        else:
+            self.pos_evacuantes    = np.array(empty_positions[elegidas], dtype=np.int32).reshape(len(elegidas), 2)
+            self.dentro_evacuantes = np.ones(len(elegidas), dtype=bool)
+            for i, j in enumerate(elegidas):
+                pos   = tuple(empty_positions[j].tolist())
+                agent = Evacuante(f"U{i}", self, indice=i)   # Crea un evacuante con ID único
+                self.grid.place_agent(agent, pos)    # Lo ubica en la posición
+                self.ocupacion.agregar(pos)
+                self.schedule.add(agent)             # Lo añade al scheduler
+                self.evacuantes.append(agent)
+
+        self.metricas.vincular(self)                 # Cuenta el estado inicial y guarda la fila del tick 0
+
+    def _colocar_brigadistas(self, brigadistas, radio):
+        """
+        Crea los brigadistas: 'brigadistas' es una cantidad (se ubican al azar en
+        pasillos, con un flujo propio que no altera la ubicación de los evacuantes)
+        o una lista de posiciones.
+        """
+        if isinstance(brigadistas, int):
+            pasillos = np.argwhere(self.terreno.vista == PASILLO)
+            elegidas = self.flujos.python("brigadistas").sample(range(len(pasillos)), min(brigadistas, len(pasillos)))
+            brigadistas = [tuple(pasillos[j].tolist()) for j in elegidas]
+        for i, pos in enumerate(brigadistas):
+            brigadista = Brigadista(f"B{i}", self, radio)
+            self.grid.place_agent(brigadista, tuple(pos))
+            self.schedule.add(brigadista)
+            self.brigadistas.append(brigadista)
+            self._brigadistas_en.setdefault(brigadista.pos, []).append(brigadista)
+        self.cercania = RejillaCubetas(self.width, self.height, 2 * radio + 1)
+
+    @property
+    def map_2d(self):
+        """Filas de texto del mapa actual (con el fuego y los derrumbes que haya)."""
+        return como_texto(self.terreno)
 
     # --- MÉTODO PARA GENERAR FUEGO EN CASILLAS DE LOCALES ---
     def _generar_fuego_inicial(self, n_llamas=5):
@@ -121,183 +209,249 @@ class ShoppingModel(Model):
         Selecciona aleatoriamente 'n_llamas' celdas tipo 'L' (locales)
         y las convierte en fuego ('F').
         """
-        from random import sample
-        locales = [
-            (x, self.height - 1 - y)
-            for y, row in enumerate(self.map_2d)
-            for x, symbol in enumerate(row)
-            if symbol == "L"
-        ]
-
-        for pos in sample(locales, min(n_llamas, len(locales))):
-            print("🔥 Fuego en:", pos)
-            for obj in self.grid.get_cell_list_contents(pos):
-                if isinstance(obj, ShoppingCell):
-                    obj.cell_type = "F"
-                    print("   ↳ Cambiado a fuego:", obj)
-                    break
+        locales  = np.argwhere(self.terreno.vista == LOCAL)
+        elegidos = self.rng_fuego.choice(len(locales), size=min(n_llamas, len(locales)), replace=False)
+
+        nuevas_llamas = self.fuego.encender(tuple(locales[i].tolist()) for i in elegidos)
+        self._registrar_celdas(IGNICION, nuevas_llamas)
+        self._matar_brigadistas_en(nuevas_llamas, "fuego")
+        self._celdas_cambiadas(nuevas_llamas)
 
         self.alarma_activa = True  # Activa la alarma global
 
     def _propagar_fuego(self):
         """
-        Propaga el fuego a UNA celda adyacente (local o pasillo) por cada celda en llamas.
+        Propaga el fuego a UNA celda adyacente (local o pasillo) por cada celda en llamas,
+        con probabilidad 'probabilidad_fuego'. El motor de fuego solo recorre el frente activo.
         """
-        from random import shuffle
-
-        nuevas_llamas = []
-        probabilidad_fuego = 0.3  # Probabilidad de que el fuego se propague a una celda adyacente
-
-        for x in range(self.width):
-            for y in range(self.height):
-                for obj in self.grid.get_cell_list_contents((x, y)):
-                    if isinstance(obj, ShoppingCell) and obj.cell_type == "F":
-                        # Busca vecinos candidatos
-                        if random() < probabilidad_fuego:
-                            vecinos = self.grid.get_neighborhood((x, y), moore=True, include_center=False)
-                            candidatos = []
-                            for nx, ny in vecinos:
-                                for vecino in self.grid.get_cell_list_contents((nx, ny)):
-                                    if isinstance(vecino, ShoppingCell) and vecino.cell_type in ("L", "."):
-                                        candidatos.append((nx, ny))
-                            # Si hay candidatos, elige uno al azar
-                            if candidatos:
-                                shuffle(candidatos)
-                                nuevas_llamas.append(candidatos[0])
-        # Cambia las celdas seleccionadas a fuego 
-        for pos in nuevas_llamas:
-            for obj in self.grid.get_cell_list_contents(pos):
-                if isinstance(obj, ShoppingCell):
-                    obj.cell_type = "F"
-                    break
-
-        for pos in nuevas_llamas:
-            for obj in self.grid.get_cell_list_contents(pos):
-                if isinstance(obj, ShoppingCell):
-                    obj.cell_type = "F"
-                # Si hay un evacuante en la celda, lo "mata :("
-                self.matar_evacuante(pos[0], pos[1], obj, "fuego")
+        nuevas_llamas = self.fuego.propagar()
+        self._registrar_celdas(IGNICION, nuevas_llamas)
+
+        # Solo las celdas recién encendidas pueden matar evacuantes o cortar rutas
+        self._matar_en(nuevas_llamas, "fuego")
+
+        # Repara rutas y percepción solo alrededor de las nuevas llamas
+        self._celdas_cambiadas(nuevas_llamas)
 
     def _generar_derrumbe(self):
         """
-        Cada 8 ticks, genera un derrumbe (barrera de longitud 4) en posición y dirección aleatoria.
+        Genera un derrumbe (barrera de 'longitud_derrumbe' celdas, horizontal o vertical)
+        en un sitio elegido uniformemente entre todos los válidos: solo sobre pasillo o local.
         Si un evacuante está debajo, muere.
         """
-        from random import randint, choice
-
-        # Direcciones posibles: horizontal (1,0) o vertical (0,1)
-        direcciones = [(1, 0), (0, 1)]
-        dx, dy = choice(direcciones)
-        longitud_derrumbe = 4  # Longitud del derrumbe
-
-        # Buscar una posición inicial válida (que no sea muro ni salida)
-        intentos = 0
-        while True:
-            x = randint(0, self.width - 1)
-            y = randint(0, self.height - 1)
-            posiciones = [(x + i * dx, y + i * dy) for i in range(longitud_derrumbe)]
-            # Verifica que todas las posiciones estén dentro del grid y sean transitables
-            if all(
-                0 <= px < self.width and 0 <= py < self.height
-                for px, py in posiciones
-            ):
-                # Solo permite derrumbe sobre pasillo o local
-                celdas_validas = True
-                for px, py in posiciones:
-                    for obj in self.grid.get_cell_list_contents((px, py)):
-                        if isinstance(obj, ShoppingCell) and obj.cell_type not in (".", "L"):
-                            celdas_validas = False
-                if celdas_validas:
-                    break
-            intentos += 1
-            if intentos > 100:  # Evita bucle infinito si no hay espacio
-                return
+        posiciones = self.derrumbes.sortear(self.rng_derrumbe)
+        if posiciones is None:  # Ya no queda ningún sitio válido
+            return
 
         # Aplica el derrumbe
+        self._registrar_celdas(DERRUMBE, posiciones)
         for px, py in posiciones:
+            self.terreno.cambiar((px, py), "D")  # Derrumbe
+        self.metricas.derrumbadas += len(posiciones)
+        self._matar_en(posiciones, "derrumbe")
+
+        self._celdas_cambiadas(posiciones)
+
+    def _sortear_tick(self):
+        """
+        Sorteos del tick para todos los evacuantes a la vez, indexados por agente:
+        el orden en que cada uno prueba sus vecinos y su clave de desempate.
+        Como no dependen del orden de despacho, el resultado tampoco.
+        """
+        n = len(self.evacuantes)
+        self.sorteo_vecinos   = self.rng_movimiento.integers(0, len(ORDENES), n)
+        self.claves_conflicto = self.rng_conflictos.random(n)
+
+    def _resolver_movimientos(self, despachados):
+        """
+        Entre step() y advance(): junta las celdas propuestas por los agentes y
+        resuelve los conflictos en lote. A los que pierden se les borra el destino.
+        El desempate usa una clave sorteada por índice de agente, así el resultado
+        no depende del orden en que el scheduler los despachó.
+        """
+        moviles = [a for a in despachados if getattr(a, "destino", None) is not None]
+        if not moviles:
+            return
+        alto    = self.height
+        origen  = np.array([a.pos[0] * alto + a.pos[1] for a in moviles], dtype=np.int64)
+        destino = np.array([a.destino[0] * alto + a.destino[1] for a in moviles], dtype=np.int64)
+        prioridad = self.claves_conflicto[[a.indice for a in moviles]]
+
+        gana = resolver_conflictos(origen, destino, prioridad, self.ocupacion.conteo.reshape(-1))
+        for agent, g in zip(moviles, gana.tolist()):
+            if not g:
+                agent.destino = None
+
+    def _matar_en(self, celdas, accion):
+        """Mata (con causa 'accion') a los evacuantes dentro del edificio y a los brigadistas en esas celdas."""
+        self._matar_brigadistas_en(celdas, accion)
+        if self.poblacion is not None:
+            self.poblacion.matar_en(celdas, accion)
+            return
+        for px, py in celdas:
+            # Si hay un evacuante en la celda, lo "mata :("
+            if self.ocupacion.libre((px, py)):
+                continue
             for obj in self.grid.get_cell_list_contents((px, py)):
-                if isinstance(obj, ShoppingCell):
-                    obj.cell_type = "D"  # Derrumbe
-                # Si hay un evacuante en la celda, lo "mata :("
-                self.matar_evacuante(px, py, obj, "derrumbe")
+                self.matar_evacuante(px, py, obj, accion)
+
+    def _matar_brigadistas_en(self, celdas, accion):
+        """Mata (con causa 'accion') a los brigadistas parados en esas celdas."""
+        if not self._brigadistas_en:
+            return
+        for x, y in celdas:
+            for brigadista in list(self._brigadistas_en.get((x, y), ())):
+                self.matar_brigadista(brigadista, accion)
+
+    def matar_brigadista(self, brigadista, accion):
+        """
+        Marca al brigadista como muerto y lo saca del activador. No cuenta en
+        'retirados' (ahí solo están los evacuantes que terminaron).
+        """
+        en_celda = self._brigadistas_en[brigadista.pos]
+        en_celda.remove(brigadista)
+        if not en_celda:
+            del self._brigadistas_en[brigadista.pos]
+        brigadista.causa_muerte = accion
+        self.schedule.remove(brigadista)
 
     def matar_evacuante(self, px, py, obj, accion):
         """
-        Si hay un evacuante en la posición (px, py), lo marca como muerto.
+        Si hay un evacuante (todavía dentro del edificio) en la posición (px, py),
+        lo marca como muerto.
         """
-        if isinstance(obj, Evacuante) and obj.state != Evacuante.MUERTO:
-            print(f"💀 Evacuante muerto por {accion} en:", (px, py))
+        if isinstance(obj, Evacuante) and obj.en_edificio:
+            self.ocupacion.quitar(obj.pos)
+            self.dentro_evacuantes[obj.indice] = False
+            self.metricas.cambiar(obj.state, Evacuante.MUERTO)
             obj.state = Evacuante.MUERTO
+            obj.causa_muerte = accion
+            self.schedule.retirar(obj)               # Ya no vuelve a despacharse
+            if self.eventos.activos[MUERTE]:
+                self.eventos.registrar(MUERTE, self.tick_counter, obj.indice, px, py, CAUSAS.index(accion))
 
+    def _celdas_cambiadas(self, celdas):
+        """
+        Avisa a las estructuras derivadas del terreno que estas celdas cambiaron
+        de tipo, para que se reparen solo localmente.
+        """
+        self.campo.actualizar(celdas)
+        self.percepcion.actualizar(celdas)
+        self.derrumbes.actualizar(celdas)
+        if self.plano is not None:
+            self.plano.actualizar(celdas)
+
+    def _registrar_celdas(self, tipo, celdas):
+        """Registra un evento de terreno (ignición o derrumbe) por cada celda, si el tipo está habilitado."""
+        if self.eventos.activos[tipo]:
+            for x, y in celdas:
+                self.eventos.registrar(tipo, self.tick_counter, -1, x, y)
+
+    def evacuantes_cerca(self, pos, radio):
+        """
+        Índices (en self.evacuantes) de los evacuantes dentro del edificio a
+        distancia de Chebyshev <= radio de pos. La rejilla se arma con las
+        posiciones del inicio del tick, una sola vez por tick.
+        """
+        if self._tick_cercania != self.tick_counter:
+            posiciones, estado = estado_agentes(self)
+            dentro = np.flatnonzero(estado < EVACUATED)
+            self.cercania.reconstruir(posiciones[dentro], dentro)
+            self._tick_cercania = self.tick_counter
+        return self.cercania.cercanos(pos, radio)
+
+    def instruir(self, indices):
+        """
+        Los evacuantes indicados reciben la ruta a la salida más cercana: desde
+        ahora siguen el campo de distancias, como si hubieran visto una salida.
+        Devuelve cuántos no la conocían todavía.
+        """
+        if self.poblacion is not None:
+            indices = np.asarray(indices, dtype=np.int64)
+            nuevos  = indices[~self.poblacion.conoce[indices]]
+            self.poblacion.conoce[nuevos] = True
+            return len(nuevos)
+        nuevos = 0
+        for i in indices:
+            agent = self.evacuantes[i]
+            if not agent.conoce_salida:
+                agent.conoce_salida = True
+                nuevos += 1
+        return nuevos
+
+    def salida_mas_cercana(self, pos):
+        """
+        Devuelve la salida más cercana (por ruta transitable) a pos, o None si no hay.
+        Es una consulta directa al campo de distancias.
+        """
+        return self.campo.salida_mas_cercana(pos)
     
+    def evacuacion_terminada(self):
+        """
+        Indica si ya no queda nadie por evacuar: todos los evacuantes
+        salieron (EVACUATED) o murieron (MUERTO). Usa los contadores del scheduler
+        (o de la población, con el motor de arreglos).
+        """
+        retirados = self.schedule.retirados if self.poblacion is None else self.poblacion.retirados
+        return retirados[Evacuante.EVACUATED] + retirados[Evacuante.MUERTO] >= len(self.evacuantes)
+
+    def huella(self):
+        """
+        Resumen (hash) del estado actual: terreno, posiciones y estados de los
+        evacuantes y contador de ticks. Dos corridas con la misma semilla y los
+        mismos parámetros tienen la misma huella en cada tick.
+        """
+        h = hashlib.sha256(self.terreno.vista.tobytes())
+        if self.poblacion is not None:
+            h.update(repr(self.tick_counter).encode())
+            h.update(self.poblacion.pos.tobytes())
+            h.update(self.poblacion.estado.tobytes())
+            return h.hexdigest()
+        h.update(repr((self.tick_counter, [(a.unique_id, a.pos, a.state) for a in self.evacuantes])).encode())
+        return h.hexdigest()
+
+    def instantanea(self) -> bytes:
+        """Estado completo del modelo como bytes, para restaurarlo o bifurcarlo (ver instantanea.py)."""
+        from .instantanea import capturar
+        return capturar(self)
+
+    @classmethod
+    def desde_instantanea(cls, datos: bytes, **opciones) -> "ShoppingModel":
+        """Modelo que continúa exactamente desde una instantánea tomada con instantanea()."""
+        from .instantanea import restaurar
+        return restaurar(datos, **opciones)
+
     # --- AVANCE GLOBAL DEL MODELO ---
     def step(self):
         """
         Ejecuta un paso (tick) de la simulación:
-        1. Avanza todos los agentes.
+        1. Avanza los agentes activos (propuestas, conflictos y movimiento simultáneo).
         2. Incrementa el contador.
         3. Dispara el fuego en el tick 2.
+        4. Si ya no queda ningún agente activo, marca la corrida como terminada.
+        5. Guarda la fila de métricas del tick (si corresponde).
         """
+        self._sortear_tick()
         self.schedule.step()
+        if self.poblacion is not None:
+            self.poblacion.step()
         self.tick_counter += 1
 
         # Genera fuego inicial en el primer tick
         if self.tick_counter == 2:
-            self._generar_fuego_inicial()
+            self._generar_fuego_inicial(self.llamas_iniciales)
         
         # Propaga el fuego a partir del tick 3
         if self.alarma_activa:
             self._propagar_fuego()
 
-        # Genera un derrumbe aleatorio cada 8 ticks
-        if self.tick_counter % 8 == 0:
+        # Genera un derrumbe aleatorio cada 'intervalo_derrumbe' ticks
+        if self.intervalo_derrumbe and self.tick_counter % self.intervalo_derrumbe == 0:
             self._generar_derrumbe()
 
-# === VISUALIZACIÓN DE LOS AGENTES ===
-def agent_portrayal(agent):
-    """
-    Define cómo se visualiza cada tipo de agente en la grilla.
-    """
-    portrayal = {"Shape": "rect", "Filled": "true", "w": 1, "h": 1, "Layer": 1}
-
-    if isinstance(agent, ShoppingCell):
-        color_map = {
-            '#': "saddlebrown",  # Muro
-            '.': "white",        # Pasillo
-            'F': "red",          # Fuego
-            'D': "black",        # Derrumbe
-            'S': "green",        # Salida
-            'L': "blue",         # Local comercial
-            ' ': "white"
-        }
-        portrayal["Color"] = color_map.get(agent.cell_type, "gray")
-        portrayal["Layer"] = 0
-
-    elif isinstance(agent, Evacuante):
-        # Los evacuantes se dibujan como círculos
-        portrayal["Shape"] = "circle"
-        portrayal["r"]     = 0.5
-        portrayal["Color"] = "purple"
-        if agent.state == Evacuante.MUERTO:
-            portrayal["Color"] = "gray"
-        # elif agent.state == Evacuante.EVACUATED:
-        #     portrayal["Color"] = "yellow"
-        # elif agent.state == Evacuante.EVACUATING:
-        #     portrayal["Color"] = "red"
-        portrayal["Layer"] = 1
-
-    return portrayal
-
-
-# === CONFIGURAR Y LANZAR EL SERVIDOR MESA ===
-canvas = CanvasGrid(agent_portrayal, 49, 40, canvas_width, canvas_height)
-
-server = ModularServer(
-    ShoppingModel,            # Modelo
-    [canvas],                 # Elementos visuales
-    "Simulación Centro Comercial (Mesa)",  # Título
-    {}                        # Parámetros del modelo
-)
-
-server.port = 8521
-server.launch()
\ No newline at end of file
+        # Sin evacuantes dentro del edificio no hay nada más que simular (el servidor y los lotes
+        # se detienen); los brigadistas siguen en el activador pero no cuentan
+        if self.evacuacion_terminada():
+            self.running = False
+
+        self.metricas.registrar(self)
@@ -0,0 +1,67 @@
+# espacial.py
+
+from typing import List, Tuple
+import numpy as np
+
+
+class RejillaCubetas:
+    """
+    Índice espacial de puntos por cubetas: el mapa se divide en cuadrados de
+    'lado' x 'lado' celdas y cada punto queda en la cubeta que lo contiene.
+    Se reconstruye entero de una vez (ordenamiento por conteo con NumPy) en
+    lugar de mantenerse punto por punto, porque entre dos consultas se mueve
+    casi todo el mundo. Una consulta solo mira las cubetas que tocan su
+    ventana (2 x 2 como mucho si la ventana no es más ancha que una cubeta),
+    sin recorrer la grilla.
+    """
+
+    def __init__(self, width: int, height: int, lado: int):
+        """
+        :param width, height: Tamaño del mapa en celdas
+        :param lado: Lado de cada cubeta en celdas
+        """
+        self.width  = width
+        self.height = height
+        self.lado   = lado
+        self.columnas = -(-width // lado)                     # Cubetas por eje (redondeo hacia arriba)
+        self.filas    = -(-height // lado)
+        self._inicio: List[int] = [0] * (self.columnas * self.filas + 1)   # Cubeta -> primer punto en _orden
+        self._orden:  List[int] = []                         # Identificadores agrupados por cubeta
+        self._x:      List[int] = []                         # Posición de cada punto, en el orden de _orden
+        self._y:      List[int] = []
+
+    def reconstruir(self, pos: np.ndarray, ids: np.ndarray):
+        """
+        Vuelve a llenar la rejilla.
+        :param pos: Arreglo (N, 2) con la posición de cada punto
+        :param ids: Identificador de cada punto (lo que devuelven las consultas)
+        """
+        xs, ys  = pos[:, 0].astype(np.int64), pos[:, 1].astype(np.int64)
+        cubeta  = (xs // self.lado) * self.filas + ys // self.lado
+        orden   = np.argsort(cubeta, kind="stable")
+        conteo  = np.bincount(cubeta, minlength=self.columnas * self.filas)
+        self._inicio = np.concatenate([[0], np.cumsum(conteo)]).tolist()
+        self._orden  = np.asarray(ids)[orden].tolist()
+        self._x      = xs[orden].tolist()
+        self._y      = ys[orden].tolist()
+
+    def __len__(self):
+        return len(self._orden)
+
+    def cercanos(self, pos: Tuple[int, int], radio: int) -> List[int]:
+        """
+        Identificadores de los puntos a distancia de Chebyshev <= radio de pos
+        (el cuadrado de lado 2 * radio + 1 centrado en pos), en orden de cubeta.
+        """
+        x, y  = pos
+        lado, filas = self.lado, self.filas
+        inicio, orden, xs, ys = self._inicio, self._orden, self._x, self._y
+        cx0, cx1 = max(x - radio, 0) // lado, min(x + radio, self.width - 1) // lado
+        cy0, cy1 = max(y - radio, 0) // lado, min(y + radio, self.height - 1) // lado
+        encontrados = []
+        for cx in range(cx0, cx1 + 1):
+            for c in range(cx * filas + cy0, cx * filas + cy1 + 1):
+                for k in range(inicio[c], inicio[c + 1]):
+                    if abs(xs[k] - x) <= radio and abs(ys[k] - y) <= radio:
+                        encontrados.append(orden[k])
+        return encontrados
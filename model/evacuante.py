@@ -1,8 +1,13 @@
 # evacuante.py
 
-from typing import Tuple, List
+from typing import Tuple
 from mesa import Agent
 
+from .terreno import PASILLO, SALIDA
+from .eventos import MOVIMIENTO, SALIDA_VISTA, EVACUADO
+from .movimiento import ORDENES
+from .replanificacion import PlanificadorIncremental
+
 class Evacuante(Agent):
     """
     Agente que representa a una persona que debe evacuar el edificio.
@@ -17,99 +22,77 @@ class Evacuante(Agent):
     EVACUATED    = "evacuated"   # Llegó a una salida
     MUERTO       = "muerto"      # El agente ha muerto por fuego
 
-    def __init__(self, unique_id: str, model, vision: int = 3):
+    def __init__(self, unique_id: str, model, vision: int = 3, indice: int = -1):
         """
         Inicializa el evacuante.
         :param unique_id: ID único del agente
         :param model: Referencia al modelo global (ShoppingModel)
         :param vision: Rango de percepción (distancia Manhattan)
+        :param indice: Número entero del agente (se usa en el registro de eventos)
         """
         super().__init__(unique_id, model)
+        self.indice        = indice                          # Identificador entero del agente
         self.state         = Evacuante.IDLE                  # Estado inicial
         self.vision        = vision                          # Rango de visión
-        self.path: List[Tuple[int, int]] = []                # Ruta hacia salida (cuando la tiene)
         self.ticks_waiting = 0                               # Cuántos ticks ha estado bloqueado
+        self.conoce_salida = False                           # Ya vio una salida: sigue el campo de distancias
+        self.tick_evacuacion = None                          # Tick en que llegó a una salida
+        self.causa_muerte    = None                          # "fuego" o "derrumbe" si murió
+        self.destino: Tuple[int, int] | None = None          # Celda propuesta en step(), se aplica en advance()
+        self.planificador: PlanificadorIncremental | None = None   # Solo con navegación "incremental"
+
+    @property
+    def en_edificio(self) -> bool:
+        """Indica si sigue vivo dentro del edificio (no evacuado ni muerto)."""
+        return self.state not in (Evacuante.EVACUATED, Evacuante.MUERTO)
 
     # ================================
     # PERCEPCIÓN
     # ================================
 
-    def _get_neighborhood(self) -> List[Tuple[int, int]]:
+    def _see_exit(self) -> Tuple[int, int] | None:
         """
-        Devuelve una lista de coordenadas dentro del rango de visión del agente.
-        La distancia utilizada es la de Manhattan.
+        Retorna la posición de la salida visible ('S') más cercana dentro de su rango de visión.
+        Si no ve ninguna, devuelve None. Es una sola consulta a la tabla de percepción del modelo.
         """
-        x, y = self.pos
-        cells = []
-        for dx in range(-self.vision, self.vision + 1):
-            for dy in range(-self.vision, self.vision + 1):
-                if abs(dx) + abs(dy) <= self.vision:
-                    nx, ny = x + dx, y + dy
-                    if 0 <= nx < self.model.width and 0 <= ny < self.model.height:
-                        cells.append((nx, ny))
-        return cells
-
-    def _see_exit(self, neighborhood: List[Tuple[int, int]]) -> Tuple[int, int] | None:
-        """
-        Recorre su vecindario y retorna la posición de la primera salida visible ('S').
-        Si no ve ninguna, devuelve None.
-        """
-        for pos in neighborhood:
-            for obj in self.model.grid.get_cell_list_contents(pos):
-                if getattr(obj, "cell_type", None) == "S":
-                    print("📗 Evacuante ve salida en:", pos)
-                    return pos
-        return None
+        salida = self.model.percepcion.salida_visible(self.pos, self.vision)
+        if salida is not None and self.model.eventos.activos[SALIDA_VISTA]:
+            self.model.eventos.registrar(SALIDA_VISTA, self.model.tick_counter, self.indice, *salida)
+        return salida
 
     # ================================
     # MOVIMIENTO
     # ================================
 
-    def _find_path(self, target: Tuple[int, int]) -> List[Tuple[int, int]]:
+    def _mover(self, destino: Tuple[int, int]):
         """
-        Encuentra una ruta hacia la celda objetivo (target), usando BFS (anchura).
-        Evita celdas bloqueadas como fuego ('F'), derrumbe ('D') y muros ('#').
-        Devuelve una lista de coordenadas con el camino o lista vacía si no hay.
+        Mueve al agente a 'destino' en la grilla, actualiza el índice de
+        ocupación (si sigue dentro del edificio) y el arreglo de posiciones del
+        modelo, y registra el movimiento.
         """
-        from collections import deque
-
-        visited = {self.pos}
-        queue   = deque([(self.pos, [])])  # tupla: (posición actual, camino hasta aquí)
-
-        while queue:
-            current, path = queue.popleft()
-            if current == target:
-                return path  # ruta encontrada
-
-            x, y = current
-            for dx, dy in [(1,0), (-1,0), (0,1), (0,-1)]:  # vecinos cardinales
-                nx, ny = x + dx, y + dy
-                if not (0 <= nx < self.model.width and 0 <= ny < self.model.height):
-                    continue
-                if (nx, ny) in visited:
-                    continue
+        if self.en_edificio:
+            self.model.ocupacion.mover(self.pos, destino)
+        self.model.grid.move_agent(self, destino)
+        self.model.pos_evacuantes[self.indice] = destino
+        eventos = self.model.eventos
+        if eventos.activos[MOVIMIENTO]:
+            eventos.registrar(MOVIMIENTO, self.model.tick_counter, self.indice, *destino)
 
-                # Verifica que la celda no sea peligrosa o muro
-                cell_safe = True
-                for obj in self.model.grid.get_cell_list_contents((nx, ny)):
-                    if getattr(obj, "cell_type", None) in ("#", "F", "D"):
-                        cell_safe = False
-                        break
-
-                if cell_safe:
-                    visited.add((nx, ny))
-                    queue.append(((nx, ny), path + [(nx, ny)]))
-
-        return []  # No se encontró camino
+    def _descender_campo(self) -> Tuple[int, int] | None:
+        """
+        Casilla que baja un paso por el campo de distancias del modelo
+        hacia la salida más cercana. Es una consulta O(1), sin BFS propia.
+        """
+        return self.model.campo.siguiente_paso(self.pos)
 
-    def _move_along_path(self):
+    def _paso_incremental(self) -> Tuple[int, int] | None:
         """
-        Avanza una casilla siguiendo su ruta calculada.
-        Si no tiene ruta, no se mueve.
+        Casilla siguiente según su propio planificador (D* Lite): parte del plano
+        del edificio y solo repara la ruta cuando ve celdas que cambiaron.
         """
-        if self.path:
-            next_pos = self.path.pop(0)
-            self.model.grid.move_agent(self, next_pos)
+        if self.planificador is None:
+            self.planificador = PlanificadorIncremental(self.model.plano, self.pos)
+        return self.planificador.siguiente_paso(self.pos, self.vision)
 
     # ================================
     # INTERACCIÓN (Ejemplo básico)
@@ -130,49 +113,33 @@ class Evacuante(Agent):
 
     def step(self):
         """
-        Define el comportamiento del agente en cada tick:
+        Primera fase del tick: decide, sin moverse, a qué celda quiere ir.
         - Si se activa la alarma y está IDLE, cambia a EVACUATING.
-        - Si está evacuando, sigue su ruta o recalcula.
-        - Si está bloqueado o evacuado, se queda quieto.
-        - Si está IDLE, se mueve aleatoriamente por el entorno.
+        - Si está evacuando y ya vio una salida (o lo instruyó un brigadista), propone
+          el siguiente paso del campo (o de su planificador, con navegación incremental).
+        - Si no tiene otro paso, propone un movimiento aleatorio por los pasillos.
+        El modelo resuelve los conflictos entre propuestas y advance() aplica el movimiento.
         """
+        self.destino = None
+
         # 1. Transición a estado de evacuación si se activa la alarma
         if self.model.alarma_activa and self.state == Evacuante.IDLE:
+            self.model.metricas.cambiar(Evacuante.IDLE, Evacuante.EVACUATING)
             self.state = Evacuante.EVACUATING
-            #salida = self.model.salida_mas_cercana(self.pos) TODO: descomentar si se quiere calcular salida al inicio
-            #if salida:
-                #self.path = self._find_path(salida)
 
         # 2. Escanear su entorno
-        neighborhood = self._get_neighborhood()
-        salida_visible = self._see_exit(neighborhood)
+        salida_visible = self._see_exit()
 
-        # 3. Comportamiento según el estado actual
+        # 3. Propuesta según el estado actual
+        destino = None
         if self.state == Evacuante.EVACUATING:
-            # Si ve una salida, intenta recalcular la ruta hacia ella
+            # Si ve una salida, desde ahora sigue el campo de distancias hacia ella
             if salida_visible:
-                self.path = self._find_path(salida_visible)
+                self.conoce_salida = True
 
-            # Si su ruta quedó vacía o no es válida, busca nueva salida
-            #if not self.path: TODO: descomentar si se quiere recalcular ruta al no tener salida
-            #    salida = self.model.salida_mas_cercana(self.pos)
-            #    if salida:
-            #        self.path = self._find_path(salida)
-            #    else:
-            #        self.state = Evacuante.BLOCKED  # no hay ruta posible
-
-            # Avanza un paso
-            self._move_along_path()
-
-            # Revisa si ya llegó a una salida
-            for obj in self.model.grid.get_cell_list_contents(self.pos):
-                if getattr(obj, "cell_type", None) == "S":
-                    self.state = Evacuante.EVACUATED
-                    break
-
-        elif self.state == Evacuante.IDLE:
-            # Si no hay alarma, se mueve aleatoriamente por los pasillos
-            self.random_move()
+            # Hasta conocer una salida camina sin rumbo, con cualquier navegación
+            if self.conoce_salida:
+                destino = self._paso_incremental() if self.model.navegacion == "incremental" else self._descender_campo()
 
         elif self.state == Evacuante.MUERTO:
             # Si está muerto, no hace nada
@@ -180,40 +147,48 @@ class Evacuante(Agent):
 
         # 4. Comunicación básica
         self._communicate()
-        self.random_move() # TODO se coloca provisionalmente para evitar que se quede parado
+        if destino is None:
+            destino = self._paso_aleatorio() # TODO se coloca provisionalmente para evitar que se quede parado
+        self.destino = destino
+
+    def advance(self):
+        """
+        Segunda fase del tick: si su propuesta ganó (el modelo deja 'destino' en
+        None a los que pierden un conflicto), se mueve; luego revisa si llegó a una salida.
+        """
+        if self.destino is not None:
+            self._mover(self.destino)
+            self.destino = None
+
+        # Revisa si ya llegó a una salida
+        if self.state == Evacuante.EVACUATING and self.model.terreno.codigo(self.pos) == SALIDA:
+            self.model.ocupacion.quitar(self.pos)                # Ya no ocupa lugar dentro del edificio
+            self.model.dentro_evacuantes[self.indice] = False
+            self.model.metricas.cambiar(self.state, Evacuante.EVACUATED)
+            self.model.metricas.evacuado_en(self.pos)
+            self.state = Evacuante.EVACUATED
+            self.tick_evacuacion = self.model.tick_counter + 1   # El contador se incrementa al final del tick
+            if self.model.eventos.activos[EVACUADO]:
+                self.model.eventos.registrar(EVACUADO, self.model.tick_counter, self.indice, *self.pos)
+            self.model.schedule.retirar(self)                    # Ya salió: deja de despacharse
 
     # ================================
     # MOVIMIENTO ALEATORIO (IDLE)
     # ================================
 
-    def random_move(self):
+    def _paso_aleatorio(self) -> Tuple[int, int] | None:
         """
-        Se mueve a una de las celdas vecinas que sean pasillos ('.'),
-        siempre que no estén ocupadas por otro evacuante.
-        Imprime el movimiento en consola para depuración.
+        Propone la primera celda vecina (en el orden sorteado para el agente en este
+        tick) que sea pasillo ('.') y esté libre al inicio del tick. Si no hay ninguna, None.
         """
-        from random import shuffle
         x0, y0 = self.pos
         vecinos = [(x0+dx, y0+dy) for dx,dy in [(1,0),(-1,0),(0,1),(0,-1)]]
-        shuffle(vecinos)
+        orden   = ORDENES[self.model.sorteo_vecinos[self.indice]]       # Orden sorteado para este agente en el tick
+        vecinos = [vecinos[k] for k in orden]
 
         for nx, ny in vecinos:
             if 0 <= nx < self.model.width and 0 <= ny < self.model.height:
-                # Revisa si hay una ShoppingCell con tipo '.'
-                celda = next(
-                    (a for a in self.model.grid.get_cell_list_contents((nx, ny))
-                     if a.__class__.__name__ == "ShoppingCell"),  # evita import circular
-                    None
-                )
-                if celda is None or celda.cell_type != ".":
-                    continue
-
-                # Evita moverse a una celda ya ocupada por otro evacuante
-                if any(isinstance(a, Evacuante)
-                       for a in self.model.grid.get_cell_list_contents((nx, ny))):
-                    continue
-
-                # Movimiento válido: se mueve y reporta
-                self.model.grid.move_agent(self, (nx, ny))
-                print(f"{self.unique_id}: ({x0},{y0}) → ({nx},{ny})")
-                break
+                # Revisa en la capa de terreno que la celda sea pasillo '.' y que nadie esté ahí
+                if self.model.terreno.codigo((nx, ny)) == PASILLO and self.model.ocupacion.libre((nx, ny)):
+                    return nx, ny
+        return None
@@ -0,0 +1,99 @@
+# eventos.py
+
+import glob
+import os
+from typing import Dict
+import numpy as np
+
+# ---------- TIPOS DE EVENTO ----------
+MOVIMIENTO    = 0   # Un evacuante se movió (x, y = destino)
+SALIDA_VISTA  = 1   # Un evacuante ve una salida (x, y = salida)
+IGNICION      = 2   # Una celda se prendió fuego
+DERRUMBE      = 3   # Una celda quedó bajo un derrumbe
+MUERTE        = 4   # Un evacuante murió (dato = causa)
+EVACUADO      = 5   # Un evacuante llegó a una salida
+
+NOMBRES = ["movimiento", "salida_vista", "ignicion", "derrumbe", "muerte", "evacuado"]
+CAUSAS  = ["fuego", "derrumbe"]                       # Códigos de 'dato' para MUERTE
+
+# Columnas de cada evento (formato columnar, igual en memoria y en disco)
+COLUMNAS = np.dtype([
+    ("tick",   np.int32),
+    ("tipo",   np.uint8),
+    ("agente", np.int32),    # Índice del evacuante, -1 si no aplica
+    ("x",      np.int32),
+    ("y",      np.int32),
+    ("dato",   np.int32),    # Dato extra según el tipo, -1 si no aplica
+])
+
+
+class RegistroEventos:
+    """
+    Registro de eventos tipados en un buffer circular preasignado.
+    - Cada tipo se puede habilitar o deshabilitar: el llamador revisa
+      'activos[tipo]' antes de registrar, así un evento apagado casi no cuesta.
+    - Si se da 'ruta', el buffer se vuelca completo a un archivo .npz por bloque
+      cuando se llena; si no, se sobrescriben los eventos más viejos.
+    """
+
+    def __init__(self, capacidad: int = 65536, ruta: str | None = None, habilitados=None):
+        """
+        :param capacidad: Eventos que caben en memoria antes de volcar/sobrescribir
+        :param ruta: Carpeta donde volcar los bloques .npz (None = solo memoria)
+        :param habilitados: Tipos habilitados (por defecto todos menos MOVIMIENTO y SALIDA_VISTA,
+                            que ocurren para cada agente en cada tick)
+        """
+        if habilitados is None:
+            habilitados = [IGNICION, DERRUMBE, MUERTE, EVACUADO]
+        self.activos    = [tipo in habilitados for tipo in range(len(NOMBRES))]
+        self.capacidad  = capacidad
+        self.ruta       = ruta
+        self._buffer    = np.empty(capacidad, dtype=COLUMNAS)
+        self._n         = 0        # Próxima posición libre del buffer
+        self._vuelta    = False    # El buffer ya dio la vuelta (solo en modo memoria)
+        self._bloques   = 0        # Bloques ya volcados a disco
+        if ruta:
+            os.makedirs(ruta, exist_ok=True)
+
+    def habilitar(self, tipo: int, activo: bool = True):
+        """Habilita (o, con activo=False, deshabilita) el registro de un tipo de evento."""
+        self.activos[tipo] = activo
+
+    def registrar(self, tipo: int, tick: int, agente: int = -1, x: int = -1, y: int = -1, dato: int = -1):
+        """Agrega un evento al buffer (no revisa si el tipo está habilitado)."""
+        self._buffer[self._n] = (tick, tipo, agente, x, y, dato)
+        self._n += 1
+        if self._n == self.capacidad:
+            if self.ruta:
+                self.volcar()
+            else:
+                self._n, self._vuelta = 0, True
+
+    # ================================
+    # LECTURA Y VOLCADO
+    # ================================
+
+    def eventos(self) -> np.ndarray:
+        """Eventos que siguen en memoria, en orden cronológico."""
+        if self._vuelta:
+            return np.concatenate([self._buffer[self._n:], self._buffer[:self._n]])
+        return self._buffer[:self._n].copy()
+
+    def volcar(self):
+        """Escribe los eventos en memoria como un bloque columnar .npz y vacía el buffer."""
+        if not self.ruta or self._n == 0:
+            return
+        bloque  = self._buffer[:self._n]
+        archivo = os.path.join(self.ruta, f"eventos_{self._bloques:06d}.npz")
+        np.savez(archivo, **{nombre: bloque[nombre] for nombre in COLUMNAS.names})
+        self._bloques += 1
+        self._n = 0
+
+
+def leer_eventos(ruta: str) -> Dict[str, np.ndarray]:
+    """Une todos los bloques .npz de una carpeta en un diccionario de columnas."""
+    bloques = [np.load(archivo) for archivo in sorted(glob.glob(os.path.join(ruta, "eventos_*.npz")))]
+    return {
+        nombre: np.concatenate([b[nombre] for b in bloques]) if bloques else np.empty(0, COLUMNAS[nombre])
+        for nombre in COLUMNAS.names
+    }
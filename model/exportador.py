@@ -0,0 +1,232 @@
+# exportador.py
+"""
+Exportador de cuadros sin navegador.
+
+Dibuja el terreno, los brigadistas y los evacuantes directamente desde los
+arreglos del modelo (con los colores de colores.py, los mismos del canvas web:
+fuego rojo, derrumbe negro, muertos gris, brigadistas naranja) y los guarda
+como secuencia de PNG o como animación APNG. El PNG se codifica con zlib de
+la librería estándar (imagen con paleta), así no hace falta ninguna
+librería de imágenes; el GIF animado solo está disponible si Pillow está instalado.
+
+Uso:
+    python -m model.exportador --max-ticks 200 --cada 2 --salida corrida.png
+    python -m model.exportador --formato png --salida cuadros/
+"""
+
+import argparse
+import os
+import struct
+import zlib
+from typing import List
+import numpy as np
+
+from .terreno import SIMBOLOS
+from .colores import COLORES_TERRENO, COLORES_ESTADO, COLOR_BRIGADISTA, RGB
+from .poblacion import ESTADOS, estado_agentes
+
+# Paleta: primero un color por código de terreno (el índice es el código), después los de los
+# agentes y al final el de los brigadistas
+_COLORES_AGENTE = sorted({c for c in COLORES_ESTADO.values() if c})
+PALETA = np.array([RGB[COLORES_TERRENO.get(s, "gray")] for s in SIMBOLOS] +
+                  [RGB[c] for c in _COLORES_AGENTE] + [RGB[COLOR_BRIGADISTA]], dtype=np.uint8)
+INDICE_BRIGADISTA = len(PALETA) - 1
+# Código de estado -> índice en la paleta (-1 = no se dibuja)
+INDICE_ESTADO = np.array([len(SIMBOLOS) + _COLORES_AGENTE.index(COLORES_ESTADO[e]) if COLORES_ESTADO[e] else -1
+                          for e in ESTADOS], dtype=np.int16)
+
+FORMATOS = ("png", "apng", "gif")
+
+
+# ================================
+# DIBUJO
+# ================================
+
+def _disco(escala: int):
+    """Desplazamientos (fila, columna) de los píxeles de un círculo inscrito en una celda."""
+    filas, columnas = np.mgrid[0:escala, 0:escala]
+    if escala >= 3:                                              # Con celdas chicas se pinta la celda entera
+        centro = (escala - 1) / 2
+        dentro = (filas - centro) ** 2 + (columnas - centro) ** 2 <= (escala / 2) ** 2
+        filas, columnas = filas[dentro], columnas[dentro]
+    return filas.ravel(), columnas.ravel()
+
+
+def cuadro(model, escala: int = 4) -> np.ndarray:
+    """
+    Imagen del estado actual como arreglo (alto * escala, ancho * escala) de
+    índices de PALETA. La fila 0 es la parte de arriba del mapa (y máximo).
+    """
+    imagen = model.terreno.vista.T[::-1]                        # (alto, ancho), con el eje Y invertido
+    imagen = np.repeat(np.repeat(imagen, escala, axis=0), escala, axis=1)
+
+    for x, y in (b.pos for b in model.brigadistas if b.vivo):      # Celda entera, debajo de los evacuantes
+        fila = (model.height - 1 - y) * escala
+        imagen[fila:fila + escala, x * escala:(x + 1) * escala] = INDICE_BRIGADISTA
+
+    pos, estado = estado_agentes(model)
+    color   = INDICE_ESTADO[estado]
+    visibles = color >= 0
+    if visibles.any():
+        dy, dx = _disco(escala)
+        filas    = (model.height - 1 - pos[visibles, 1])[:, None] * escala + dy
+        columnas = pos[visibles, 0][:, None] * escala + dx
+        imagen[filas, columnas] = color[visibles][:, None]
+    return imagen
+
+
+# ================================
+# CODIFICACIÓN PNG / APNG
+# ================================
+
+def _bloque(tipo: bytes, datos: bytes) -> bytes:
+    return struct.pack(">I", len(datos)) + tipo + datos + struct.pack(">I", zlib.crc32(tipo + datos))
+
+
+def _cabecera(imagen: np.ndarray) -> bytes:
+    alto, ancho = imagen.shape
+    return (b"\x89PNG\r\n\x1a\n"
+            + _bloque(b"IHDR", struct.pack(">IIBBBBB", ancho, alto, 8, 3, 0, 0, 0))   # 8 bits, con paleta
+            + _bloque(b"PLTE", PALETA.tobytes()))
+
+
+def _comprimir(imagen: np.ndarray, nivel: int = 6) -> bytes:
+    """Filas con filtro 0 (ninguno) comprimidas con zlib."""
+    filas = np.zeros((imagen.shape[0], imagen.shape[1] + 1), dtype=np.uint8)
+    filas[:, 1:] = imagen
+    return zlib.compress(filas.tobytes(), nivel)
+
+
+def codificar_png(imagen: np.ndarray) -> bytes:
+    """PNG de un cuadro (índices de PALETA)."""
+    return _cabecera(imagen) + _bloque(b"IDAT", _comprimir(imagen)) + _bloque(b"IEND", b"")
+
+
+def guardar_png(ruta: str, imagen: np.ndarray):
+    with open(ruta, "wb") as archivo:
+        archivo.write(codificar_png(imagen))
+
+
+def codificar_apng(cuadros: List[bytes], forma, demora_ms: int = 100) -> bytes:
+    """
+    APNG a partir de cuadros ya comprimidos con _comprimir() (todos de la misma forma).
+    Se repite indefinidamente.
+    """
+    alto, ancho = forma
+    partes = [_cabecera(np.empty(forma, dtype=np.uint8)),
+              _bloque(b"acTL", struct.pack(">II", len(cuadros), 0))]
+    secuencia = 0
+    for i, datos in enumerate(cuadros):
+        partes.append(_bloque(b"fcTL", struct.pack(">IIIIIHHBB", secuencia, ancho, alto, 0, 0,
+                                                   demora_ms, 1000, 0, 0)))
+        secuencia += 1
+        if i == 0:
+            partes.append(_bloque(b"IDAT", datos))
+        else:
+            partes.append(_bloque(b"fdAT", struct.pack(">I", secuencia) + datos))
+            secuencia += 1
+    partes.append(_bloque(b"IEND", b""))
+    return b"".join(partes)
+
+
+# ================================
+# GRABACIÓN DE UNA CORRIDA
+# ================================
+
+class Grabador:
+    """
+    Captura cuadros de un modelo cada 'cada' ticks y los guarda al cerrar.
+    - "png":  un archivo por cuadro dentro de la carpeta 'ruta' (cuadro_000123.png).
+    - "apng": una sola animación en 'ruta'; los cuadros se guardan ya comprimidos.
+    - "gif":  una sola animación en 'ruta' (requiere Pillow).
+    """
+
+    def __init__(self, model, ruta: str, cada: int = 1, escala: int = 4, formato: str = "apng",
+                 demora_ms: int = 100):
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato desconocido: {formato!r} (opciones: {FORMATOS})")
+        if formato == "gif":
+            try:
+                from PIL import Image  # noqa: F401
+            except ImportError:
+                raise ImportError("El formato GIF requiere Pillow; use 'apng' o 'png'") from None
+        self.model     = model
+        self.ruta      = ruta
+        self.cada      = cada
+        self.escala    = escala
+        self.formato   = formato
+        self.demora_ms = demora_ms
+        self._cuadros: list = []
+        self._forma    = None
+        self._ultimo   = None     # Tick del último cuadro capturado
+        if formato == "png":
+            os.makedirs(ruta, exist_ok=True)
+
+    def capturar(self, forzar: bool = False):
+        """Captura el cuadro del tick actual si corresponde según 'cada' (o siempre, con forzar)."""
+        tick = self.model.tick_counter
+        if tick == self._ultimo or (not forzar and tick % self.cada):
+            return
+        self._ultimo = tick
+        imagen = cuadro(self.model, self.escala)
+        self._forma = imagen.shape
+        if self.formato == "png":
+            guardar_png(os.path.join(self.ruta, f"cuadro_{tick:06d}.png"), imagen)
+        elif self.formato == "apng":
+            self._cuadros.append(_comprimir(imagen))
+        else:
+            self._cuadros.append(imagen)
+
+    def cerrar(self):
+        """Escribe la animación (si el formato es animado)."""
+        if self.formato == "png" or not self._cuadros:
+            return
+        if self.formato == "apng":
+            with open(self.ruta, "wb") as archivo:
+                archivo.write(codificar_apng(self._cuadros, self._forma, self.demora_ms))
+        else:
+            from PIL import Image
+            imagenes = []
+            for imagen in self._cuadros:
+                img = Image.fromarray(imagen, mode="P")
+                img.putpalette(PALETA.ravel().tolist())
+                imagenes.append(img)
+            imagenes[0].save(self.ruta, save_all=True, append_images=imagenes[1:],
+                             duration=self.demora_ms, loop=0)
+        self._cuadros = []
+
+
+def grabar_corrida(model, ruta: str, max_ticks: int = 500, cada: int = 1, escala: int = 4,
+                   formato: str = "apng", demora_ms: int = 100):
+    """Corre el modelo hasta que termina (o max_ticks) grabando un cuadro cada 'cada' ticks."""
+    grabador = Grabador(model, ruta, cada, escala, formato, demora_ms)
+    grabador.capturar()
+    while model.running and model.tick_counter < max_ticks:
+        model.step()
+        grabador.capturar()
+    grabador.capturar(forzar=True)                                # Siempre incluye el estado final
+    grabador.cerrar()
+    return grabador
+
+
+def main(argv=None):
+    from .entorno import ShoppingModel
+
+    parser = argparse.ArgumentParser(description="Graba una corrida de ShoppingModel como imágenes.")
+    parser.add_argument("--usuarios", type=int, default=7)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--mapa", default=None, help="Archivo de mapa (por defecto, el centro comercial)")
+    parser.add_argument("--max-ticks", type=int, default=500)
+    parser.add_argument("--cada", type=int, default=1, help="Un cuadro cada N ticks")
+    parser.add_argument("--escala", type=int, default=4, help="Píxeles por celda")
+    parser.add_argument("--formato", choices=FORMATOS, default="apng")
+    parser.add_argument("--demora", type=int, default=100, help="Milisegundos por cuadro de la animación")
+    parser.add_argument("--salida", default="corrida.png", help="Archivo de la animación o carpeta de PNGs")
+    args = parser.parse_args(argv)
+
+    model = ShoppingModel(num_users=args.usuarios, seed=args.semilla, mapa=args.mapa)
+    grabar_corrida(model, args.salida, args.max_ticks, args.cada, args.escala, args.formato, args.demora)
+
+
+if __name__ == "__main__":
+    main()
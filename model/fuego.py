@@ -0,0 +1,78 @@
+# fuego.py
+
+from typing import Iterable, List, Tuple
+import numpy as np
+
+from .terreno import Terreno, LOCAL, PASILLO, FUEGO
+
+# Vecindario de Moore (8 vecinos), igual al que usaba la propagación original
+MOORE = np.array([(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)], dtype=np.int32)
+
+
+class MotorFuego:
+    """
+    Motor de propagación del fuego basado en el frente activo.
+    Solo guarda las celdas en llamas que todavía tienen algún vecino combustible
+    (local 'L' o pasillo '.'), así que el costo de cada tick depende del tamaño
+    del frente y no del tamaño del mapa.
+    """
+
+    def __init__(self, terreno: Terreno, probabilidad: float = 0.3, rng: np.random.Generator | None = None):
+        """
+        :param terreno: Capa de terreno del modelo (se modifica al encender celdas)
+        :param probabilidad: Probabilidad de que cada celda en llamas propague el fuego en un tick
+        :param rng: Generador aleatorio de NumPy usado para la propagación
+        """
+        self.terreno      = terreno
+        self.probabilidad = probabilidad
+        self.rng          = rng if rng is not None else np.random.default_rng()
+        self.activas      = np.argwhere(terreno.vista == FUEGO).astype(np.int32)   # Frente activo (N, 2)
+        self.en_llamas    = len(self.activas)                                       # Total de celdas quemándose
+
+    def encender(self, celdas: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """
+        Convierte en fuego las celdas indicadas y las agrega al frente activo.
+        Devuelve solo las que no estaban ya en llamas.
+        """
+        nuevas = [pos for pos in dict.fromkeys(celdas) if self.terreno.codigo(pos) != FUEGO]
+        for pos in nuevas:
+            self.terreno.cambiar(pos, "F")
+        if nuevas:
+            self.activas    = np.concatenate([self.activas, np.array(nuevas, dtype=np.int32)])
+            self.en_llamas += len(nuevas)
+        return nuevas
+
+    def propagar(self) -> List[Tuple[int, int]]:
+        """
+        Avanza el fuego un tick: cada celda del frente, con la probabilidad
+        configurada, enciende UNA celda vecina combustible elegida al azar.
+        Todo el frente se evalúa en una sola operación vectorizada.
+        Devuelve la lista de celdas recién encendidas.
+        """
+        if len(self.activas) == 0:
+            return []
+
+        codigos = self.terreno.vista
+        vecinos = self.activas[:, None, :] + MOORE[None, :, :]              # (N, 8, 2)
+        dentro  = ((vecinos[..., 0] >= 0) & (vecinos[..., 0] < self.terreno.width) &
+                   (vecinos[..., 1] >= 0) & (vecinos[..., 1] < self.terreno.height))
+        xs = np.clip(vecinos[..., 0], 0, self.terreno.width - 1)
+        ys = np.clip(vecinos[..., 1], 0, self.terreno.height - 1)
+        tipo = codigos[xs, ys]
+        candidato = dentro & ((tipo == LOCAL) | (tipo == PASILLO))
+
+        # Las celdas sin vecinos combustibles ya no pueden propagar: salen del frente
+        # (las celdas solo dejan de ser combustibles, nunca vuelven a serlo)
+        sigue = candidato.any(axis=1)
+        if not sigue.all():
+            self.activas, vecinos, candidato = self.activas[sigue], vecinos[sigue], candidato[sigue]
+
+        # Qué celdas propagan este tick y a cuál de sus candidatos (elección uniforme)
+        propaga = np.flatnonzero(self.rng.random(len(self.activas)) < self.probabilidad)
+        if len(propaga) == 0:
+            return []
+        claves = self.rng.random((len(propaga), len(MOORE)))
+        claves[~candidato[propaga]] = -1.0
+        elegidas = vecinos[propaga, claves.argmax(axis=1)]
+
+        return self.encender(map(tuple, elegidas.tolist()))
@@ -0,0 +1,324 @@
+# instantanea.py
+"""
+Instantáneas del estado completo de un ShoppingModel y bifurcación de corridas.
+
+Una instantánea es un solo .npz comprimido (bytes) con el terreno, el campo de
+distancias, el frente del fuego, los arreglos de los evacuantes (el mismo
+formato para los dos motores de población), los planificadores de la
+navegación incremental (si se usa), los brigadistas, los contadores y el
+estado de todos los flujos aleatorios. Restaurarla da un modelo que sigue exactamente
+igual que el original (misma huella en cada tick), sin volver a simular
+desde el tick 0. El registro de eventos y las series de métricas no forman
+parte de la instantánea: el modelo restaurado empieza con unos nuevos (o los
+que se le pasen).
+
+bifurcar() corre muchas variantes a partir de una misma instantánea en un pool
+de procesos: se simula una sola vez el prefijo común y cada hija solo simula
+lo que la hace distinta (otra semilla, otra probabilidad de fuego, ...).
+
+Uso:
+    python -m model.instantanea --usuarios 50 --semilla 0 --hasta 20 --hijas 16 --procesos 4
+"""
+
+import argparse
+import io
+import json
+from contextlib import nullcontext
+from multiprocessing import Pool
+import numpy as np
+
+from .entorno import ShoppingModel
+from .evacuante import Evacuante
+from .terreno import Terreno
+from .derrumbes import IndiceDerrumbes
+from .eventos import CAUSAS
+from .poblacion import Poblacion, ESTADOS, EVACUATED, estado_agentes
+from .replanificacion import Plano, empaquetar, desempaquetar
+
+VERSION = 6                                            # Formato de la instantánea
+
+
+# ================================
+# CAPTURA
+# ================================
+
+def _arreglos_evacuantes(model):
+    """Arreglos por evacuante (iguales para los dos motores)."""
+    pos, estado = estado_agentes(model)
+    if model.poblacion is not None:
+        p = model.poblacion
+        return {
+            "pos": pos, "estado": estado, "vision": p.vision, "espera": p.espera, "conoce": p.conoce,
+            "tick_evacuacion": p.tick_evacuacion, "causa": p.causa,
+        }
+
+    evacuantes = model.evacuantes
+    return {
+        "pos":    pos,
+        "estado": estado,
+        "vision": np.array([a.vision for a in evacuantes], dtype=np.uint8),
+        "espera": np.array([a.ticks_waiting for a in evacuantes], dtype=np.int32),
+        "conoce": np.array([a.conoce_salida for a in evacuantes], dtype=bool),
+        "tick_evacuacion": np.array([-1 if a.tick_evacuacion is None else a.tick_evacuacion
+                                     for a in evacuantes], dtype=np.int32),
+        "causa":  np.array([-1 if a.causa_muerte is None else CAUSAS.index(a.causa_muerte)
+                            for a in evacuantes], dtype=np.int8),
+    }
+
+
+def capturar(model: ShoppingModel) -> bytes:
+    """Instantánea del estado actual del modelo (llamar entre ticks, nunca dentro de step())."""
+    flujos = model.flujos
+    retirados = model.schedule.retirados if model.poblacion is None else model.poblacion.retirados
+    meta = {
+        "version":          VERSION,
+        "semilla":          flujos.semilla,
+        "poblacion":        "agentes" if model.poblacion is None else "arreglos",
+        "navegacion":       model.navegacion,
+        "radio_brigadista": model.radio_brigadista,
+        "num_users":        model.num_users,
+        "llamas_iniciales": model.llamas_iniciales,
+        "probabilidad_fuego": model.fuego.probabilidad,
+        "longitud_derrumbe":  model.longitud_derrumbe,
+        "intervalo_derrumbe": model.intervalo_derrumbe,
+        "tick_counter":     model.tick_counter,
+        "alarma_activa":    model.alarma_activa,
+        "running":          model.running,
+        "pasos":            model.schedule.steps,
+        "saltados":         model.schedule.saltados,
+        "retirados":        dict(retirados),
+        "en_llamas":        model.fuego.en_llamas,
+        "aleatorio": {
+            "general": model.random.getstate(),
+            "numpy":   {nombre: g.bit_generator.state for nombre, g in flujos._numpy.items()},
+            "python":  {nombre: g.getstate() for nombre, g in flujos._python.items()},
+        },
+    }
+    planes = {}
+    if model.plano is not None:
+        planes = {"plano_distancia": model.plano.distancia, "plano_transitable": model.plano.transitable,
+                  **empaquetar([a.planificador for a in model.evacuantes])}
+    buffer = io.BytesIO()
+    np.savez_compressed(
+        buffer,
+        meta      = np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8),
+        terreno   = model.terreno.vista,
+        distancia = model.campo.distancia,
+        salida    = model.campo.salida,
+        salidas   = np.array(model.campo.salidas, dtype=np.int32).reshape(-1, 2),
+        fuego     = model.fuego.activas,
+        derrumbes = np.diff(model.derrumbes.sitios, prepend=0),     # Casi ordenados: las diferencias comprimen mucho mejor
+        **_arreglos_evacuantes(model),
+        brigadistas = np.array([b.pos for b in model.brigadistas], dtype=np.int32).reshape(-1, 2),
+        instruidos  = np.array([b.instruidos for b in model.brigadistas], dtype=np.int64),
+        causa_brigadistas = np.array([-1 if b.vivo else CAUSAS.index(b.causa_muerte) for b in model.brigadistas],
+                                     dtype=np.int8),
+        **planes,
+    )
+    return buffer.getvalue()
+
+
+def guardar(model: ShoppingModel, ruta: str):
+    with open(ruta, "wb") as archivo:
+        archivo.write(capturar(model))
+
+
+# ================================
+# RESTAURACIÓN
+# ================================
+
+def _estado_python(estado):
+    """random.getstate() vuelve de JSON como listas: se rearma la tupla."""
+    version, interno, gauss = estado
+    return version, tuple(interno), gauss
+
+
+def _restaurar_evacuantes(model, datos):
+    """Recrea los evacuantes (con el motor del modelo) a partir de los arreglos."""
+    pos, estado = datos["pos"], datos["estado"]
+    if model.poblacion is not None:
+        p = Poblacion(model, pos)
+        p.estado[:]          = estado
+        p.vision[:]          = datos["vision"]
+        p.espera[:]          = datos["espera"]
+        p.conoce[:]          = datos["conoce"]
+        p.tick_evacuacion[:] = datos["tick_evacuacion"]
+        p.causa[:]           = datos["causa"]
+        p.activos            = int(np.count_nonzero(estado < EVACUATED))
+        model.poblacion  = p
+        model.evacuantes = p.vistas
+        return
+
+    for i, (x, y) in enumerate(pos.tolist()):
+        agent = Evacuante(f"U{i}", model, vision=int(datos["vision"][i]), indice=i)
+        agent.state           = ESTADOS[estado[i]]
+        agent.ticks_waiting   = int(datos["espera"][i])
+        agent.conoce_salida   = bool(datos["conoce"][i])
+        tick = int(datos["tick_evacuacion"][i])
+        agent.tick_evacuacion = tick if tick >= 0 else None
+        causa = int(datos["causa"][i])
+        agent.causa_muerte    = CAUSAS[causa] if causa >= 0 else None
+        model.grid.place_agent(agent, (x, y))
+        if agent.en_edificio:
+            model.schedule.add(agent)                # Los que terminaron no vuelven al conjunto activo
+        model.evacuantes.append(agent)
+    model.pos_evacuantes    = np.array(pos, dtype=np.int32).reshape(len(pos), 2)
+    model.dentro_evacuantes = estado < EVACUATED
+
+
+def restaurar(datos: bytes, eventos=None, semilla=None, poblacion=None, metricas=None) -> ShoppingModel:
+    """
+    Modelo equivalente al que se capturó.
+    :param eventos: Registro de eventos para el modelo restaurado (por defecto, uno nuevo)
+    :param semilla: Si se da, los flujos aleatorios se derivan de esta semilla en lugar
+                    de continuar los guardados (para que cada bifurcación tenga su futuro)
+    :param poblacion: Motor de población del modelo restaurado (por defecto, el capturado;
+                      con navegación incremental solo puede ser "agentes")
+    :param metricas: Colector de métricas del modelo restaurado (sus series empiezan en el tick restaurado)
+    """
+    with np.load(io.BytesIO(datos)) as npz:
+        arreglos = {nombre: npz[nombre] for nombre in npz.files}
+    meta = json.loads(arreglos["meta"].tobytes())
+    if meta["version"] != VERSION:
+        raise ValueError(f"Versión de instantánea no soportada: {meta['version']}")
+
+    poblacion = poblacion or meta["poblacion"]
+    model = ShoppingModel(num_users=0, seed=meta["semilla"] if semilla is None else semilla,
+                          probabilidad_fuego=meta["probabilidad_fuego"], eventos=eventos,
+                          mapa=Terreno(arreglos["terreno"].copy()),
+                          llamas_iniciales=meta["llamas_iniciales"], poblacion=poblacion,
+                          longitud_derrumbe=meta["longitud_derrumbe"],
+                          intervalo_derrumbe=meta["intervalo_derrumbe"], metricas=metricas,
+                          navegacion=meta["navegacion"],
+                          brigadistas=[tuple(p) for p in arreglos["brigadistas"].tolist()],
+                          radio_brigadista=meta["radio_brigadista"])
+    model.num_users     = meta["num_users"]
+    model.tick_counter  = meta["tick_counter"]
+    model.alarma_activa = meta["alarma_activa"]
+    model.running       = meta["running"]
+    model.schedule.steps = model.schedule.time = meta["pasos"]
+    model.schedule.saltados = meta["saltados"]
+
+    # Estructuras derivadas del terreno: se copian tal cual (los desempates del campo
+    # dependen de la historia de reparaciones y el orden del frente y de los sitios
+    # de derrumbe, de los sorteos)
+    model.campo.distancia[:] = arreglos["distancia"]
+    model.campo.salida[:]    = arreglos["salida"]
+    model.campo.salidas      = [tuple(s) for s in arreglos["salidas"].tolist()]
+    model.fuego.activas      = arreglos["fuego"]
+    model.fuego.en_llamas    = meta["en_llamas"]
+    model.derrumbes.restaurar(np.cumsum(arreglos["derrumbes"]))
+    for brigadista, instruidos, causa in zip(model.brigadistas, arreglos["instruidos"].tolist(),
+                                             arreglos["causa_brigadistas"].tolist()):
+        brigadista.instruidos = instruidos
+        if causa >= 0:
+            model.matar_brigadista(brigadista, CAUSAS[causa])
+
+    _restaurar_evacuantes(model, arreglos)
+    if model.plano is not None:
+        # El plano es el del terreno original, no el del terreno capturado (que ya tiene fuego)
+        model.plano = Plano(model.terreno, arreglos["plano_distancia"], arreglos["plano_transitable"])
+        for agent, planificador in zip(model.evacuantes, desempaquetar(model.plano, arreglos)):
+            agent.planificador = planificador
+    retirados = model.schedule.retirados if model.poblacion is None else model.poblacion.retirados
+    retirados.update(meta["retirados"])
+
+    # Ocupación: solo los evacuantes que siguen dentro del edificio
+    vivos = arreglos["pos"][arreglos["estado"] < EVACUATED]
+    model.ocupacion.conteo[:] = 0
+    np.add.at(model.ocupacion.conteo, (vivos[:, 0], vivos[:, 1]), 1)
+    model.metricas.vincular(model)                   # Recuenta desde el estado restaurado
+
+    if semilla is None:
+        aleatorio = meta["aleatorio"]
+        model.random.setstate(_estado_python(aleatorio["general"]))
+        for nombre, estado in aleatorio["numpy"].items():
+            model.flujos.numpy(nombre).bit_generator.state = estado
+        for nombre, estado in aleatorio["python"].items():
+            model.flujos.python(nombre).setstate(_estado_python(estado))
+    return model
+
+
+def cargar(ruta: str, **opciones) -> ShoppingModel:
+    with open(ruta, "rb") as archivo:
+        return restaurar(archivo.read(), **opciones)
+
+
+# ================================
+# BIFURCACIÓN
+# ================================
+
+def continuar(datos: bytes, max_ticks: int = 500, semilla=None, probabilidad_fuego=None,
+              intervalo_derrumbe=None, longitud_derrumbe=None, **opciones):
+    """
+    Restaura la instantánea, aplica la variante y la corre hasta que termina
+    (o hasta el tick absoluto 'max_ticks'). Devuelve el resultado como en lotes.
+    """
+    from .lotes import resumir_corrida
+
+    model = restaurar(datos, semilla=semilla, **opciones)
+    if probabilidad_fuego is not None:
+        model.fuego.probabilidad = probabilidad_fuego
+    if intervalo_derrumbe is not None:
+        model.intervalo_derrumbe = intervalo_derrumbe
+    if longitud_derrumbe is not None and longitud_derrumbe != model.longitud_derrumbe:
+        model.longitud_derrumbe = longitud_derrumbe
+        model.derrumbes = IndiceDerrumbes(model.terreno, longitud_derrumbe)
+    while model.running and model.tick_counter < max_ticks:
+        model.step()
+    return resumir_corrida(model, model.flujos.semilla)
+
+
+def _continuar_tarea(tarea):
+    datos, max_ticks, variante = tarea
+    return continuar(datos, max_ticks, **variante)
+
+
+def bifurcar(datos: bytes, variantes, max_ticks: int = 500, procesos=None):
+    """
+    Corre cada variante (diccionario con 'semilla', 'probabilidad_fuego',
+    'intervalo_derrumbe', 'longitud_derrumbe' y/o 'poblacion') a partir de la misma instantánea, en un pool de 'procesos'
+    procesos (por defecto, uno por núcleo). Devuelve los resultados en el
+    orden de las variantes; cada uno incluye la variante que lo produjo.
+    """
+    variantes = [dict(v) for v in variantes]
+    tareas    = [(datos, max_ticks, v) for v in variantes]
+    pool      = nullcontext() if procesos == 1 else Pool(procesos)
+    with pool:
+        resultados = (map if procesos == 1 else pool.map)(_continuar_tarea, tareas)
+        resultados = list(resultados)
+    for resultado, variante in zip(resultados, variantes):
+        resultado["variante"] = variante
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Corre un prefijo común y lo bifurca en varias variantes.")
+    parser.add_argument("--usuarios", type=int, default=7)
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla del prefijo común")
+    parser.add_argument("--hasta", type=int, default=20, help="Tick en el que se toma la instantánea")
+    parser.add_argument("--hijas", type=int, default=8, help="Variantes (semillas semilla+1, semilla+2, ...)")
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--max-ticks", type=int, default=500)
+    parser.add_argument("--probabilidad-fuego", type=float, default=0.3)
+    parser.add_argument("--poblacion", choices=ShoppingModel.MOTORES_POBLACION, default="agentes")
+    parser.add_argument("--salida", default=None, help="Guarda también la instantánea en este archivo")
+    args = parser.parse_args(argv)
+
+    model = ShoppingModel(num_users=args.usuarios, seed=args.semilla,
+                          probabilidad_fuego=args.probabilidad_fuego, poblacion=args.poblacion)
+    while model.running and model.tick_counter < args.hasta:
+        model.step()
+    datos = capturar(model)
+    if args.salida:
+        with open(args.salida, "wb") as archivo:
+            archivo.write(datos)
+
+    variantes  = [{"semilla": args.semilla + 1 + i} for i in range(args.hijas)]
+    resultados = bifurcar(datos, variantes, args.max_ticks, args.procesos)
+    print(json.dumps({"tick": model.tick_counter, "bytes": len(datos), "resultados": resultados},
+                     indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+/**
+ * Canvas del centro comercial actualizado por deltas (ver model/visualizacion.py).
+ *
+ * Tres canvas superpuestos: el de abajo tiene el terreno, el del medio los
+ * brigadistas (fijos: se redibujan en el cuadro completo o si muere alguno) y
+ * el de arriba los evacuantes. Un cuadro "completo" dibuja todo; un cuadro
+ * "delta" solo repinta las celdas que cambiaron y mueve a los agentes que cambiaron.
+ * Como en la grilla de Mesa, y = 0 es la fila de abajo.
+ */
+const CanvasDeltas = function (canvasWidth, canvasHeight, gridWidth, gridHeight) {
+  const parent = document.createElement("div");
+  parent.style.height = `${canvasHeight}px`;
+  parent.className = "world-grid-parent";
+
+  const crearCanvas = () => {
+    const el = document.createElement("canvas");
+    el.width = canvasWidth;
+    el.height = canvasHeight;
+    el.className = "world-grid";
+    parent.appendChild(el);
+    return el.getContext("2d");
+  };
+  const ctxTerreno = crearCanvas();
+  const ctxBrigadistas = crearCanvas();
+  const ctxAgentes = crearCanvas();
+  document.getElementById("elements").appendChild(parent);
+
+  let ancho = gridWidth;
+  let alto = gridHeight;
+  let celdaW = Math.floor(canvasWidth / ancho);
+  let celdaH = Math.floor(canvasHeight / alto);
+  let colores = [];
+  let coloresAgente = [];
+  let colorBrigadista = "orange";
+  const agentes = new Map(); // agente -> [x, y, estado]
+
+  const pintarCelda = (indice, codigo) => {
+    const x = Math.floor(indice / alto);
+    const y = indice % alto;
+    ctxTerreno.fillStyle = colores[codigo] || "gray";
+    ctxTerreno.fillRect(x * celdaW, (alto - y - 1) * celdaH, celdaW, celdaH);
+  };
+
+  const borrarAgente = ([x, y]) => {
+    ctxAgentes.clearRect(x * celdaW, (alto - y - 1) * celdaH, celdaW, celdaH);
+  };
+
+  const dibujarAgente = ([x, y, estado]) => {
+    const color = coloresAgente[estado];
+    if (!color) return; // Evacuados: no se dibujan
+    const r = Math.max(Math.min(celdaW, celdaH) / 2 - 1, 1);
+    ctxAgentes.beginPath();
+    ctxAgentes.arc((x + 0.5) * celdaW, (alto - y - 0.5) * celdaH, r, 0, 2 * Math.PI);
+    ctxAgentes.fillStyle = color;
+    ctxAgentes.fill();
+  };
+
+  const dibujarBrigadistas = (lista) => {
+    ctxBrigadistas.clearRect(0, 0, canvasWidth, canvasHeight);
+    ctxBrigadistas.fillStyle = colorBrigadista;
+    // Celda entera, debajo de los evacuantes (como en el exportador)
+    for (let i = 0; i < lista.length; i += 2) {
+      ctxBrigadistas.fillRect(lista[i] * celdaW, (alto - lista[i + 1] - 1) * celdaH, celdaW, celdaH);
+    }
+  };
+
+  const aplicarAgentes = (lista) => {
+    const nuevos = [];
+    for (let i = 0; i < lista.length; i += 4) {
+      const anterior = agentes.get(lista[i]);
+      if (anterior) borrarAgente(anterior);
+      nuevos.push([lista[i], [lista[i + 1], lista[i + 2], lista[i + 3]]]);
+    }
+    // Primero se borran todas las posiciones viejas y después se dibujan las nuevas
+    for (const [agente, datos] of nuevos) {
+      agentes.set(agente, datos);
+      dibujarAgente(datos);
+    }
+  };
+
+  const cuadroCompleto = (data) => {
+    ancho = data.ancho;
+    alto = data.alto;
+    celdaW = Math.floor(canvasWidth / ancho);
+    celdaH = Math.floor(canvasHeight / alto);
+    colores = data.colores;
+    coloresAgente = data.colores_agente;
+    colorBrigadista = data.color_brigadista;
+
+    const terreno = atob(data.terreno);
+    ctxTerreno.clearRect(0, 0, canvasWidth, canvasHeight);
+    for (let i = 0; i < terreno.length; i++) pintarCelda(i, terreno.charCodeAt(i));
+    dibujarBrigadistas(data.brigadistas);
+
+    ctxAgentes.clearRect(0, 0, canvasWidth, canvasHeight);
+    agentes.clear();
+    aplicarAgentes(data.agentes);
+  };
+
+  const cuadroDelta = (data) => {
+    for (let i = 0; i < data.celdas.length; i += 2) pintarCelda(data.celdas[i], data.celdas[i + 1]);
+    aplicarAgentes(data.agentes);
+    if (data.brigadistas) dibujarBrigadistas(data.brigadistas); // Murió alguno
+  };
+
+  this.render = (data) => {
+    if (data.tipo === "completo") cuadroCompleto(data);
+    else cuadroDelta(data);
+  };
+
+  this.reset = () => {
+    ctxTerreno.clearRect(0, 0, canvasWidth, canvasHeight);
+    ctxBrigadistas.clearRect(0, 0, canvasWidth, canvasHeight);
+    ctxAgentes.clearRect(0, 0, canvasWidth, canvasHeight);
+    agentes.clear();
+  };
+};
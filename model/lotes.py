@@ -0,0 +1,280 @@
+# lotes.py
+"""
+Ejecución por lotes (sin navegador) de ShoppingModel.
+
+Corre N réplicas en un pool de procesos, guarda el resultado de cada réplica
+en un archivo JSON Lines apenas termina y devuelve un resumen agregado.
+
+Uso:
+    python -m model.lotes --replicas 1000 --usuarios 50 --procesos 8 --salida resultados.jsonl
+"""
+
+import argparse
+import glob
+import json
+import os
+from collections import Counter
+from contextlib import nullcontext
+from multiprocessing import Pool
+import numpy as np
+
+from .entorno import ShoppingModel, MAPA_CENTRO_COMERCIAL
+from .compartido import publicar
+from .evacuante import Evacuante
+from .exportador import grabar_corrida
+from .metricas import Metricas, series_a_csv
+from .eventos import RegistroEventos, leer_eventos
+from .almacen import AlmacenResultados, LIMITE_ALMACEN, clave_escenario
+from .perfilador import Perfilador
+from .particiones import Particiones
+
+
+# ================================
+# UNA RÉPLICA
+# ================================
+
+def ejecutar_replica(num_users, seed, max_ticks=500, animaciones=None, cada=1, metricas=None,
+                     metricas_cada=1, perfiles=None, particiones=None, eventos=None, almacen=None,
+                     limite_almacen=LIMITE_ALMACEN, animacion=None, **parametros):
+    """
+    Corre una simulación hasta que todos los evacuantes salieron o murieron
+    (o hasta 'max_ticks') y devuelve su resultado como diccionario.
+    Si se da la carpeta 'animaciones', guarda ahí la corrida como APNG
+    (replica_<seed>.png) con un cuadro cada 'cada' ticks; 'animacion' es en
+    cambio la ruta exacta del archivo.
+    Si se da la carpeta 'metricas', guarda ahí las series por tick de la réplica
+    (metricas_<seed>.csv) con una fila cada 'metricas_cada' ticks.
+    Si se da la carpeta 'perfiles', corre con el perfilador y guarda ahí la tabla
+    (perfil_<seed>.txt) y las pilas plegadas (perfil_<seed>.folded).
+    Si se da la carpeta 'eventos', guarda ahí la traza de eventos de la réplica
+    (bloques .npz en eventos_<seed>/, ver eventos.leer_eventos).
+    Con 'particiones' (motor de arreglos) el paso de la población se reparte
+    entre esa cantidad de procesos (ver particiones.py).
+    Con 'almacen' (archivo SQLite, ver almacen.py) primero se busca el mismo
+    escenario ya corrido: si está, no se simula y las métricas y la traza se
+    escriben desde lo guardado. Las animaciones y los perfiles siempre simulan.
+    """
+    carpeta_eventos = os.path.join(eventos, f"eventos_{seed}") if eventos else None
+    if animaciones and not animacion:
+        animacion = os.path.join(animaciones, f"replica_{seed}.png")
+    if almacen:
+        clave = clave_escenario(num_users, seed, max_ticks, metricas_cada, parametros)
+        if not (animacion or perfiles):
+            with AlmacenResultados(almacen, limite_almacen) as guardadas:
+                guardada = guardadas.buscar(clave, con_eventos=bool(eventos))
+            if guardada is not None:
+                if metricas:
+                    os.makedirs(metricas, exist_ok=True)
+                    series_a_csv(guardada["series"], os.path.join(metricas, f"metricas_{seed}.csv"))
+                if eventos:
+                    _limpiar_eventos(carpeta_eventos)
+                    np.savez(os.path.join(carpeta_eventos, "eventos_000000.npz"), **guardada["eventos"])
+                return guardada["resultado"]
+
+    if metricas or almacen:
+        parametros["metricas"] = Metricas(cada=metricas_cada)
+    if eventos:
+        _limpiar_eventos(carpeta_eventos)
+        parametros["eventos"] = RegistroEventos(ruta=carpeta_eventos)
+    model = ShoppingModel(num_users=num_users, seed=seed, **parametros)
+    with Particiones(model, particiones) if particiones else nullcontext():
+        if animacion:
+            os.makedirs(os.path.dirname(os.path.abspath(animacion)), exist_ok=True)
+            grabar_corrida(model, animacion, max_ticks, cada)
+        with Perfilador(model) if perfiles else nullcontext() as perfil:
+            while model.running and model.tick_counter < max_ticks:
+                model.step()
+    if perfiles:
+        os.makedirs(perfiles, exist_ok=True)
+        with open(os.path.join(perfiles, f"perfil_{seed}.txt"), "w") as archivo:
+            archivo.write(perfil.tabla() + "\n")
+        perfil.guardar_pilas(os.path.join(perfiles, f"perfil_{seed}.folded"))
+    if metricas:
+        os.makedirs(metricas, exist_ok=True)
+        model.metricas.a_csv(os.path.join(metricas, f"metricas_{seed}.csv"))
+    if eventos:
+        model.eventos.volcar()
+    resultado = resumir_corrida(model, seed)
+    if almacen:
+        with AlmacenResultados(almacen, limite_almacen) as guardadas:
+            guardadas.guardar(clave, resultado, model.metricas.series(),
+                              leer_eventos(carpeta_eventos) if eventos else None)
+    return resultado
+
+
+def _limpiar_eventos(carpeta):
+    """Crea la carpeta de la traza sin bloques de una corrida anterior."""
+    os.makedirs(carpeta, exist_ok=True)
+    for bloque in glob.glob(os.path.join(carpeta, "eventos_*.npz")):
+        os.remove(bloque)
+
+
+def resumir_corrida(model, seed):
+    """Resultado de una corrida ya terminada (o cortada) como diccionario."""
+    evacuados = [a for a in model.evacuantes if a.state == Evacuante.EVACUATED]
+    muertos   = [a for a in model.evacuantes if a.state == Evacuante.MUERTO]
+    return {
+        "seed":       seed,
+        "num_users":  len(model.evacuantes),
+        "ticks":      model.tick_counter,
+        "completa":   model.evacuacion_terminada(),
+        "evacuados":  len(evacuados),
+        "muertos":    len(muertos),
+        "muertes":    dict(Counter(a.causa_muerte for a in muertos)),
+        "tiempos_evacuacion": sorted(a.tick_evacuacion for a in evacuados),
+        **({"instruidos": sum(b.instruidos for b in model.brigadistas),
+            "brigadistas_muertos": sum(not b.vivo for b in model.brigadistas)} if model.brigadistas else {}),
+    }
+
+
+def _ejecutar_tarea(tarea):
+    num_users, seed, max_ticks, parametros = tarea
+    return ejecutar_replica(num_users, seed, max_ticks, **parametros)
+
+
+# ================================
+# RESUMEN AGREGADO
+# ================================
+
+class Resumen:
+    """
+    Acumula los resultados a medida que llegan, sin guardar las réplicas:
+    la memoria usada no depende del número de réplicas.
+    """
+
+    def __init__(self):
+        self.replicas    = 0
+        self.incompletas = 0
+        self.evacuados   = 0
+        self.muertos     = 0
+        self.muertes     = Counter()     # Muertes por causa ("fuego", "derrumbe")
+        self.tiempos     = Counter()     # Histograma: tick de evacuación -> cantidad
+
+    def agregar(self, resultado):
+        self.replicas    += 1
+        self.incompletas += not resultado["completa"]
+        self.evacuados   += resultado["evacuados"]
+        self.muertos     += resultado["muertos"]
+        self.muertes.update(resultado["muertes"])
+        self.tiempos.update(resultado["tiempos_evacuacion"])
+
+    def _percentil(self, q):
+        """Percentil q (0-100) del tiempo de evacuación a partir del histograma."""
+        total = sum(self.tiempos.values())
+        if total == 0:
+            return None
+        limite, acumulado = q / 100 * (total - 1), 0
+        for tick in sorted(self.tiempos):
+            acumulado += self.tiempos[tick]
+            if acumulado > limite:
+                return tick
+        return max(self.tiempos)
+
+    def como_dict(self):
+        total_tiempos = sum(self.tiempos.values())
+        return {
+            "replicas":    self.replicas,
+            "incompletas": self.incompletas,
+            "evacuados":   self.evacuados,
+            "muertos":     self.muertos,
+            "muertes":     dict(self.muertes),
+            "tiempo_evacuacion": {
+                "media":   (sum(t * n for t, n in self.tiempos.items()) / total_tiempos) if total_tiempos else None,
+                "p50":     self._percentil(50),
+                "p90":     self._percentil(90),
+                "p99":     self._percentil(99),
+                "histograma": {str(t): n for t, n in sorted(self.tiempos.items())},
+            },
+        }
+
+
+# ================================
+# LOTE COMPLETO
+# ================================
+
+def ejecutar_lote(replicas, num_users=7, semilla_base=0, procesos=None, max_ticks=500, salida=None,
+                  compartir=True, **parametros):
+    """
+    Corre 'replicas' simulaciones con semillas semilla_base, semilla_base + 1, ...
+    en un pool de 'procesos' procesos (por defecto, uno por núcleo).
+    Si se da 'salida', cada resultado se agrega como una línea JSON apenas termina.
+    Con 'compartir' (y más de un proceso) los datos estáticos del mapa se calculan
+    una sola vez y los procesos los mapean desde memoria compartida (ver compartido.py)
+    en lugar de reconstruirlos en cada réplica.
+    Devuelve el resumen agregado del lote.
+    """
+    estaticos = None
+    if compartir and procesos != 1 and parametros.get("estaticos") is None:
+        mapa = parametros.pop("mapa", None)
+        estaticos = publicar(mapa if mapa is not None else MAPA_CENTRO_COMERCIAL,
+                             longitud_derrumbe=parametros.get("longitud_derrumbe", 4))
+        parametros["estaticos"] = estaticos
+    tareas  = ((num_users, semilla_base + i, max_ticks, parametros) for i in range(replicas))
+    resumen = Resumen()
+
+    with (open(salida, "a") if salida else nullcontext()) as archivo, (estaticos or nullcontext()):
+        if procesos == 1:
+            resultados = map(_ejecutar_tarea, tareas)
+            pool = nullcontext()
+        else:
+            pool = Pool(procesos)
+            resultados = pool.imap_unordered(_ejecutar_tarea, tareas)
+
+        with pool:
+            for resultado in resultados:
+                if archivo:
+                    archivo.write(json.dumps(resultado) + "\n")
+                    archivo.flush()
+                resumen.agregar(resultado)
+
+    return resumen.como_dict()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Corre réplicas de ShoppingModel sin navegador.")
+    parser.add_argument("--replicas", type=int, default=100, help="Número de simulaciones")
+    parser.add_argument("--usuarios", type=int, default=7, help="Evacuantes por simulación")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla de la primera réplica")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos del pool (por defecto, uno por núcleo)")
+    parser.add_argument("--max-ticks", type=int, default=500, help="Tope de ticks por simulación")
+    parser.add_argument("--mapa", default=None, help="Archivo de mapa (por defecto, el centro comercial)")
+    parser.add_argument("--probabilidad-fuego", type=float, default=0.3, help="Probabilidad de propagación del fuego")
+    parser.add_argument("--longitud-derrumbe", type=int, default=4, help="Celdas de cada derrumbe")
+    parser.add_argument("--intervalo-derrumbe", type=int, default=8, help="Ticks entre derrumbes (0 = sin derrumbes)")
+    parser.add_argument("--poblacion", choices=ShoppingModel.MOTORES_POBLACION, default="agentes",
+                        help="Motor de población: objetos Evacuante o arreglos de NumPy")
+    parser.add_argument("--navegacion", choices=ShoppingModel.NAVEGACIONES, default="campo",
+                        help="Campo de distancias compartido (ve todos los peligros) o planificador D* Lite "
+                        "por evacuante (solo los peligros que ve); en los dos casos se sigue una ruta "
+                        "desde que el evacuante ve una salida o lo instruye un brigadista")
+    parser.add_argument("--brigadistas", type=int, default=0, help="Brigadistas ubicados al azar en pasillos")
+    parser.add_argument("--radio-brigadista", type=int, default=2, help="Alcance de las instrucciones de cada brigadista")
+    parser.add_argument("--animaciones", default=None, help="Carpeta donde guardar cada réplica como APNG")
+    parser.add_argument("--cada", type=int, default=1, help="Un cuadro de animación cada N ticks")
+    parser.add_argument("--metricas", default=None, help="Carpeta donde guardar las series por tick de cada réplica (CSV)")
+    parser.add_argument("--metricas-cada", type=int, default=1, help="Una fila de métricas cada N ticks")
+    parser.add_argument("--perfiles", default=None,
+                        help="Carpeta donde guardar el perfil por fases de cada réplica (tabla y pilas plegadas)")
+    parser.add_argument("--eventos", default=None, help="Carpeta donde guardar la traza de eventos de cada réplica")
+    parser.add_argument("--almacen", default=None,
+                        help="Archivo SQLite de resultados: las réplicas ya corridas no se vuelven a simular")
+    parser.add_argument("--almacen-limite", type=float, default=LIMITE_ALMACEN / 2**20,
+                        help="Tamaño máximo del almacén en MiB (se descartan las réplicas usadas hace más tiempo)")
+    parser.add_argument("--salida", default=None, help="Archivo JSON Lines donde guardar cada réplica")
+    args = parser.parse_args(argv)
+
+    resumen = ejecutar_lote(
+        args.replicas, args.usuarios, args.semilla, args.procesos, args.max_ticks, args.salida,
+        mapa=args.mapa, probabilidad_fuego=args.probabilidad_fuego, poblacion=args.poblacion,
+        navegacion=args.navegacion,
+        brigadistas=args.brigadistas, radio_brigadista=args.radio_brigadista,
+        longitud_derrumbe=args.longitud_derrumbe, intervalo_derrumbe=args.intervalo_derrumbe,
+        animaciones=args.animaciones, cada=args.cada, metricas=args.metricas, metricas_cada=args.metricas_cada,
+        perfiles=args.perfiles, eventos=args.eventos, almacen=args.almacen,
+        limite_almacen=int(args.almacen_limite * 2**20),
+    )
+    print(json.dumps(resumen, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
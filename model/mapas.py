@@ -0,0 +1,170 @@
+# mapas.py
+"""
+Carga y generación de mapas.
+
+- Los mapas de texto usan la misma leyenda que el mapa del centro comercial:
+  '#' muro, '.' pasillo, 'L' local, 'S' salida, 'F' fuego, 'D' derrumbe.
+- Cada mapa leído se guarda en binario (.npy) en una carpeta __mapas_cache__
+  junto al archivo, así la siguiente carga no vuelve a interpretar el texto.
+- generar_centro_comercial() produce edificios tipo mall de cualquier tamaño
+  (pasillos en cuadrícula, bloques de locales y salidas en el perímetro).
+"""
+
+import glob
+import os
+from typing import List
+import numpy as np
+
+from .terreno import Terreno, SIMBOLOS, MURO, PASILLO, LOCAL, SALIDA
+
+CARPETA_CACHE = "__mapas_cache__"
+
+
+# ================================
+# ARCHIVOS DE TEXTO
+# ================================
+
+def leer_mapa(ruta: str) -> List[str]:
+    """Devuelve las filas de texto de un archivo de mapa (sin líneas vacías al final)."""
+    with open(ruta, encoding="utf-8") as archivo:
+        filas = [linea.rstrip("\r\n") for linea in archivo]
+    while filas and not filas[-1]:
+        filas.pop()
+    return filas
+
+
+def guardar_mapa(terreno: Terreno, ruta: str):
+    """Escribe el terreno como archivo de texto con la leyenda del mapa."""
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        archivo.write("\n".join(como_texto(terreno)) + "\n")
+
+
+def como_texto(terreno: Terreno) -> List[str]:
+    """Filas de texto del terreno (la primera fila es la parte de arriba)."""
+    simbolos = np.frombuffer(SIMBOLOS.encode(), dtype=np.uint8)
+    filas = simbolos[terreno.vista.T[::-1]]                   # (alto, ancho), con el eje Y invertido
+    return [fila.tobytes().decode() for fila in filas]
+
+
+def como_terreno(mapa) -> Terreno:
+    """
+    Convierte cualquier forma de mapa en un Terreno nuevo:
+    una lista de filas de texto, la ruta de un archivo de mapa o un Terreno
+    (que se copia, para que el modelo no modifique el original).
+    """
+    if isinstance(mapa, Terreno):
+        return Terreno(np.array(mapa.vista))
+    if isinstance(mapa, (str, os.PathLike)):
+        return cargar_terreno(mapa)
+    return Terreno.desde_mapa(list(mapa))
+
+
+# ================================
+# CARGA CON CACHÉ BINARIA
+# ================================
+
+def _ruta_cache(ruta: str) -> str:
+    estado = os.stat(ruta)
+    carpeta, nombre = os.path.split(os.path.abspath(ruta))
+    return os.path.join(carpeta, CARPETA_CACHE, f"{nombre}.{estado.st_mtime_ns:x}-{estado.st_size:x}.npy")
+
+
+def cargar_terreno(ruta: str, cache: bool = True) -> Terreno:
+    """
+    Carga un mapa de texto como Terreno. Si existe una versión binaria
+    vigente (mismo archivo, misma fecha y tamaño) se abre directamente.
+    El arreglo se mapea en modo copia-al-escribir: leerlo es inmediato y
+    los cambios del modelo no tocan el archivo de caché.
+    """
+    if not cache:
+        return Terreno.desde_mapa(leer_mapa(ruta))
+
+    ruta_cache = _ruta_cache(ruta)
+    if os.path.exists(ruta_cache):
+        return Terreno(np.load(ruta_cache, mmap_mode="c"))
+
+    terreno = Terreno.desde_mapa(leer_mapa(ruta))
+    try:
+        os.makedirs(os.path.dirname(ruta_cache), exist_ok=True)
+        prefijo = ruta_cache.rsplit(".", 2)[0]
+        for vieja in glob.glob(glob.escape(prefijo) + ".*.npy"):   # Versiones viejas del mismo mapa
+            os.remove(vieja)
+        np.save(ruta_cache, terreno.vista)
+    except OSError:
+        pass                                                      # Sin permisos de escritura: solo no se cachea
+    return terreno
+
+
+# ================================
+# GENERADOR PROCEDURAL
+# ================================
+
+def _pasillos(rng: np.random.Generator, largo: int, bloque_min: int, bloque_max: int):
+    """Lista de (inicio, ancho) de los pasillos a lo largo de un eje de 'largo' celdas."""
+    pasillos = []
+    inicio = 1 + int(rng.integers(2, bloque_min + 1))
+    while inicio < largo - 3:
+        ancho = int(rng.integers(2, 5))
+        pasillos.append((inicio, min(ancho, largo - 1 - inicio)))
+        inicio += ancho + int(rng.integers(bloque_min, bloque_max + 1))
+    return pasillos or [(largo // 2 - 1, 2)]
+
+
+def generar_centro_comercial(ancho: int, alto: int, semilla: int = 0,
+                             bloque_min: int = 8, bloque_max: int = 18) -> Terreno:
+    """
+    Genera un centro comercial de ancho x alto celdas:
+    - muro en todo el perímetro, con salidas dobles donde llegan los pasillos;
+    - pasillos principales en cuadrícula (de 2 a 4 celdas de ancho);
+    - bloques de locales entre pasillos, algunos con un pasillo de servicio
+      y algunos convertidos en plazas abiertas.
+    """
+    if ancho < 10 or alto < 10:
+        raise ValueError("El mapa generado debe tener al menos 10 x 10 celdas")
+    rng = np.random.default_rng(semilla)
+    codigos = np.full((ancho, alto), LOCAL, dtype=np.uint8)
+
+    verticales   = _pasillos(rng, ancho, bloque_min, bloque_max)
+    horizontales = _pasillos(rng, alto, bloque_min, bloque_max)
+    for x0, w in verticales:
+        codigos[x0:x0 + w, 1:-1] = PASILLO
+    for y0, h in horizontales:
+        codigos[1:-1, y0:y0 + h] = PASILLO
+
+    # --- Bloques de locales: plazas y pasillos de servicio ---
+    bordes_x = [1] + [x0 + w for x0, w in verticales] + [ancho - 1]
+    finales_x = [x0 for x0, _ in verticales] + [ancho - 1]
+    bordes_y = [1] + [y0 + h for y0, h in horizontales] + [alto - 1]
+    finales_y = [y0 for y0, _ in horizontales] + [alto - 1]
+    for xa, xb in zip(bordes_x, finales_x):
+        for ya, yb in zip(bordes_y, finales_y):
+            if xb - xa < 2 or yb - ya < 2:
+                continue
+            sorteo = rng.random()
+            if sorteo < 0.08:
+                codigos[xa:xb, ya:yb] = PASILLO                   # Plaza abierta
+            elif sorteo < 0.40:
+                if xb - xa >= yb - ya:
+                    codigos[(xa + xb) // 2, ya:yb] = PASILLO      # Pasillo de servicio vertical
+                else:
+                    codigos[xa:xb, (ya + yb) // 2] = PASILLO      # Pasillo de servicio horizontal
+
+    # --- Perímetro y salidas ---
+    codigos[[0, -1], :] = MURO
+    codigos[:, [0, -1]] = MURO
+    salidas = 0
+    for x0, _ in verticales:
+        for y in (0, alto - 1):
+            if rng.random() < 0.5:
+                codigos[x0:x0 + 2, y] = SALIDA
+                salidas += 1
+    for y0, _ in horizontales:
+        for x in (0, ancho - 1):
+            if rng.random() < 0.5:
+                codigos[x, y0:y0 + 2] = SALIDA
+                salidas += 1
+    if salidas == 0:
+        x0 = verticales[0][0]
+        codigos[x0:x0 + 2, 0] = SALIDA
+
+    return Terreno(codigos)
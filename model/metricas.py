@@ -0,0 +1,164 @@
+# metricas.py
+
+import csv
+from typing import Dict, List, Tuple
+import numpy as np
+
+from .terreno import SALIDA, DERRUMBE
+from .campo import INFINITO
+from .poblacion import ESTADOS, CODIGO_ESTADO, EVACUATED, estado_agentes
+
+
+class Metricas:
+    """
+    Colector de métricas por tick con contadores que se mantienen en cada
+    transición (nunca se recorre el scheduler para contar):
+    - evacuantes por estado (el modelo y la población avisan con cambiar());
+    - celdas en llamas (contador del motor de fuego) y celdas derrumbadas;
+    - evacuaciones por puerta de salida (celdas 'S' contiguas).
+    Cada 'cada' ticks se guarda una fila en un arreglo preasignado (que se
+    duplica si se llena) junto con la distancia media a la salida de los que
+    siguen dentro. Con cada=0 solo se mantienen los contadores.
+    """
+
+    def __init__(self, cada: int = 1, capacidad: int = 1024):
+        """
+        :param cada: Guarda una fila cada 'cada' ticks (0 = no guarda series)
+        :param capacidad: Filas preasignadas (se duplica al llenarse)
+        """
+        self.cada        = cada
+        self.capacidad   = capacidad
+        self.estados     = np.zeros(len(ESTADOS), dtype=np.int64)   # Evacuantes por código de estado
+        self.derrumbadas = 0                                        # Celdas bajo un derrumbe
+        self.puertas: List[List[Tuple[int, int]]] = []              # Celdas de cada puerta de salida
+        self.por_puerta  = np.zeros(0, dtype=np.int64)              # Evacuados por puerta (acumulado)
+        self.columnas: List[str] = []
+        self._puerta     = None       # (ancho, alto) -> índice de puerta, -1 si no es salida
+        self._datos      = None       # Filas guardadas (capacidad, columnas)
+        self._n          = 0
+        self._anterior   = None       # por_puerta en la última fila guardada
+
+    # ================================
+    # VÍNCULO CON EL MODELO
+    # ================================
+
+    def vincular(self, model):
+        """
+        Cuenta una vez el estado actual del modelo (al crearlo o restaurarlo) y
+        empieza las series. Desde aquí los contadores solo se actualizan por transiciones.
+        """
+        codigos = model.terreno.vista
+        self._puerta, self.puertas = _puertas(codigos)
+        pos, estado = estado_agentes(model)
+        self.estados     = np.bincount(estado, minlength=len(ESTADOS)).astype(np.int64)
+        self.derrumbadas = int(np.count_nonzero(codigos == DERRUMBE))
+        self.por_puerta  = np.zeros(len(self.puertas), dtype=np.int64)
+        evacuados = pos[estado == EVACUATED]                 # Los evacuados se quedan sobre su salida
+        np.add.at(self.por_puerta, self._puerta[evacuados[:, 0], evacuados[:, 1]], 1)
+
+        self.columnas = (["tick"] + ESTADOS + ["en_llamas", "derrumbadas", "distancia_media"]
+                         + [f"salida_{i}" for i in range(len(self.puertas))])
+        self._datos    = np.zeros((self.capacidad, len(self.columnas)), dtype=np.float64) if self.cada else None
+        self._n        = 0
+        self._anterior = self.por_puerta.copy()
+        self.registrar(model)
+
+    # ================================
+    # TRANSICIONES
+    # ================================
+
+    def cambiar(self, anterior: str, nuevo: str):
+        """Un evacuante pasó del estado 'anterior' a 'nuevo' (nombres de Evacuante)."""
+        self.estados[CODIGO_ESTADO[anterior]] -= 1
+        self.estados[CODIGO_ESTADO[nuevo]]    += 1
+
+    def cambiar_codigos(self, anteriores: np.ndarray, nuevo: int):
+        """Varios evacuantes pasaron de sus códigos 'anteriores' al código 'nuevo'."""
+        self.estados -= np.bincount(anteriores, minlength=len(ESTADOS))
+        self.estados[nuevo] += len(anteriores)
+
+    def evacuado_en(self, pos: Tuple[int, int]):
+        self.por_puerta[self._puerta[pos]] += 1
+
+    def evacuados_en(self, pos: np.ndarray):
+        """pos: arreglo (N, 2) con la salida de cada evacuado."""
+        np.add.at(self.por_puerta, self._puerta[pos[:, 0], pos[:, 1]], 1)
+
+    # ================================
+    # SERIES
+    # ================================
+
+    def registrar(self, model):
+        """Guarda la fila del tick actual si corresponde según 'cada'."""
+        if not self.cada or model.tick_counter % self.cada:
+            return
+        if self._n == len(self._datos):
+            self._datos = np.concatenate([self._datos, np.zeros_like(self._datos)])
+        fila = self._datos[self._n]
+        fila[0] = model.tick_counter
+        fila[1:1 + len(ESTADOS)] = self.estados
+        k = 1 + len(ESTADOS)
+        fila[k]     = model.fuego.en_llamas
+        fila[k + 1] = self.derrumbadas
+        fila[k + 2] = _distancia_media(model)
+        fila[k + 3:] = self.por_puerta - self._anterior       # Evacuados por puerta desde la fila anterior
+        self._anterior[:] = self.por_puerta
+        self._n += 1
+
+    def series(self) -> Dict[str, np.ndarray]:
+        """Columnas guardadas hasta ahora (una entrada por columna)."""
+        datos = self._datos[:self._n] if self._datos is not None else np.zeros((0, len(self.columnas)))
+        series = {nombre: datos[:, i] for i, nombre in enumerate(self.columnas)}
+        for nombre in self.columnas:
+            if nombre != "distancia_media":
+                series[nombre] = series[nombre].astype(np.int64)
+        return series
+
+    def a_csv(self, ruta: str):
+        series_a_csv(self.series(), ruta)
+
+    def a_npz(self, ruta: str):
+        """Series como .npz (una entrada por columna) más las celdas de cada puerta."""
+        puertas = {f"celdas_salida_{i}": np.array(celdas, dtype=np.int32) for i, celdas in enumerate(self.puertas)}
+        np.savez_compressed(ruta, **self.series(), **puertas)
+
+
+def series_a_csv(series: Dict[str, np.ndarray], ruta: str):
+    """Escribe las series (una columna por entrada, en ese orden) como CSV."""
+    with open(ruta, "w", newline="") as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow(list(series))
+        escritor.writerows(zip(*(columna.tolist() for columna in series.values())))
+
+
+def _puertas(codigos: np.ndarray):
+    """Agrupa las celdas 'S' contiguas (vecinos cardinales) en puertas."""
+    puerta = np.full(codigos.shape, -1, dtype=np.int32)
+    puertas = []
+    for x, y in np.argwhere(codigos == SALIDA).tolist():
+        if puerta[x, y] >= 0:
+            continue
+        celdas, pendientes = [], [(x, y)]
+        puerta[x, y] = len(puertas)
+        while pendientes:
+            cx, cy = pendientes.pop()
+            celdas.append((cx, cy))
+            for nx, ny in ((cx + 1, cy), (cx - 1, cy), (cx, cy + 1), (cx, cy - 1)):
+                if (0 <= nx < codigos.shape[0] and 0 <= ny < codigos.shape[1]
+                        and codigos[nx, ny] == SALIDA and puerta[nx, ny] < 0):
+                    puerta[nx, ny] = len(puertas)
+                    pendientes.append((nx, ny))
+        puertas.append(sorted(celdas))
+    return puerta, puertas
+
+
+def _distancia_media(model) -> float:
+    """Distancia media (pasos por el campo) a la salida de los evacuantes dentro del edificio con ruta."""
+    if model.poblacion is not None:
+        p = model.poblacion
+        vivos = p.pos[p.estado < EVACUATED]
+    else:
+        vivos = model.pos_evacuantes[model.dentro_evacuantes]      # Mantenidos por Evacuante al moverse y salir
+    d = model.campo.distancia[vivos[:, 0], vivos[:, 1]]
+    d = d[d != INFINITO]
+    return float(d.mean()) if len(d) else float("nan")
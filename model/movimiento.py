@@ -0,0 +1,75 @@
+# movimiento.py
+
+from itertools import permutations
+import numpy as np
+
+ORDENES = np.array(list(permutations(range(4))), dtype=np.intp)   # Los 24 órdenes posibles de los 4 vecinos
+
+
+def resolver_conflictos(origen: np.ndarray, destino: np.ndarray, prioridad: np.ndarray,
+                        conteo: np.ndarray) -> np.ndarray:
+    """
+    Resuelve en una sola pasada (vectorizada) los movimientos propuestos en un tick.
+    Todas las celdas se dan como índice plano (x * alto + y).
+
+    :param origen: Celda actual de cada agente que propone moverse
+    :param destino: Celda a la que quiere ir cada uno
+    :param prioridad: Clave de desempate por agente (gana la menor), sorteada con semilla
+    :param conteo: Ocupación plana al inicio del tick (Ocupacion.conteo.reshape(-1))
+    :return: Arreglo booleano: True para los agentes que sí se mueven
+
+    Reglas:
+    1. Si varios quieren la misma celda, la obtiene el de menor prioridad.
+    2. Dos agentes no pueden intercambiar celdas (por ejemplo, en una puerta 'S' angosta).
+    3. Una celda ocupada solo se puede tomar si su ocupante se va; si el ocupante
+       se queda, el que quería entrar también se queda (y así en cadena).
+    """
+    n = len(origen)
+    gana = np.zeros(n, dtype=bool)
+    if n == 0:
+        return gana
+
+    # --- 1. Un ganador por celda destino ---
+    gana[ganadores_por_celda(destino, prioridad)] = True
+
+    # Agente que parte de cada celda destino (si alguno propone moverse desde ahí)
+    ocupante = ocupantes(origen, destino)
+    hay_ocupante = ocupante >= 0
+    ocupante = np.where(hay_ocupante, ocupante, 0)
+
+    # --- 2. Sin intercambios ---
+    intercambio = gana & hay_ocupante & gana[ocupante] & (destino[ocupante] == origen)
+    gana[intercambio] = False
+
+    # --- 3. Celdas ocupadas por quien se queda, en cadena ---
+    while True:
+        bloqueados = gana & ~se_libera(conteo[destino], hay_ocupante, gana[ocupante])
+        if not bloqueados.any():
+            return gana
+        gana[bloqueados] = False
+
+
+# Las tres piezas de resolver_conflictos, también usadas por la ejecución particionada
+# (particiones.py), que las aplica por franjas del mapa.
+
+def ganadores_por_celda(destino: np.ndarray, prioridad: np.ndarray) -> np.ndarray:
+    """Posiciones (en el arreglo) del agente de menor prioridad que pide cada celda destino."""
+    orden = np.lexsort((prioridad, destino))
+    primero = np.ones(len(destino), dtype=bool)
+    primero[1:] = destino[orden[1:]] != destino[orden[:-1]]
+    return orden[primero]
+
+
+def ocupantes(origen: np.ndarray, destino: np.ndarray) -> np.ndarray:
+    """Para cada destino, posición del agente que parte de esa celda (-1 si ninguno propone moverse desde ahí)."""
+    if len(origen) == 0:
+        return np.full(len(destino), -1, dtype=np.intp)
+    por_origen = np.argsort(origen, kind="stable")
+    k = np.minimum(np.searchsorted(origen[por_origen], destino), len(origen) - 1)
+    ocupante = por_origen[k]
+    return np.where(origen[ocupante] == destino, ocupante, -1)
+
+
+def se_libera(conteo_destino: np.ndarray, hay_ocupante: np.ndarray, gana_ocupante: np.ndarray) -> np.ndarray:
+    """El destino está vacío o su único ocupante se va."""
+    return (conteo_destino == 0) | ((conteo_destino == 1) & hay_ocupante & gana_ocupante)
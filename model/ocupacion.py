@@ -0,0 +1,59 @@
+# ocupacion.py
+
+from typing import Tuple
+import numpy as np
+
+
+class Ocupacion:
+    """
+    Índice de ocupación: cuántos evacuantes vivos (todavía dentro del edificio)
+    hay en cada celda. Se mantiene en cada movimiento, muerte y evacuación,
+    así saber si una celda está libre es una consulta O(1) y la densidad de
+    una ventana es una suma sobre un arreglo.
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width  = width
+        self.height = height
+        self.conteo = np.zeros((width, height), dtype=np.int32)
+
+    # ================================
+    # MANTENIMIENTO
+    # ================================
+
+    def agregar(self, pos: Tuple[int, int]):
+        self.conteo[pos] += 1
+
+    def quitar(self, pos: Tuple[int, int]):
+        self.conteo[pos] -= 1
+
+    def mover(self, desde: Tuple[int, int], hacia: Tuple[int, int]):
+        self.conteo[desde] -= 1
+        self.conteo[hacia] += 1
+
+    # ================================
+    # CONSULTAS
+    # ================================
+
+    def libre(self, pos: Tuple[int, int]) -> bool:
+        """Indica si no hay ningún evacuante vivo en la celda."""
+        return self.conteo[pos] == 0
+
+    def densidad(self, pos: Tuple[int, int], radio: int) -> int:
+        """Evacuantes vivos en el cuadrado de lado 2 * radio + 1 centrado en pos."""
+        x, y = pos
+        return int(self.conteo[max(x - radio, 0):x + radio + 1, max(y - radio, 0):y + radio + 1].sum())
+
+    def densidades(self, radio: int) -> np.ndarray:
+        """
+        Densidad de todas las celdas a la vez (misma ventana que densidad()),
+        usando una tabla de sumas acumuladas.
+        """
+        acumulada = np.zeros((self.width + 1, self.height + 1), dtype=np.int64)
+        acumulada[1:, 1:] = self.conteo.cumsum(axis=0).cumsum(axis=1)
+        x0 = np.clip(np.arange(self.width) - radio, 0, self.width)
+        x1 = np.clip(np.arange(self.width) + radio + 1, 0, self.width)
+        y0 = np.clip(np.arange(self.height) - radio, 0, self.height)
+        y1 = np.clip(np.arange(self.height) + radio + 1, 0, self.height)
+        return (acumulada[np.ix_(x1, y1)] - acumulada[np.ix_(x0, y1)]
+                - acumulada[np.ix_(x1, y0)] + acumulada[np.ix_(x0, y0)])
@@ -0,0 +1,348 @@
+# particiones.py
+"""
+Ejecución particionada de un solo modelo muy grande (motor de arreglos).
+
+El mapa se corta en franjas de columnas (x0 <= x < x1), cada una a cargo de un
+proceso. Los arreglos que leen y escriben los evacuantes (terreno, campo de
+distancias, tablas de salidas visibles, ocupación y la población) pasan a
+memoria compartida: un proceso ve sin copias las celdas de las franjas
+vecinas, así el halo (las columnas de borde que mira la percepción, el paso
+por el campo y los conflictos de quien cruza de franja) se lee directamente
+después de cada barrera.
+
+Cada tick de la población se hace en fases, con una barrera entre fases:
+1. "proponer": cada franja resuelve la alarma, la percepción y el destino
+   propuesto de los evacuantes que están en ella (igual que Poblacion.step);
+2. "ganar": cada franja elige el ganador de las celdas destino que caen en
+   ella, mirando también a los que llegan desde la columna vecina;
+3. "intercambios" y rondas de "bloquear": las reglas 2 y 3 de
+   resolver_conflictos. Una cadena de bloqueos puede cruzar franjas: se
+   repiten rondas hasta que ninguna franja cambia nada. El resultado es el
+   mismo que el de la pasada única (el mayor punto fijo de la regla);
+4. "mover" y "salir": cada franja actualiza la ocupación de sus propias celdas.
+El fuego, los derrumbes, las muertes y la reparación del campo los hace el
+proceso principal sobre los mismos arreglos: dependen de un único flujo
+aleatorio cada uno y su costo es proporcional al frente, no a la población.
+Con la misma semilla la corrida es idéntica a la de un solo proceso.
+
+Uso:
+    model = ShoppingModel(num_users=200000, seed=1, mapa=..., poblacion="arreglos")
+    with Particiones(model, procesos=8):
+        while model.running:
+            model.step()
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+from typing import List
+import numpy as np
+
+from .terreno import Terreno, SALIDA
+from .campo import CampoSalidas
+from .percepcion import Percepcion
+from .ocupacion import Ocupacion
+from .eventos import RegistroEventos, MOVIMIENTO, SALIDA_VISTA, EVACUADO
+from .movimiento import ganadores_por_celda, ocupantes, se_libera
+from .poblacion import Poblacion, ESTADOS, IDLE, EVACUATING, EVACUATED
+from .compartido import CARPETA_MEMORIA
+
+# Arreglos de la población que leen o escriben los procesos de las franjas
+ARREGLOS_POBLACION = ("pos", "estado", "vision", "conoce", "tick_evacuacion")
+
+
+class Particiones:
+    """
+    Reparte el paso de la población de un modelo entre 'procesos' procesos
+    mientras dura el bloque 'with'. Al salir los procesos terminan y el modelo
+    sigue funcionando en un solo proceso, desde el mismo estado.
+    Los radios de visión de los evacuantes no deben cambiar dentro del bloque.
+    """
+
+    def __init__(self, model, procesos: int | None = None):
+        if model.poblacion is None:
+            raise ValueError("La ejecución particionada requiere el motor de población 'arreglos'")
+        self.model    = model
+        self.procesos = procesos or os.cpu_count() or 1
+        self.franjas: List[tuple] = []                 # (x0, x1) de cada proceso
+        self.rondas   = 0                              # Rondas de bloqueo de todos los ticks
+        self._carpeta = None
+        self._conexiones = []
+        self._trabajadores = []
+
+    # ================================
+    # ACTIVACIÓN
+    # ================================
+
+    def __enter__(self):
+        model, poblacion = self.model, self.model.poblacion
+        self._carpeta = tempfile.mkdtemp(prefix="particiones_", dir=CARPETA_MEMORIA if os.path.isdir(CARPETA_MEMORIA)
+                                         else tempfile.gettempdir())
+
+        # --- Estado del modelo en memoria compartida (se reemplaza cada arreglo por su copia compartida) ---
+        terreno = model.terreno
+        terreno._codigos = self._compartir("codigos", terreno._codigos)
+        terreno.vista = terreno._codigos.view()
+        terreno.vista.flags.writeable = False
+        model.campo.distancia  = self._compartir("distancia", model.campo.distancia)
+        model.campo.salida     = self._compartir("salida", model.campo.salida)
+        model.ocupacion.conteo = self._compartir("conteo", model.ocupacion.conteo)
+        self.visiones = [int(v) for v in np.unique(poblacion.vision)]
+        for v in self.visiones:
+            model.percepcion._tablas[v] = self._compartir(f"vision_{v}", model.percepcion.tabla(v))
+        for nombre in ARREGLOS_POBLACION:
+            setattr(poblacion, nombre, self._compartir(nombre, getattr(poblacion, nombre)))
+
+        # --- Arreglos de cada tick, uno por evacuante ---
+        n = len(poblacion)
+        self._sorteo  = self._compartir("sorteo", np.zeros(n, dtype=np.int64))
+        self._claves  = self._compartir("claves", np.zeros(n, dtype=np.float64))
+        self._destino = self._compartir("destino", np.full(n, -1, dtype=np.int64))
+        self._visible = self._compartir("visible", np.full(n, -1, dtype=np.int32))
+        self._gana    = self._compartir("gana", np.zeros(n, dtype=bool))
+
+        # --- Franjas con la misma cantidad de evacuantes (al empezar) ---
+        self.franjas = _cortes(poblacion.pos[poblacion.estado < EVACUATED, 0], model.width, self.procesos)
+        for x0, x1 in self.franjas:
+            propia, remota = multiprocessing.Pipe()
+            proceso = multiprocessing.Process(
+                target=_trabajador, daemon=True,
+                args=(remota, self._carpeta, x0, x1, model.campo.salidas, self.visiones))
+            proceso.start()
+            self._conexiones.append(propia)
+            self._trabajadores.append(proceso)
+
+        self._step_original = poblacion.__dict__.get("step")
+        poblacion.step = self.step
+        return self
+
+    def __exit__(self, *error):
+        for conexion in self._conexiones:
+            conexion.send((None, ()))
+        for proceso in self._trabajadores:
+            proceso.join()
+        self._conexiones, self._trabajadores = [], []
+        poblacion = self.model.poblacion
+        if self._step_original is None:
+            del poblacion.step                           # Vuelve a verse Poblacion.step
+        else:
+            poblacion.step = self._step_original
+        shutil.rmtree(self._carpeta, ignore_errors=True)  # Los arreglos mapeados siguen válidos hasta liberarse
+        return False
+
+    def _compartir(self, nombre: str, arreglo: np.ndarray) -> np.ndarray:
+        compartido = np.lib.format.open_memmap(os.path.join(self._carpeta, f"{nombre}.npy"), mode="w+",
+                                               dtype=arreglo.dtype, shape=arreglo.shape)
+        compartido[...] = arreglo
+        return np.asarray(compartido)
+
+    def _todos(self, orden: str, *args) -> list:
+        """Envía la orden a todas las franjas y espera las respuestas (la barrera de cada fase)."""
+        for conexion in self._conexiones:
+            conexion.send((orden, args))
+        respuestas = [conexion.recv() for conexion in self._conexiones]
+        for respuesta in respuestas:
+            if isinstance(respuesta, Exception):
+                raise respuesta
+        return respuestas
+
+    # ================================
+    # TICK DE LA POBLACIÓN
+    # ================================
+
+    def step(self):
+        """Reemplaza a Poblacion.step: mismo resultado, repartido entre las franjas."""
+        model, poblacion = self.model, self.model.poblacion
+        if poblacion.activos == 0:
+            return
+        tick, eventos, metricas = model.tick_counter, model.eventos, model.metricas
+        self._sorteo[:] = model.sorteo_vecinos
+        self._claves[:] = model.claves_conflicto
+
+        # 1. Alarma, percepción y propuestas
+        alarmados = sum(self._todos("proponer", model.alarma_activa))
+        if alarmados:
+            metricas.cambiar_codigos(np.full(alarmados, IDLE, dtype=np.uint8), EVACUATING)
+        if eventos.activos[SALIDA_VISTA]:
+            vivos = np.flatnonzero(poblacion.estado < EVACUATED)
+            ven   = vivos[self._visible[vivos] >= 0]
+            for i, s in zip(ven.tolist(), self._visible[ven].tolist()):
+                eventos.registrar(SALIDA_VISTA, tick, i, *divmod(s, model.height))
+
+        # 2-3. Resolución de conflictos: ganadores, intercambios y rondas de bloqueo hasta que nada cambie
+        self._todos("ganar")
+        self._todos("intercambios")
+        primera = True
+        while any(self._todos("bloquear", primera)):
+            primera = False
+            self.rondas += 1
+        self.rondas += 1
+
+        # 4. Movimiento y llegada a la salida
+        self._todos("mover")
+        if eventos.activos[MOVIMIENTO]:
+            movidos = np.flatnonzero((poblacion.estado < EVACUATED) & (self._destino >= 0) & self._gana)
+            for i, (x, y) in zip(movidos.tolist(), poblacion.pos[movidos].tolist()):
+                eventos.registrar(MOVIMIENTO, tick, i, x, y)
+        salen = np.sort(np.concatenate(self._todos("salir", tick)))
+        if salen.size:
+            metricas.cambiar_codigos(np.full(salen.size, EVACUATING, dtype=np.uint8), EVACUATED)
+            poblacion.retirados[ESTADOS[EVACUATED]] += len(salen)
+            poblacion.activos -= len(salen)
+            metricas.evacuados_en(poblacion.pos[salen])
+            if eventos.activos[EVACUADO]:
+                for i, (x, y) in zip(salen.tolist(), poblacion.pos[salen].tolist()):
+                    eventos.registrar(EVACUADO, tick, i, x, y)
+
+
+def _cortes(xs: np.ndarray, width: int, partes: int) -> List[tuple]:
+    """Franjas (x0, x1) que cubren todas las columnas con más o menos la misma cantidad de xs."""
+    acumulado = np.cumsum(np.bincount(xs, minlength=width))
+    total = acumulado[-1] if len(acumulado) else 0
+    if total == 0:
+        bordes = np.linspace(0, width, partes + 1).astype(int)
+    else:
+        bordes = np.searchsorted(acumulado, total * np.arange(1, partes) / partes, side="right")
+        bordes = np.concatenate([[0], bordes, [width]])
+    bordes = np.unique(bordes)
+    return [(int(x0), int(x1)) for x0, x1 in zip(bordes[:-1], bordes[1:])]
+
+
+# ================================
+# PROCESO DE UNA FRANJA
+# ================================
+
+def _trabajador(conexion, carpeta, x0, x1, salidas, visiones):
+    franja = _Franja(carpeta, x0, x1, salidas, visiones)
+    while True:
+        orden, args = conexion.recv()
+        if orden is None:
+            return
+        try:
+            respuesta = getattr(franja, orden)(*args)
+        except Exception as error:                     # Se relanza en el proceso principal
+            respuesta = error
+        conexion.send(respuesta)
+
+
+class _Franja:
+    """
+    Lado de un proceso: las fases del tick para los evacuantes de la franja
+    x0 <= x < x1. Las propuestas se calculan con los mismos métodos de
+    Poblacion, sobre una vista mínima del modelo armada con los arreglos compartidos.
+    """
+
+    def __init__(self, carpeta, x0, x1, salidas, visiones):
+        a = {nombre[:-4]: np.asarray(np.load(os.path.join(carpeta, nombre), mmap_mode="r+"))
+             for nombre in os.listdir(carpeta) if nombre.endswith(".npy")}
+        self.x0, self.x1 = x0, x1
+        self.pos, self.estado, self.conoce = a["pos"], a["estado"], a["conoce"]
+        self.tick_evacuacion = a["tick_evacuacion"]
+        self.claves, self.destino, self.visible, self.gana = a["claves"], a["destino"], a["visible"], a["gana"]
+        self.conteo = a["conteo"].reshape(-1)
+        self.height = a["codigos"].shape[1]
+
+        # Vista del modelo con lo que usan los métodos de Poblacion (sin eventos: los registra el principal)
+        modelo = _VistaModelo()
+        modelo.terreno    = Terreno(a["codigos"])
+        modelo.width, modelo.height = modelo.terreno.width, modelo.terreno.height
+        modelo.campo      = CampoSalidas(modelo.terreno, a["distancia"], a["salida"], salidas)
+        modelo.percepcion = Percepcion(modelo.terreno, {v: a[f"vision_{v}"] for v in visiones})
+        modelo.ocupacion  = Ocupacion(modelo.width, modelo.height)
+        modelo.ocupacion.conteo = a["conteo"]
+        modelo.eventos    = RegistroEventos(capacidad=1, habilitados=[])
+        modelo.sorteo_vecinos = a["sorteo"]
+        self.poblacion = Poblacion.__new__(Poblacion)          # Solo para reutilizar sus métodos por lotes
+        self.poblacion.model, self.poblacion.pos, self.poblacion.vision = modelo, self.pos, a["vision"]
+
+    def _origen(self, indices):
+        return self.pos[indices, 0].astype(np.int64) * self.height + self.pos[indices, 1]
+
+    def proponer(self, alarma: bool) -> int:
+        """Fase 1. Devuelve cuántos evacuantes de la franja pasaron de IDLE a EVACUATING."""
+        estado, xs = self.estado, self.pos[:, 0]
+        self.cerca = np.flatnonzero((estado < EVACUATED) & (xs >= self.x0 - 1) & (xs <= self.x1))   # Con el halo
+        x = xs[self.cerca]
+        self.propios = propios = self.cerca[(x >= self.x0) & (x < self.x1)]
+        alarmados = 0
+        if alarma:
+            idle = propios[estado[propios] == IDLE]
+            estado[idle] = EVACUATING
+            alarmados = len(idle)
+
+        poblacion = self.poblacion
+        visible = poblacion._salidas_visibles(propios)
+        self.visible[propios] = visible
+        es_evacuante = estado[propios] == EVACUATING
+        self.evacuando = evacuando = propios[es_evacuante]
+        self.conoce[evacuando[visible[es_evacuante] >= 0]] = True
+        destino = np.full(len(propios), -1, dtype=np.int64)
+        bajan   = es_evacuante & self.conoce[propios]
+        destino[bajan] = poblacion._siguiente_paso(propios[bajan])
+        sin_paso = destino < 0
+        destino[sin_paso] = poblacion._pasos_aleatorios(propios[sin_paso])
+        self.destino[propios] = destino
+        return alarmados
+
+    def ganar(self):
+        """Fase 2. Ganador de cada celda destino de la franja (regla 1) y quién parte de esa celda."""
+        cerca = self.cerca[self.destino[self.cerca] >= 0]
+        x = self.destino[cerca] // self.height
+        self.grupo = grupo = cerca[(x >= self.x0) & (x < self.x1)]
+        destino = self.destino[grupo]
+        gana = np.zeros(len(grupo), dtype=bool)
+        gana[ganadores_por_celda(destino, self.claves[grupo])] = True
+        self.gana[grupo] = gana
+
+        # Quien parte de una celda de la franja es un evacuante propio
+        moviles  = self.propios[self.destino[self.propios] >= 0]
+        ocupante = ocupantes(self._origen(moviles), destino)
+        self.hay_ocupante = ocupante >= 0
+        self.ocupante = np.zeros(len(grupo), dtype=np.int64)            # Índice de evacuante (0 si no hay)
+        self.ocupante[self.hay_ocupante] = moviles[ocupante[self.hay_ocupante]]
+        self.conteo_destino = self.conteo[destino]
+
+    def intercambios(self):
+        """Fase 3a. Marca los intercambios (regla 2) con los ganadores de la fase 2 de todas las franjas."""
+        grupo, ocupante = self.grupo, self.ocupante
+        intercambio = (self.gana[grupo] & self.hay_ocupante & self.gana[ocupante]
+                       & (self.destino[ocupante] == self._origen(grupo)))
+        self.quitar = grupo[intercambio]
+
+    def bloquear(self, primera: bool) -> bool:
+        """Fase 3b. Una ronda de la regla 3 sobre los destinos de la franja. Devuelve si cambió algo."""
+        grupo = self.grupo
+        cambio = False
+        if primera and len(self.quitar):
+            self.gana[self.quitar] = False
+            cambio = True
+        while True:
+            bloqueados = self.gana[grupo] & ~se_libera(self.conteo_destino, self.hay_ocupante, self.gana[self.ocupante])
+            if not bloqueados.any():
+                return cambio
+            self.gana[grupo[bloqueados]] = False
+            cambio = True
+
+    def mover(self):
+        """Fase 4a. Ocupación de las celdas de la franja: llegan los ganadores de sus destinos y se van los propios."""
+        llegan = self.grupo[self.gana[self.grupo]]
+        np.add.at(self.conteo, self.destino[llegan], 1)
+        moviles = self.propios[(self.destino[self.propios] >= 0) & self.gana[self.propios]]
+        np.add.at(self.conteo, self._origen(moviles), -1)
+        self.pos[moviles] = np.stack(np.divmod(self.destino[moviles], self.height), axis=1)
+
+    def salir(self, tick: int) -> np.ndarray:
+        """Fase 4b. Los evacuantes de la franja que quedaron sobre una salida. Devuelve sus índices."""
+        evacuando = self.evacuando
+        codigos = self.poblacion.model.terreno.vista
+        salen = evacuando[codigos[self.pos[evacuando, 0], self.pos[evacuando, 1]] == SALIDA]
+        np.add.at(self.conteo, self._origen(salen), -1)
+        self.estado[salen] = EVACUATED
+        self.tick_evacuacion[salen] = tick + 1
+        return salen
+
+
+class _VistaModelo:
+    """Atributos del modelo que leen los métodos de Poblacion (ver _Franja)."""
+    tick_counter = 0
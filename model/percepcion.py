@@ -0,0 +1,117 @@
+# percepcion.py
+
+from functools import lru_cache
+from typing import Dict, Iterable, Tuple
+import numpy as np
+
+from .terreno import Terreno, SALIDA
+
+
+@lru_cache(maxsize=None)
+def plantilla(vision: int) -> np.ndarray:
+    """
+    Desplazamientos (dx, dy) del rombo de visión de radio 'vision' (distancia Manhattan),
+    ordenados por distancia creciente. Se calcula una sola vez por radio.
+    """
+    rango = np.arange(-vision, vision + 1)
+    dx, dy = np.meshgrid(rango, rango, indexing="ij")
+    distancia = np.abs(dx) + np.abs(dy)
+    dentro = distancia <= vision
+    offsets = np.stack([dx[dentro], dy[dentro]], axis=1)
+    offsets = offsets[np.argsort(distancia[dentro], kind="stable")].astype(np.int32)
+    offsets.flags.writeable = False
+    return offsets
+
+
+class Percepcion:
+    """
+    Percepción compartida de los evacuantes.
+    Para cada radio de visión guarda una tabla (ancho, alto) con la salida
+    visible más cercana desde cada celda (o -1 si no ve ninguna), de modo
+    que cada agente obtiene su salida visible con una sola consulta.
+    Las tablas se crean al primer uso de cada radio y solo se corrigen
+    alrededor de celdas que dejan de ser (o pasan a ser) salida.
+    """
+
+    def __init__(self, terreno: Terreno, tablas: Dict[int, np.ndarray] | None = None):
+        """
+        :param terreno: Capa de terreno del modelo
+        :param tablas: Tablas ya calculadas para este mismo terreno, por radio (se usan sin copiarlas)
+        """
+        self.terreno   = terreno
+        self.width     = terreno.width
+        self.height    = terreno.height
+        self._es_salida = terreno.vista == SALIDA        # Copia propia para detectar cambios
+        self._tablas: Dict[int, np.ndarray] = dict(tablas or {})   # vision -> índice plano (x * alto + y) de la salida
+
+    # ================================
+    # CONSULTAS
+    # ================================
+
+    def tabla(self, vision: int) -> np.ndarray:
+        """Tabla de salidas visibles para el radio dado (la construye si hace falta)."""
+        if vision not in self._tablas:
+            self._tablas[vision] = self._construir(vision)
+        return self._tablas[vision]
+
+    def salida_visible(self, pos: Tuple[int, int], vision: int) -> Tuple[int, int] | None:
+        """Salida más cercana dentro del rango de visión desde pos, o None."""
+        indice = self.tabla(vision)[pos]
+        return divmod(int(indice), self.height) if indice >= 0 else None
+
+    # ================================
+    # CONSTRUCCIÓN Y MANTENIMIENTO
+    # ================================
+
+    def _construir(self, vision: int) -> np.ndarray:
+        """
+        Estampa el rombo de visión alrededor de cada salida: una celda c ve la
+        salida s si s - c está en la plantilla. Gana la salida más cercana.
+        """
+        tabla  = np.full((self.width, self.height), -1, dtype=np.int32)
+        mejor  = np.full((self.width, self.height), vision + 1, dtype=np.int32)
+        salidas = np.argwhere(self._es_salida)
+        indices = (salidas[:, 0] * self.height + salidas[:, 1]).astype(np.int32)
+
+        for dx, dy in plantilla(vision):
+            d  = abs(dx) + abs(dy)
+            xs = salidas[:, 0] - dx
+            ys = salidas[:, 1] - dy
+            dentro = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+            xs, ys, origen = xs[dentro], ys[dentro], indices[dentro]
+            gana = mejor[xs, ys] > d
+            tabla[xs[gana], ys[gana]] = origen[gana]
+            mejor[xs[gana], ys[gana]] = d
+        return tabla
+
+    def actualizar(self, celdas: Iterable[Tuple[int, int]]):
+        """
+        Revisa las celdas que cambiaron de tipo. Solo si alguna dejó de ser
+        (o pasó a ser) salida se recalculan las celdas que la tienen en su rango.
+        """
+        codigos = self.terreno.vista
+        cambiadas = [pos for pos in celdas if (codigos[pos] == SALIDA) != self._es_salida[pos]]
+        if not cambiadas:
+            return
+        for pos in cambiadas:
+            self._es_salida[pos] = codigos[pos] == SALIDA
+
+        for vision, tabla in self._tablas.items():
+            offsets = plantilla(vision)
+            afectadas = np.unique(np.concatenate([np.array(pos) - offsets for pos in cambiadas]), axis=0)
+            dentro = ((afectadas[:, 0] >= 0) & (afectadas[:, 0] < self.width) &
+                      (afectadas[:, 1] >= 0) & (afectadas[:, 1] < self.height))
+            afectadas = afectadas[dentro]
+
+            # Para cada celda afectada, primera salida de su plantilla (ya ordenada por distancia)
+            vistas = afectadas[:, None, :] + offsets[None, :, :]
+            validas = ((vistas[..., 0] >= 0) & (vistas[..., 0] < self.width) &
+                       (vistas[..., 1] >= 0) & (vistas[..., 1] < self.height))
+            xs = np.clip(vistas[..., 0], 0, self.width - 1)
+            ys = np.clip(vistas[..., 1], 0, self.height - 1)
+            es_salida = validas & self._es_salida[xs, ys]
+            hay = es_salida.any(axis=1)
+            primera = es_salida.argmax(axis=1)
+            filas = np.arange(len(afectadas))
+            nuevo = np.where(hay, xs[filas, primera] * self.height + ys[filas, primera], -1)
+            tabla[afectadas[:, 0], afectadas[:, 1]] = nuevo
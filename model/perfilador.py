@@ -0,0 +1,275 @@
+# perfilador.py
+"""
+Perfilador por fases de ShoppingModel, opcional y sin costo cuando está apagado.
+
+La instrumentación no vive en el código del modelo: al activarse (bloque 'with')
+envuelve los métodos de cada fase del tick y de los sub-pasos del evacuante, y
+al salir deja los originales. Con el perfilador apagado no queda ninguna
+comprobación extra en el camino caliente.
+
+Mide:
+- tiempo de reloj por fase (inclusivo y propio), con la pila de fases anidadas;
+- llamadas a consultas de la grilla, la ocupación, el terreno y las tablas;
+- nodos expandidos por cada reparación del campo de distancias compartido y
+  por cada reparación del planificador incremental (navegación "incremental").
+
+Salidas: una tabla de resumen y un archivo de pilas plegadas ("a;b;c microsegundos"
+por línea) que leen flamegraph.pl, speedscope o inferno.
+
+Uso:
+    with Perfilador(model) as perfil:
+        for _ in range(100):
+            model.step()
+    print(perfil.tabla())
+    perfil.guardar_pilas("perfil.folded")
+"""
+
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List
+
+from .evacuante import Evacuante
+from .brigadista import Brigadista
+from .replanificacion import PlanificadorIncremental
+
+# Métodos del evacuante que se cronometran, con el nombre de su fase
+FASES_AGENTE = {
+    "step":              "evacuante.step",
+    "_see_exit":         "percepcion",
+    "_descender_campo":  "ruteo",
+    "_paso_incremental": "ruteo.incremental",
+    "_paso_aleatorio":   "movimiento_aleatorio",
+    "advance":           "movimiento",
+}
+
+# Métodos del planificador incremental que se cronometran (y cuentan nodos expandidos)
+FASES_PLANIFICADOR = {
+    "reparar":           "ruteo.reparacion",
+}
+
+# Métodos del brigadista que se cronometran
+FASES_BRIGADISTA = {
+    "step":              "brigadista",
+}
+
+# (atributo del modelo o "" para el modelo mismo, método, fase) de cada etapa de ShoppingModel.step
+FASES_MODELO = [
+    ("",          "step",                  "tick"),
+    ("",          "_sortear_tick",         "sorteos"),
+    ("schedule",  "step",                  "agentes"),
+    ("schedule",  "entre_fases",           "conflictos"),
+    ("poblacion", "step",                  "poblacion"),
+    ("",          "_generar_fuego_inicial", "fuego"),
+    ("",          "_propagar_fuego",       "fuego"),
+    ("",          "_generar_derrumbe",     "derrumbe"),
+    ("",          "evacuantes_cerca",      "brigadista.cercanos"),
+    ("",          "instruir",              "brigadista.instruccion"),
+    ("campo",     "actualizar",            "campo.actualizar"),
+    ("percepcion", "actualizar",           "percepcion.actualizar"),
+    ("derrumbes", "actualizar",            "derrumbes.actualizar"),
+    ("plano",     "actualizar",            "plano.actualizar"),
+    ("metricas",  "registrar",             "metricas"),
+]
+
+# (atributo del modelo, método) de las consultas que solo se cuentan
+CONSULTAS = [
+    ("grid",       "get_cell_list_contents"),
+    ("grid",       "iter_cell_list_contents"),
+    ("grid",       "is_cell_empty"),
+    ("grid",       "get_neighbors"),
+    ("grid",       "get_neighborhood"),
+    ("grid",       "move_agent"),
+    ("grid",       "place_agent"),
+    ("ocupacion",  "libre"),
+    ("terreno",    "codigo"),
+    ("terreno",    "es_transitable"),
+    ("campo",      "siguiente_paso"),
+    ("percepcion", "salida_visible"),
+    ("percepcion", "tabla"),
+]
+
+
+class Perfilador:
+    """
+    Instrumentación de un modelo mientras dura el bloque 'with'.
+    Los métodos del evacuante, del planificador incremental y del brigadista se
+    envuelven a nivel de clase: mientras el perfilador está activo, afecta a
+    todos los modelos del proceso.
+    """
+
+    def __init__(self, model):
+        self.model      = model
+        self.tiempos: Dict[str, float] = defaultdict(float)    # fase -> segundos (inclusivo)
+        self.llamadas   = Counter()                            # fase -> llamadas
+        self.pilas: Dict[str, float] = defaultdict(float)      # "tick;agentes;percepcion" -> segundos propios
+        self.consultas  = Counter()                            # "grid.move_agent" -> llamadas
+        self.nodos_campo: List[int] = []                       # Nodos expandidos en cada reparación del campo
+        self.nodos_reparacion: List[int] = []                  # Nodos expandidos en cada reparación incremental
+        self.ticks      = 0
+        self._tick_inicial = 0
+        self._pila: List[str] = []                             # Fases abiertas
+        self._hijos: List[float] = []                          # Tiempo de las fases hijas de cada fase abierta
+        self._envueltos = []                                   # (objeto, método, original) a restaurar
+
+    # ================================
+    # ACTIVACIÓN
+    # ================================
+
+    def __enter__(self):
+        model = self.model
+        self._tick_inicial = model.tick_counter
+        for atributo, metodo, fase in FASES_MODELO:
+            objeto = getattr(model, atributo) if atributo else model
+            if objeto is not None and getattr(objeto, metodo, None) is not None:
+                self._envolver(objeto, metodo, self._cronometro(fase, getattr(objeto, metodo)))
+        for atributo, metodo in CONSULTAS:
+            objeto = getattr(model, atributo, None)
+            if objeto is not None and hasattr(objeto, metodo):
+                self._envolver(objeto, metodo, self._contador(f"{atributo}.{metodo}", getattr(objeto, metodo)))
+        if model.campo is not None:
+            # Ya cronometrado en FASES_MODELO: se agrega el conteo de nodos de esa misma llamada
+            campo = model.campo
+            self._envolver(campo, "actualizar",
+                           self._con_nodos(campo.actualizar, "expandidos", self.nodos_campo, objeto=campo))
+        nodos = {(PlanificadorIncremental, "reparar"): ("expandidos", self.nodos_reparacion)}
+        for clase, fases in ((Evacuante, FASES_AGENTE), (PlanificadorIncremental, FASES_PLANIFICADOR),
+                             (Brigadista, FASES_BRIGADISTA)):
+            for metodo, fase in fases.items():
+                original = clase.__dict__[metodo]
+                envuelta = self._cronometro(fase, original)
+                if (clase, metodo) in nodos:
+                    envuelta = self._con_nodos(envuelta, *nodos[clase, metodo])
+                self._envueltos.append((clase, metodo, original))
+                setattr(clase, metodo, envuelta)
+        return self
+
+    def __exit__(self, *error):
+        for objeto, metodo, original in reversed(self._envueltos):
+            if original is _DE_CLASE:
+                del objeto.__dict__[metodo]                    # Vuelve a verse el método de la clase
+            else:
+                setattr(objeto, metodo, original)              # Atributo propio (entre_fases) o método de clase
+        self._envueltos = []
+        self.ticks = self.model.tick_counter - self._tick_inicial
+        return False
+
+    def _envolver(self, objeto, metodo, envuelta):
+        original = objeto.__dict__.get(metodo, _DE_CLASE)
+        setattr(objeto, metodo, envuelta)
+        self._envueltos.append((objeto, metodo, original))
+
+    # ================================
+    # ENVOLTORIOS
+    # ================================
+
+    def _cronometro(self, fase, funcion):
+        pila, hijos, pilas = self._pila, self._hijos, self.pilas
+        tiempos, llamadas  = self.tiempos, self.llamadas
+        reloj = time.perf_counter
+
+        def envuelta(*args, **kwargs):
+            pila.append(fase)
+            hijos.append(0.0)
+            inicio = reloj()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                duracion = reloj() - inicio
+                pilas[";".join(pila)] += duracion - hijos.pop()
+                pila.pop()
+                if hijos:
+                    hijos[-1] += duracion
+                tiempos[fase]  += duracion
+                llamadas[fase] += 1
+        return envuelta
+
+    def _contador(self, nombre, funcion):
+        consultas = self.consultas
+
+        def envuelta(*args, **kwargs):
+            consultas[nombre] += 1
+            return funcion(*args, **kwargs)
+        return envuelta
+
+    def _con_nodos(self, funcion, atributo, nodos, objeto=None):
+        """
+        Después de cada llamada anota en 'nodos' el contador 'atributo' del objeto
+        (el primer argumento, o 'objeto' si 'funcion' es un método ya ligado).
+        """
+        def envuelta(*args, **kwargs):
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                nodos.append(getattr(objeto if objeto is not None else args[0], atributo))
+        return envuelta
+
+    # ================================
+    # RESULTADOS
+    # ================================
+
+    def propio(self) -> Dict[str, float]:
+        """Segundos propios (sin las fases hijas) por fase."""
+        propio = defaultdict(float)
+        for pila, segundos in self.pilas.items():
+            propio[pila.rsplit(";", 1)[-1]] += segundos
+        return propio
+
+    def ms_por_tick(self) -> Dict[str, float]:
+        ticks = max(self.ticks, 1)
+        return {fase: 1000 * t / ticks for fase, t in sorted(self.tiempos.items())}
+
+    def resumen(self) -> dict:
+        ticks = max(self.ticks, 1)
+        return {
+            "ticks":              self.ticks,
+            "fases_ms_por_tick":  self.ms_por_tick(),
+            "propio_ms_por_tick": {fase: 1000 * t / ticks for fase, t in sorted(self.propio().items())},
+            "llamadas":           dict(sorted(self.llamadas.items())),
+            "consultas_por_tick": {nombre: n / ticks for nombre, n in sorted(self.consultas.items())},
+            "campo": {
+                "reparaciones":    len(self.nodos_campo),
+                "nodos":           sum(self.nodos_campo),
+                "nodos_por_reparacion": sum(self.nodos_campo) / len(self.nodos_campo) if self.nodos_campo else 0.0,
+            },
+            "reparaciones": {
+                "reparaciones":    len(self.nodos_reparacion),
+                "nodos":           sum(self.nodos_reparacion),
+                "nodos_por_reparacion": (sum(self.nodos_reparacion) / len(self.nodos_reparacion)
+                                         if self.nodos_reparacion else 0.0),
+            },
+        }
+
+    def tabla(self) -> str:
+        """Tabla de texto: fases ordenadas por tiempo, consultas y nodos expandidos."""
+        ticks  = max(self.ticks, 1)
+        total  = self.tiempos.get("tick", 0.0) or sum(self.propio().values()) or 1.0
+        propio = self.propio()
+        lineas = [f"{self.ticks} ticks",
+                  f"{'fase':<24}{'llamadas':>10}{'ms/tick':>10}{'propio':>10}{'% tick':>8}"]
+        for fase, t in sorted(self.tiempos.items(), key=lambda par: -par[1]):
+            lineas.append(f"{fase:<24}{self.llamadas[fase]:>10}{1000 * t / ticks:>10.3f}"
+                          f"{1000 * propio[fase] / ticks:>10.3f}{100 * t / total:>7.1f}%")
+        if self.consultas:
+            lineas += ["", f"{'consulta':<34}{'llamadas':>10}{'por tick':>10}"]
+            for nombre, n in self.consultas.most_common():
+                lineas.append(f"{nombre:<34}{n:>10}{n / ticks:>10.1f}")
+        if self.nodos_campo:
+            lineas += ["", f"campo de distancias: {len(self.nodos_campo)} reparaciones, "
+                           f"{sum(self.nodos_campo) / len(self.nodos_campo):.1f} nodos expandidos por reparación"]
+        if self.nodos_reparacion:
+            if not self.nodos_campo:
+                lineas.append("")
+            lineas.append(f"planificador incremental: {len(self.nodos_reparacion)} reparaciones, "
+                          f"{sum(self.nodos_reparacion) / len(self.nodos_reparacion):.1f} nodos expandidos por reparación")
+        return "\n".join(lineas)
+
+    def guardar_pilas(self, ruta: str):
+        """Pilas plegadas en microsegundos (formato de flamegraph.pl / speedscope)."""
+        with open(ruta, "w") as archivo:
+            for pila, segundos in sorted(self.pilas.items()):
+                microsegundos = round(segundos * 1e6)
+                if microsegundos > 0:
+                    archivo.write(f"{pila} {microsegundos}\n")
+
+
+_DE_CLASE = object()                                   # Marca: el objeto no tenía el atributo propio
@@ -0,0 +1,91 @@
+# planificador.py
+
+from collections import Counter
+from typing import Callable, Dict, List
+
+from mesa import Agent
+from mesa.time import SimultaneousActivation
+
+
+class ActivacionActiva(SimultaneousActivation):
+    """
+    Activador simultáneo que solo despacha a los agentes que pueden actuar.
+    - Los agentes que llegan a un estado terminal (evacuado, muerto) se retiran
+      del conjunto activo con retirar(); se cuentan por estado en 'retirados'.
+    - Los agentes que definen un método dormido() se saltan en los ticks en que
+      devuelve True (por ejemplo, un brigadista sin nadie cerca), sin retirarlos.
+    - Si se da 'entre_fases', se llama con la lista de agentes despachados después
+      de todos los step() y antes de los advance() (por ejemplo, para resolver
+      en lote los movimientos propuestos).
+    El terreno nunca pasa por aquí: solo se agregan agentes con comportamiento.
+    """
+
+    def __init__(self, model, entre_fases: Callable[[List[Agent]], None] | None = None):
+        super().__init__(model)
+        self.entre_fases = entre_fases
+        self.retirados = Counter()                       # estado -> agentes retirados en ese estado
+        self.saltados  = 0                               # Despachos evitados por agentes dormidos
+        self._dormibles: Dict[object, Callable[[], bool]] = {}   # unique_id -> agent.dormido
+
+    # ================================
+    # CONJUNTO ACTIVO
+    # ================================
+
+    def add(self, agent: Agent):
+        super().add(agent)
+        dormido = getattr(agent, "dormido", None)
+        if dormido is not None:
+            self._dormibles[agent.unique_id] = dormido
+
+    def remove(self, agent: Agent):
+        super().remove(agent)
+        self._dormibles.pop(agent.unique_id, None)
+
+    def retirar(self, agent: Agent, estado=None):
+        """
+        Saca al agente del conjunto activo porque ya no puede actuar.
+        Se cuenta bajo 'estado' (por defecto, el estado actual del agente).
+        """
+        if agent.unique_id in self._agents:
+            self.remove(agent)
+            self.retirados[estado if estado is not None else getattr(agent, "state", None)] += 1
+
+    @property
+    def activos(self) -> int:
+        return len(self._agents)
+
+    @property
+    def vacio(self) -> bool:
+        """Indica si no queda ningún agente que pueda actuar."""
+        return not self._agents
+
+    # ================================
+    # PASO
+    # ================================
+
+    def step(self):
+        """
+        step() de todos los agentes activos y despiertos, el gancho 'entre_fases'
+        y luego advance() de los que siguen activos. Un agente retirado durante
+        el tick no vuelve a despacharse.
+        """
+        agentes    = self._agents
+        dormibles  = self._dormibles
+        despachados = []
+        for clave in list(agentes):
+            agent = agentes.get(clave)
+            if agent is None:
+                continue                                 # Retirado durante este mismo tick
+            if clave in dormibles and dormibles[clave]():
+                self.saltados += 1
+                continue
+            agent.step()
+            despachados.append(agent)
+
+        if self.entre_fases is not None:
+            self.entre_fases(despachados)
+        for agent in despachados:
+            if agent.unique_id in agentes:
+                agent.advance()
+        self.steps += 1
+        self.time  += 1
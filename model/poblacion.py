@@ -0,0 +1,328 @@
+# poblacion.py
+
+from collections import Counter
+from typing import Iterable, Tuple
+import numpy as np
+
+from .evacuante import Evacuante
+from .terreno import PASILLO, SALIDA
+from .campo import INFINITO, VECINOS
+from .eventos import MOVIMIENTO, SALIDA_VISTA, MUERTE, EVACUADO, CAUSAS
+from .movimiento import ORDENES, resolver_conflictos
+
+# ---------- CÓDIGOS DE ESTADO (mismo orden que los estados de Evacuante) ----------
+IDLE        = 0
+EVACUATING  = 1
+BLOCKED     = 2
+EVACUATED   = 3
+MUERTO      = 4
+
+ESTADOS = [Evacuante.IDLE, Evacuante.EVACUATING, Evacuante.BLOCKED, Evacuante.EVACUATED, Evacuante.MUERTO]
+CODIGO_ESTADO = {estado: codigo for codigo, estado in enumerate(ESTADOS)}
+
+DIRECCIONES = np.array(VECINOS, dtype=np.int32)        # (4, 2), mismo orden que el campo de distancias
+
+
+def estado_agentes(model) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Posiciones (N, 2) y códigos de estado (N,) de todos los evacuantes del modelo,
+    con cualquiera de los dos motores (con el de arreglos se leen directamente).
+    """
+    if model.poblacion is not None:
+        return model.poblacion.pos, model.poblacion.estado
+    estado = np.array([CODIGO_ESTADO[a.state] for a in model.evacuantes], dtype=np.uint8)
+    return model.pos_evacuantes, estado
+
+
+class Poblacion:
+    """
+    Población de evacuantes guardada como estructura de arreglos: posiciones,
+    estados (códigos enteros), visión, espera y si ya conocen una salida viven
+    en arreglos contiguos de NumPy, y cada tick se resuelve con operaciones
+    por lotes en lugar de un step() por objeto.
+
+    Sigue las mismas reglas que Evacuante.step/advance (alarma, percepción,
+    propuesta de paso por el campo o al azar, resolución de conflictos y llegada
+    a la salida) y usa los mismos sorteos por tick del modelo, indexados por
+    agente: con la misma semilla, ambos motores producen la misma corrida.
+    """
+
+    def __init__(self, model, posiciones: np.ndarray, vision: int = 3):
+        """
+        :param model: Modelo dueño de la población (ShoppingModel)
+        :param posiciones: Arreglo (N, 2) con la posición inicial de cada evacuante
+        :param vision: Rango de visión de todos los evacuantes
+        """
+        n = len(posiciones)
+        self.model           = model
+        self.pos             = np.array(posiciones, dtype=np.int32).reshape(n, 2)
+        self.estado          = np.full(n, IDLE, dtype=np.uint8)
+        self.vision          = np.full(n, vision, dtype=np.uint8)
+        self.espera          = np.zeros(n, dtype=np.int32)       # Ticks bloqueado
+        self.conoce          = np.zeros(n, dtype=bool)           # Ya vio una salida: sigue el campo
+        self.tick_evacuacion = np.full(n, -1, dtype=np.int32)
+        self.causa           = np.full(n, -1, dtype=np.int8)     # Índice en CAUSAS si murió
+        self.retirados       = Counter()                         # estado -> evacuantes que terminaron así
+        self.activos         = n                                 # Evacuantes todavía dentro del edificio
+        self.vistas          = [VistaEvacuante(self, i) for i in range(n)]
+
+        self._sumar_ocupacion(self.pos[:, 0] * model.height + self.pos[:, 1], 1)
+
+    def __len__(self):
+        return len(self.estado)
+
+    @property
+    def vacia(self) -> bool:
+        """Indica si ya no queda ningún evacuante dentro del edificio."""
+        return self.activos == 0
+
+    # ================================
+    # TICK POR LOTES
+    # ================================
+
+    def step(self):
+        """Un tick de todos los evacuantes (equivale a step() + advance() de cada Evacuante)."""
+        model  = self.model
+        estado = self.estado
+
+        # 1. Transición a evacuación si se activó la alarma
+        if model.alarma_activa:
+            idle = np.flatnonzero(estado == IDLE)
+            if idle.size:
+                estado[idle] = EVACUATING
+                model.metricas.cambiar_codigos(np.full(idle.size, IDLE, dtype=np.uint8), EVACUATING)
+        vivos = np.flatnonzero(estado < EVACUATED)
+        if vivos.size == 0:
+            return
+
+        # 2. Percepción: una consulta a la tabla de salidas visibles por agente
+        visible = self._salidas_visibles(vivos)
+
+        # 3. Propuestas: los que evacuando ya vieron una salida bajan por el campo;
+        #    los que no tienen paso proponen un movimiento aleatorio por pasillos libres
+        es_evacuante = estado[vivos] == EVACUATING
+        evacuando    = vivos[es_evacuante]
+        self.conoce[evacuando[visible[es_evacuante] >= 0]] = True
+        destino = np.full(len(vivos), -1, dtype=np.int64)
+        bajan   = es_evacuante & self.conoce[vivos]
+        destino[bajan] = self._siguiente_paso(vivos[bajan])
+        sin_paso = destino < 0
+        destino[sin_paso] = self._pasos_aleatorios(vivos[sin_paso])
+
+        # 4. Resolución de conflictos y movimiento simultáneo de los ganadores
+        proponen = np.flatnonzero(destino >= 0)
+        if proponen.size:
+            moviles = vivos[proponen]
+            origen  = self.pos[moviles, 0].astype(np.int64) * model.height + self.pos[moviles, 1]
+            gana    = resolver_conflictos(origen, destino[proponen], model.claves_conflicto[moviles],
+                                          model.ocupacion.conteo.reshape(-1))
+            self._mover(moviles[gana], destino[proponen][gana])
+
+        # 5. Llegada a la salida
+        self._revisar_salidas(evacuando)
+
+    def _salidas_visibles(self, indices: np.ndarray) -> np.ndarray:
+        """Índice plano de la salida visible de cada agente (-1 si no ve ninguna)."""
+        percepcion = self.model.percepcion
+        visible    = np.full(len(indices), -1, dtype=np.int32)
+        visiones   = self.vision[indices]
+        for v in np.unique(visiones):
+            sel = visiones == v
+            xs, ys = self.pos[indices[sel], 0], self.pos[indices[sel], 1]
+            visible[sel] = percepcion.tabla(int(v))[xs, ys]
+
+        eventos = self.model.eventos
+        if eventos.activos[SALIDA_VISTA]:
+            tick = self.model.tick_counter
+            for i, s in zip(indices[visible >= 0].tolist(), visible[visible >= 0].tolist()):
+                eventos.registrar(SALIDA_VISTA, tick, i, *divmod(s, self.model.height))
+        return visible
+
+    def _siguiente_paso(self, indices: np.ndarray) -> np.ndarray:
+        """
+        Vecino que acerca un paso a la salida más cercana (como CampoSalidas.siguiente_paso),
+        para varios agentes a la vez. Devuelve el índice plano del vecino, o -1 donde no hay paso.
+        """
+        distancia = self.model.campo.distancia
+        width, height = distancia.shape
+        xs, ys  = self.pos[indices, 0], self.pos[indices, 1]
+        d       = distancia[xs, ys]
+        destino = np.full(len(indices), -1, dtype=np.int64)
+        pendientes = (d != 0) & (d != INFINITO)
+        for dx, dy in VECINOS:
+            nx, ny = xs + dx, ys + dy
+            elige  = pendientes & (nx >= 0) & (nx < width) & (ny >= 0) & (ny < height)
+            elige[elige] = distancia[nx[elige], ny[elige]] == d[elige] - 1
+            destino[elige] = nx[elige].astype(np.int64) * height + ny[elige]
+            pendientes &= ~elige
+        return destino
+
+    def _pasos_aleatorios(self, indices: np.ndarray) -> np.ndarray:
+        """
+        Cada agente prueba sus 4 vecinos en el orden sorteado para él en este tick
+        y propone el primero que sea pasillo ('.') y esté libre. Devuelve el índice
+        plano de la celda propuesta, o -1 si no tiene ninguna.
+        """
+        propuesta = np.full(len(indices), -1, dtype=np.int64)
+        if indices.size == 0:
+            return propuesta
+        codigos = self.model.terreno.vista.reshape(-1)
+        conteo  = self.model.ocupacion.conteo.reshape(-1)
+        width, height = self.model.width, self.model.height
+
+        # Índices planos (x * alto + y) de los 4 vecinos de cada agente, en su orden sorteado
+        x, y    = self.pos[indices, 0].astype(np.int64), self.pos[indices, 1].astype(np.int64)
+        orden   = ORDENES[self.model.sorteo_vecinos[indices]]
+        dentro  = np.stack([x < width - 1, x > 0, y < height - 1, y > 0], axis=1)
+        validos = np.take_along_axis(dentro, orden, axis=1)
+        planos  = (x * height + y)[:, None] + (DIRECCIONES[:, 0] * height + DIRECCIONES[:, 1])[orden]
+        planos[~validos] = 0
+        validos &= (codigos[planos] == PASILLO) & (conteo[planos] == 0)
+
+        filas = np.flatnonzero(validos.any(axis=1))
+        propuesta[filas] = planos[filas, validos[filas].argmax(axis=1)]
+        return propuesta
+
+    def _mover(self, indices: np.ndarray, planos: np.ndarray):
+        """Mueve a los agentes indicados a esas celdas (índice plano), actualiza la ocupación y registra."""
+        if indices.size == 0:
+            return
+        height = self.model.height
+        self._sumar_ocupacion(self.pos[indices, 0].astype(np.int64) * height + self.pos[indices, 1], -1)
+        self._sumar_ocupacion(planos, 1)
+        destinos = np.stack(np.divmod(planos, height), axis=1).astype(np.int32)
+        self.pos[indices] = destinos
+
+        eventos = self.model.eventos
+        if eventos.activos[MOVIMIENTO]:
+            tick = self.model.tick_counter
+            for i, (x, y) in zip(indices.tolist(), destinos.tolist()):
+                eventos.registrar(MOVIMIENTO, tick, i, x, y)
+
+    def _sumar_ocupacion(self, planos: np.ndarray, valor: int):
+        """Suma 'valor' al conteo de cada celda (puede haber celdas repetidas)."""
+        conteo = self.model.ocupacion.conteo.reshape(-1)
+        if len(planos) * 16 > conteo.size:
+            # Muchas celdas: un histograma completo es más barato que ufunc.at
+            conteo += valor * np.bincount(planos, minlength=conteo.size).astype(conteo.dtype)
+        else:
+            np.add.at(conteo, planos, valor)
+
+    def _revisar_salidas(self, indices: np.ndarray):
+        """Marca como evacuados a los agentes que quedaron sobre una salida ('S')."""
+        codigos = self.model.terreno.vista
+        salen   = indices[codigos[self.pos[indices, 0], self.pos[indices, 1]] == SALIDA]
+        if salen.size == 0:
+            return
+        tick = self.model.tick_counter
+        self._retirar(salen, EVACUATED)
+        self.model.metricas.evacuados_en(self.pos[salen])
+        self.tick_evacuacion[salen] = tick + 1      # El contador se incrementa al final del tick
+
+        eventos = self.model.eventos
+        if eventos.activos[EVACUADO]:
+            for i, (x, y) in zip(salen.tolist(), self.pos[salen].tolist()):
+                eventos.registrar(EVACUADO, tick, i, x, y)
+
+    # ================================
+    # MUERTES Y RETIRO
+    # ================================
+
+    def matar_en(self, celdas: Iterable[Tuple[int, int]], accion: str):
+        """Marca como muertos a los evacuantes dentro del edificio que estén en esas celdas."""
+        celdas = list(celdas)
+        if not celdas or self.activos == 0:
+            return
+        height  = self.model.height
+        planas  = np.array([x * height + y for x, y in celdas], dtype=np.int64)
+        vivos   = np.flatnonzero(self.estado < EVACUATED)
+        mueren  = vivos[np.isin(self.pos[vivos, 0].astype(np.int64) * height + self.pos[vivos, 1], planas)]
+        if mueren.size == 0:
+            return
+        self._retirar(mueren, MUERTO)
+        self.causa[mueren] = CAUSAS.index(accion)
+
+        eventos = self.model.eventos
+        if eventos.activos[MUERTE]:
+            tick = self.model.tick_counter
+            for i, (x, y) in zip(mueren.tolist(), self.pos[mueren].tolist()):
+                eventos.registrar(MUERTE, tick, i, x, y, CAUSAS.index(accion))
+
+    def _retirar(self, indices: np.ndarray, codigo: int):
+        """Pasa los agentes a un estado terminal: dejan de ocupar celda y se cuentan."""
+        self._sumar_ocupacion(self.pos[indices, 0] * self.model.height + self.pos[indices, 1], -1)
+        self.model.metricas.cambiar_codigos(self.estado[indices], codigo)
+        self.estado[indices] = codigo
+        self.retirados[ESTADOS[codigo]] += len(indices)
+        self.activos -= len(indices)
+
+
+class VistaEvacuante:
+    """
+    Vista de compatibilidad de un evacuante de la Poblacion: expone los mismos
+    atributos que Evacuante (unique_id, pos, state, vision, ...) leyendo
+    directamente de los arreglos. El estado es de solo lectura: los cambios
+    de estado pasan por la Poblacion (los terminales, por _retirar, que
+    mantiene la ocupación, las métricas y los contadores).
+    """
+    __slots__ = ("poblacion", "indice")
+
+    IDLE       = Evacuante.IDLE
+    EVACUATING = Evacuante.EVACUATING
+    BLOCKED    = Evacuante.BLOCKED
+    EVACUATED  = Evacuante.EVACUATED
+    MUERTO     = Evacuante.MUERTO
+
+    def __init__(self, poblacion: Poblacion, indice: int):
+        self.poblacion = poblacion
+        self.indice    = indice
+
+    def __repr__(self):
+        return f"VistaEvacuante({self.unique_id}, {self.pos}, {self.state})"
+
+    @property
+    def unique_id(self) -> str:
+        return f"U{self.indice}"
+
+    @property
+    def model(self):
+        return self.poblacion.model
+
+    @property
+    def pos(self) -> Tuple[int, int]:
+        x, y = self.poblacion.pos[self.indice].tolist()
+        return x, y
+
+    @property
+    def state(self) -> str:
+        return ESTADOS[self.poblacion.estado[self.indice]]
+
+    @property
+    def vision(self) -> int:
+        return int(self.poblacion.vision[self.indice])
+
+    @vision.setter
+    def vision(self, valor: int):
+        self.poblacion.vision[self.indice] = valor
+
+    @property
+    def ticks_waiting(self) -> int:
+        return int(self.poblacion.espera[self.indice])
+
+    @property
+    def conoce_salida(self) -> bool:
+        return bool(self.poblacion.conoce[self.indice])
+
+    @property
+    def tick_evacuacion(self) -> int | None:
+        t = int(self.poblacion.tick_evacuacion[self.indice])
+        return t if t >= 0 else None
+
+    @property
+    def causa_muerte(self) -> str | None:
+        c = int(self.poblacion.causa[self.indice])
+        return CAUSAS[c] if c >= 0 else None
+
+    @property
+    def en_edificio(self) -> bool:
+        return self.poblacion.estado[self.indice] < EVACUATED
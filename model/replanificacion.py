@@ -0,0 +1,345 @@
+# replanificacion.py
+"""
+Navegación "incremental": un planificador D* Lite por evacuante.
+
+Modelo de conocimiento (el mismo que el de la navegación por campo en cuanto a
+quién sabe ir a una salida): mientras el evacuante no vio una salida ni lo
+instruyó un brigadista, camina sin rumbo y no planifica. Desde entonces conoce
+el plano del edificio tal como estaba al empezar (muros, pasillos y todas las
+salidas), como quien ya se orientó. La diferencia con el campo compartido es
+qué sabe de los peligros: el campo ve todo el fuego y los derrumbes al
+instante, el planificador solo lo que entra en su rango de visión desde que
+empezó a planificar.
+"""
+
+from functools import lru_cache
+from heapq import heappush, heappop
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+
+from .terreno import Terreno, SALIDA, TRANSITABLE
+from .campo import CampoSalidas, INFINITO
+from .percepcion import plantilla
+
+
+class Plano:
+    """
+    Plano del edificio que conocen los evacuantes que ya se orientaron: qué celdas
+    son transitables y a cuántos pasos está la salida más cercana desde cada
+    una, tomado del terreno tal como estaba al crear el modelo (sin fuego ni
+    derrumbes). Se comparte: cada planificador guarda únicamente lo que su
+    evacuante vio distinto y lo que tuvo que reparar. Lo único que cambia es
+    la marca de las celdas que hoy difieren del plano, que el modelo mantiene
+    con actualizar() igual que el campo y la percepción.
+    """
+
+    def __init__(self, terreno: Terreno, distancia: np.ndarray | None = None,
+                 transitable: np.ndarray | None = None):
+        """
+        :param terreno: Capa de terreno del modelo (se lee en cada observación)
+        :param distancia: Distancias del plano (por defecto, las del terreno actual)
+        :param transitable: Celdas transitables del plano (por defecto, las del terreno actual)
+        """
+        self.terreno = terreno
+        self.width   = terreno.width
+        self.height  = terreno.height
+        if distancia is None:
+            distancia = CampoSalidas(terreno).distancia
+        if transitable is None:
+            transitable = TRANSITABLE[terreno.vista]
+        self.distancia   = np.array(distancia, dtype=np.int32)
+        self.transitable = np.array(transitable, dtype=bool)
+        self.es_salida   = terreno.vista == SALIDA        # Las salidas nunca cambian (el fuego y los derrumbes no las tocan)
+
+        # Listas planas (índice = x * alto + y): el planificador las lee celda por celda
+        self._distancia   = self.distancia.ravel().tolist()
+        self._transitable = self.transitable.ravel().tolist()
+        self._salida      = self.es_salida.ravel().tolist()
+        self._alterado    = bytearray((TRANSITABLE[terreno.vista] != self.transitable).ravel())
+
+    def actualizar(self, celdas: Iterable[Tuple[int, int]]):
+        """Marca si cada celda que cambió de tipo difiere ahora del plano."""
+        codigos = self.terreno.vista
+        for x, y in celdas:
+            self._alterado[x * self.height + y] = bool(TRANSITABLE[codigos[x, y]] != self.transitable[x, y])
+
+
+@lru_cache(maxsize=None)
+def _desplazamientos(vision: int) -> Tuple[Tuple[int, int], ...]:
+    """La plantilla de visión como tuplas (se recorre celda por celda)."""
+    return tuple(map(tuple, plantilla(vision).tolist()))
+
+
+class PlanificadorIncremental:
+    """
+    Planificador D* Lite de un evacuante con visión limitada.
+
+    Se crea cuando el evacuante conoce una salida: parte del plano del edificio
+    y desde ahí solo corrige su mapa con lo que ve: una celda que en el plano
+    era transitable y ahora arde (o quedó bajo un derrumbe), o al revés. La
+    búsqueda va desde las salidas hacia el evacuante y guarda g (distancia
+    estimada) y rhs (distancia según los vecinos) por celda; al principio
+    ambas son las del plano, así que no hace falta ninguna búsqueda hasta que
+    observa el primer cambio. Cada cambio solo
+    vuelve inconsistentes a la celda y sus vecinos, y la reparación expande
+    desde ahí lo necesario para que el paso siguiente vuelva a ser óptimo.
+
+    La ruta no se guarda como lista: el siguiente paso es el vecino con menor
+    g, que se lee en cada tick. g, rhs y el mapa conocido solo guardan las
+    celdas que difieren del plano.
+    """
+
+    def __init__(self, plano: Plano, inicio: Tuple[int, int]):
+        """
+        :param plano: Plano del edificio compartido por todos los evacuantes
+        :param inicio: Posición del evacuante al empezar a planificar
+        """
+        self.plano    = plano
+        self.alto     = plano.height
+        self.ancho    = plano.width
+        self.conocido: Dict[int, bool] = {}      # Celda -> transitable, solo donde difiere del plano
+        self.g:   Dict[int, int] = {}            # Celda -> g, solo donde difiere del plano
+        self.rhs: Dict[int, int] = {}            # Celda -> rhs, solo donde difiere del plano
+        self.cola: List[Tuple[int, int, int]] = []   # Montículo (k1, k2, celda), con entradas viejas
+        self.claves: Dict[int, Tuple[int, int]] = {} # Clave vigente de cada celda en la cola
+        self.km       = 0                        # Corrección de las claves por lo que se movió el evacuante
+        self.ultimo   = inicio[0] * self.alto + inicio[1]   # Posición en la última reparación
+        self.expandidos    = 0                   # Nodos expandidos en la última reparación
+        self.reparaciones  = 0                   # Reparaciones hechas
+        self.expandidos_total = 0                # Nodos expandidos en todas las reparaciones
+
+    # ================================
+    # ESTADO POR CELDA
+    # ================================
+
+    def _valor_g(self, s: int) -> int:
+        return self.g.get(s, self.plano._distancia[s])
+
+    def _valor_rhs(self, s: int) -> int:
+        return self.rhs.get(s, self.plano._distancia[s])
+
+    def _poner(self, tabla: Dict[int, int], s: int, valor: int):
+        """Guarda g o rhs de una celda; si vuelve a ser la del plano, la olvida."""
+        if valor == self.plano._distancia[s]:
+            tabla.pop(s, None)
+        else:
+            tabla[s] = valor
+
+    def _transitable(self, s: int) -> bool:
+        return self.conocido.get(s, self.plano._transitable[s])
+
+    def _vecinos(self, s: int):
+        """Vecinos cardinales dentro del mapa (mismo orden que el campo de distancias)."""
+        x, y = divmod(s, self.alto)
+        if x < self.ancho - 1:
+            yield s + self.alto
+        if x > 0:
+            yield s - self.alto
+        if y < self.alto - 1:
+            yield s + 1
+        if y > 0:
+            yield s - 1
+
+    def _heuristica(self, a: int, b: int) -> int:
+        ax, ay = divmod(a, self.alto)
+        bx, by = divmod(b, self.alto)
+        return abs(ax - bx) + abs(ay - by)
+
+    # ================================
+    # D* LITE
+    # ================================
+
+    def _clave(self, s: int, inicio: int) -> Tuple[int, int]:
+        m = min(self._valor_g(s), self._valor_rhs(s))
+        if m >= INFINITO:
+            return INFINITO, INFINITO
+        return m + self._heuristica(inicio, s) + self.km, m
+
+    def _calcular_rhs(self, s: int) -> int:
+        """Mejor distancia a través de los vecinos (costo 1 entre celdas transitables)."""
+        if self.plano._salida[s]:
+            return 0
+        if not self._transitable(s):
+            return INFINITO
+        mejor = INFINITO
+        for v in self._vecinos(s):
+            if self._transitable(v):
+                g = self._valor_g(v)
+                if g + 1 < mejor:
+                    mejor = g + 1
+        return mejor
+
+    def _actualizar_vertice(self, s: int, inicio: int):
+        if self._valor_g(s) != self._valor_rhs(s):
+            clave = self._clave(s, inicio)
+            if self.claves.get(s) != clave:
+                self.claves[s] = clave
+                heappush(self.cola, (clave[0], clave[1], s))
+        else:
+            self.claves.pop(s, None)                     # Su entrada en la cola queda vieja
+
+    def _tope(self):
+        """Entrada vigente de menor clave (descarta las viejas), o None."""
+        cola, claves = self.cola, self.claves
+        while cola:
+            k1, k2, s = cola[0]
+            if claves.get(s) == (k1, k2):
+                return cola[0]
+            heappop(cola)
+        return None
+
+    def _calcular_ruta(self, inicio: int) -> int:
+        """Expande hasta que g del evacuante es consistente y óptima. Devuelve los nodos expandidos."""
+        expandidos = 0
+        while True:
+            tope = self._tope()
+            clave_inicio = self._clave(inicio, inicio)
+            if tope is None or ((tope[0], tope[1]) >= clave_inicio
+                                and self._valor_rhs(inicio) == self._valor_g(inicio)):
+                return expandidos
+            k1, k2, u = heappop(self.cola)
+            del self.claves[u]
+            expandidos += 1
+            nueva = self._clave(u, inicio)
+            if (k1, k2) < nueva:
+                self.claves[u] = nueva                   # Clave desactualizada por km: se reinserta
+                heappush(self.cola, (nueva[0], nueva[1], u))
+                continue
+            g, rhs = self._valor_g(u), self._valor_rhs(u)
+            if g > rhs:                                  # Sobreconsistente: se fija su distancia
+                self._poner(self.g, u, rhs)
+                if self._transitable(u):
+                    for s in self._vecinos(u):
+                        if rhs + 1 < self._valor_rhs(s) and self._transitable(s) and not self.plano._salida[s]:
+                            self._poner(self.rhs, s, rhs + 1)
+                            self._actualizar_vertice(s, inicio)
+            else:                                        # Subconsistente: se invalida y se recalculan los que dependían de ella
+                self._poner(self.g, u, INFINITO)
+                for s in (*self._vecinos(u), u):
+                    if s == u or (g < INFINITO and self._valor_rhs(s) == g + 1):
+                        self._poner(self.rhs, s, self._calcular_rhs(s))
+                    self._actualizar_vertice(s, inicio)
+
+    # ================================
+    # OBSERVACIÓN Y REPARACIÓN
+    # ================================
+
+    def observar(self, pos: Tuple[int, int], vision: int) -> List[int]:
+        """
+        Compara las celdas dentro del rango de visión con el mapa conocido y
+        anota las que cambiaron. Devuelve esas celdas (índices planos).
+        Una celda está en 'conocido' justo cuando el evacuante la sabe distinta
+        del plano, así que basta compararlo con la marca del plano.
+        """
+        alterado, conocido = self.plano._alterado, self.conocido
+        ancho, alto = self.ancho, self.alto
+        x, y = pos
+        cambiadas = []
+        for dx, dy in _desplazamientos(vision):
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < ancho and 0 <= ny < alto:
+                s = nx * alto + ny
+                if alterado[s] != (s in conocido):
+                    cambiadas.append(s)
+        for s in cambiadas:
+            if s in conocido:
+                del conocido[s]                          # Volvió a ser como en el plano
+            else:
+                conocido[s] = not self.plano._transitable[s]
+        return cambiadas
+
+    def reparar(self, pos: Tuple[int, int], cambiadas: List[int]) -> int:
+        """
+        Corrige rhs de las celdas cambiadas y sus vecinos y repara la ruta desde pos.
+        Devuelve los nodos expandidos (también quedan en 'expandidos').
+        """
+        inicio = pos[0] * self.alto + pos[1]
+        self.km += self._heuristica(self.ultimo, inicio)
+        self.ultimo = inicio
+        afectadas = set(cambiadas)
+        for s in cambiadas:
+            afectadas.update(self._vecinos(s))
+        for s in sorted(afectadas):
+            if not self.plano._salida[s]:
+                self._poner(self.rhs, s, self._calcular_rhs(s))
+            self._actualizar_vertice(s, inicio)
+        self.expandidos = self._calcular_ruta(inicio)
+        self.reparaciones += 1
+        self.expandidos_total += self.expandidos
+        return self.expandidos
+
+    def siguiente_paso(self, pos: Tuple[int, int], vision: int) -> Tuple[int, int] | None:
+        """
+        Observa el entorno, repara si algo cambió y devuelve el vecino que
+        acerca un paso a la salida según lo que el evacuante sabe. None si ya
+        está en una salida o no conoce ninguna ruta. Si nada cambió no hay
+        búsqueda: moverse por la ruta no vuelve inconsistente ninguna celda.
+        """
+        cambiadas = self.observar(pos, vision)
+        if cambiadas:
+            self.reparar(pos, cambiadas)
+        inicio = pos[0] * self.alto + pos[1]
+        g = self._valor_g(inicio)
+        if g == 0 or g >= INFINITO:
+            return None
+        mejor, paso = INFINITO, None
+        for v in self._vecinos(inicio):
+            if self._transitable(v) and self._valor_g(v) + 1 < mejor:
+                mejor, paso = self._valor_g(v) + 1, v
+        return divmod(paso, self.alto) if paso is not None else None
+
+
+# ================================
+# INSTANTÁNEAS
+# ================================
+
+_TABLAS     = ("conocido", "g", "rhs", "cola", "claves")
+_ESCALARES  = ("km", "ultimo", "expandidos", "reparaciones", "expandidos_total")
+
+
+def _filas(planificador: PlanificadorIncremental, tabla: str) -> list:
+    if tabla == "cola":
+        return planificador.cola                         # El montículo tal cual (con entradas viejas)
+    if tabla == "claves":
+        return [(s, k1, k2) for s, (k1, k2) in planificador.claves.items()]
+    return list(getattr(planificador, tabla).items())
+
+
+def empaquetar(planificadores: List[PlanificadorIncremental | None]) -> Dict[str, np.ndarray]:
+    """
+    Estado de los planificadores de todos los evacuantes (None = todavía no
+    planificó) como arreglos planos: una fila de escalares por evacuante y,
+    por cada tabla, sus filas concatenadas con el largo de cada evacuante.
+    """
+    activos = [p for p in planificadores if p is not None]
+    arreglos = {
+        "plan_tiene":     np.array([p is not None for p in planificadores], dtype=bool),
+        "plan_escalares": np.array([[getattr(p, e) for e in _ESCALARES] for p in activos],
+                                   dtype=np.int64).reshape(len(activos), len(_ESCALARES)),
+    }
+    for tabla in _TABLAS:
+        filas = [_filas(p, tabla) for p in activos]
+        ancho = 3 if tabla in ("cola", "claves") else 2
+        arreglos[f"plan_{tabla}"] = np.array([f for fs in filas for f in fs], dtype=np.int64).reshape(-1, ancho)
+        arreglos[f"plan_largo_{tabla}"] = np.array([len(fs) for fs in filas], dtype=np.int64)
+    return arreglos
+
+
+def desempaquetar(plano: Plano, arreglos) -> List[PlanificadorIncremental | None]:
+    """Inversa de empaquetar(): planificadores idénticos a los capturados."""
+    activos = []
+    inicios = {tabla: np.concatenate([[0], np.cumsum(arreglos[f"plan_largo_{tabla}"])]) for tabla in _TABLAS}
+    for i, escalares in enumerate(arreglos["plan_escalares"].tolist()):
+        p = PlanificadorIncremental(plano, (0, 0))
+        for nombre, valor in zip(_ESCALARES, escalares):
+            setattr(p, nombre, valor)
+        tablas = {tabla: arreglos[f"plan_{tabla}"][inicios[tabla][i]:inicios[tabla][i + 1]].tolist()
+                  for tabla in _TABLAS}
+        p.conocido = {s: bool(v) for s, v in tablas["conocido"]}
+        p.g        = dict(map(tuple, tablas["g"]))
+        p.rhs      = dict(map(tuple, tablas["rhs"]))
+        p.cola     = [tuple(f) for f in tablas["cola"]]
+        p.claves   = {s: (k1, k2) for s, k1, k2 in tablas["claves"]}
+        activos.append(p)
+    activos = iter(activos)
+    return [next(activos) if tiene else None for tiene in arreglos["plan_tiene"].tolist()]
@@ -0,0 +1,71 @@
+# servidor.py
+"""
+Servidor web de la simulación (visualización en el navegador).
+
+Está separado del núcleo a propósito: importar model.entorno no carga nada de
+visualización ni levanta ningún servidor. Este módulo solo se importa para
+servir la simulación (python main.py serve).
+"""
+
+# === LIBRERÍAS DE MESA ===
+from mesa.visualization.ModularVisualization import ModularServer, SocketHandler  # Servidor web para ejecutar la simulación
+
+from .entorno import ShoppingModel, MAPA_CENTRO_COMERCIAL
+from .mapas import como_terreno
+from .visualizacion import CanvasDeltas               # Canvas web que solo manda los cambios (colores de colores.py)
+
+# === PARÁMETROS DE LA VISTA ===
+CELL_SIZE = 15                                         # Tamaño de cada celda en píxeles
+
+# === SERVIDOR CON UNA BASE DE DELTAS POR NAVEGADOR ===
+class SocketDeltas(SocketHandler):
+    """Conexión de un navegador: cada una recibe los cuadros contra lo último que se le mandó a ella."""
+
+    @property
+    def viz_state_message(self):
+        return {"type": "viz_state", "data": self.application.render_model(cliente=self)}
+
+    def on_close(self):
+        self.application.olvidar(self)
+
+
+class ServidorDeltas(ModularServer):
+    """ModularServer que les dice a los elementos por deltas para qué conexión renderizan."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.add_handlers(r".*", [(r"/ws", SocketDeltas)])   # Tiene prioridad sobre el socket de Mesa
+
+    def render_model(self, cliente=None):
+        return [element.render(self.model, cliente) if isinstance(element, CanvasDeltas)
+                else element.render(self.model) for element in self.visualization_elements]
+
+    def olvidar(self, cliente):
+        for element in self.visualization_elements:
+            if isinstance(element, CanvasDeltas):
+                element.olvidar(cliente)
+
+
+# === CONFIGURAR EL SERVIDOR MESA ===
+def crear_servidor(mapa=None, puerto=8521, ticks_por_segundo=None):
+    """
+    Crea el servidor web para 'mapa' (por defecto el centro comercial).
+    El tamaño del canvas sale de las dimensiones del mapa: con mapas grandes
+    las celdas se achican para que el canvas no pase de ~1000 píxeles de lado.
+    Si se da 'ticks_por_segundo', la simulación mantiene ese ritmo aunque el
+    navegador dibuje más lento (se saltan cuadros en el servidor).
+    """
+    terreno = como_terreno(mapa if mapa is not None else MAPA_CENTRO_COMERCIAL)
+    celda   = max(1, min(CELL_SIZE, 1000 // max(terreno.width, terreno.height)))
+    canvas  = CanvasDeltas(celda * terreno.width, celda * terreno.height, terreno.width, terreno.height,
+                           ticks_por_segundo=ticks_por_segundo)
+
+    parametros = {"mapa": mapa} if mapa is not None else {}
+    servidor = ServidorDeltas(
+        ShoppingModel,            # Modelo
+        [canvas],                 # Elementos visuales
+        "Simulación Centro Comercial (Mesa)",  # Título
+        parametros                # Parámetros del modelo
+    )
+    servidor.port = puerto
+    return servidor
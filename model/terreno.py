@@ -0,0 +1,86 @@
+# terreno.py
+
+from typing import List, Tuple
+import numpy as np
+
+# ---------- CÓDIGOS DE CELDA ----------
+MURO      = 0   # '#'
+PASILLO   = 1   # '.'
+LOCAL     = 2   # 'L'
+SALIDA    = 3   # 'S'
+FUEGO     = 4   # 'F'
+DERRUMBE  = 5   # 'D'
+
+SIMBOLOS = "#.LSFD"                                     # Símbolo de cada código (el índice es el código)
+CODIGOS  = {simbolo: codigo for codigo, simbolo in enumerate(SIMBOLOS)}
+CODIGOS[" "] = PASILLO                                  # Los espacios del mapa se tratan como pasillo
+
+# Tabla código -> ¿se puede caminar por la celda? (muros, fuego y derrumbes no)
+TRANSITABLE = np.array([False, True, True, True, False, False])
+
+
+class Terreno:
+    """
+    Capa de terreno del centro comercial guardada como un arreglo 2D de códigos.
+    Es la única fuente de verdad del tipo de cada celda. Se indexa con las
+    mismas coordenadas (x, y) de la grilla de Mesa.
+    """
+
+    def __init__(self, codigos: np.ndarray):
+        """
+        :param codigos: Arreglo (ancho, alto) de códigos de celda (uint8)
+        """
+        self._codigos = codigos
+        self.width, self.height = codigos.shape
+
+        # Vista de solo lectura para los agentes (comparte memoria con el terreno)
+        self.vista = codigos.view()
+        self.vista.flags.writeable = False
+
+    @classmethod
+    def desde_mapa(cls, map_2d: List[str]) -> "Terreno":
+        """
+        Construye el terreno a partir de las filas de texto del mapa.
+        La primera fila del texto es la parte de arriba de la grilla (y más alto).
+        """
+        height = len(map_2d)
+        width  = max(len(row) for row in map_2d)
+        codigos = np.empty((width, height), dtype=np.uint8)
+
+        for y, row in enumerate(map_2d):
+            try:
+                fila = [CODIGOS[simbolo] for simbolo in row.ljust(width, ".")]
+            except KeyError as error:
+                raise ValueError(f"Símbolo de mapa desconocido {error.args[0]!r} en la fila {y}") from None
+            codigos[:, height - 1 - y] = fila            # Invertimos el eje Y como en la visualización
+
+        return cls(codigos)
+
+    # ================================
+    # LECTURA Y ESCRITURA
+    # ================================
+
+    def codigo(self, pos: Tuple[int, int]) -> int:
+        """Devuelve el código de la celda en pos."""
+        return self._codigos[pos]
+
+    def tipo(self, pos: Tuple[int, int]) -> str:
+        """Devuelve el símbolo de la celda en pos ('#', '.', 'L', 'S', 'F' o 'D')."""
+        return SIMBOLOS[self._codigos[pos]]
+
+    def cambiar(self, pos: Tuple[int, int], tipo: str):
+        """Cambia el tipo de la celda en pos (por ejemplo a fuego 'F' o derrumbe 'D')."""
+        self._codigos[pos] = CODIGOS[tipo]
+
+    def es_transitable(self, pos: Tuple[int, int]) -> bool:
+        """Indica si se puede caminar por la celda (no es muro, fuego ni derrumbe)."""
+        return TRANSITABLE[self._codigos[pos]]
+
+    def dentro(self, pos: Tuple[int, int]) -> bool:
+        """Indica si la posición está dentro del mapa."""
+        return 0 <= pos[0] < self.width and 0 <= pos[1] < self.height
+
+    def posiciones(self, tipo: str) -> List[Tuple[int, int]]:
+        """Devuelve todas las posiciones (x, y) cuyo tipo es el indicado."""
+        xs, ys = np.nonzero(self._codigos == CODIGOS[tipo])
+        return list(zip(xs.tolist(), ys.tolist()))
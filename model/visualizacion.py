@@ -0,0 +1,150 @@
+# visualizacion.py
+"""
+Visualización web por deltas para el servidor de Mesa.
+
+CanvasGrid manda en cada tick un diccionario por celda y por agente. En un mapa
+grande eso es casi todo repetido: el terreno cambia en unas pocas celdas por
+tick (fuego, derrumbes) y solo se mueve una parte de los evacuantes.
+CanvasDeltas manda el mapa completo una sola vez a cada navegador (al conectar
+o reiniciar) y después solo las celdas y los agentes que cambiaron desde el
+último cuadro enviado a ese navegador, como listas planas de enteros. Los
+brigadistas no se mueven: sus posiciones van en el cuadro completo y en un
+delta solo si alguno murió. Si el navegador se atrasa respecto del ritmo
+pedido, el servidor avanza varios ticks antes de mandar el siguiente cuadro
+(que igual contiene todos los cambios acumulados).
+"""
+
+import base64
+import os
+import time
+import numpy as np
+
+from mesa.visualization.ModularVisualization import VisualizationElement
+
+from .terreno import SIMBOLOS
+from .poblacion import ESTADOS, estado_agentes
+from .colores import COLORES_TERRENO, COLORES_ESTADO, COLOR_BRIGADISTA
+
+
+class CanvasDeltas(VisualizationElement):
+    """
+    Canvas del centro comercial que se actualiza por deltas.
+
+    Cuadro completo: {"tipo": "completo", "ancho", "alto", "tick", "terreno" (códigos
+    en base64, índice x * alto + y), "colores", "colores_agente", "agentes",
+    "color_brigadista", "brigadistas": [x, y, ...]}.
+    Cuadro delta: {"tipo": "delta", "tick", "saltados", "celdas": [índice, código, ...],
+    "agentes": [agente, x, y, estado, ...]} con solo lo que cambió, más
+    "brigadistas" (los vivos) si murió alguno desde el último cuadro.
+    """
+    local_includes = ["CanvasDeltas.js"]
+    local_dir      = os.path.join(os.path.dirname(os.path.abspath(__file__)), "js")
+
+    def __init__(self, ancho_px, alto_px, ancho, alto, ticks_por_segundo=None, salto_maximo=10):
+        """
+        :param ancho_px, alto_px: Tamaño del canvas en píxeles
+        :param ancho, alto: Tamaño de la grilla en celdas
+        :param ticks_por_segundo: Ritmo de simulación deseado. Si el navegador pide
+                                  cuadros más lento, se saltan ticks (None = nunca)
+        :param salto_maximo: Ticks extra como máximo por cuadro
+        """
+        super().__init__()
+        self.ticks_por_segundo = ticks_por_segundo
+        self.salto_maximo      = salto_maximo
+        self.js_code = f"elements.push(new CanvasDeltas({ancho_px}, {alto_px}, {ancho}, {alto}));"
+        self._enviados = {}       # Cliente -> lo último que se le mandó (base de su próximo delta)
+
+    def render(self, model, cliente=None):
+        """
+        Cuadro para 'cliente' (una conexión del navegador; None si el servidor no
+        los distingue). Cada cliente tiene su propia base: una pestaña nueva, una
+        reconexión o un modelo reiniciado reciben primero el cuadro completo.
+        """
+        enviado = self._enviados.get(cliente)
+        if enviado is None or model is not enviado.modelo or len(model.evacuantes) != len(enviado.estado):
+            enviado = self._enviados[cliente] = _Enviado(model, enviado)
+            cuadro  = self._cuadro_completo(model, enviado)
+        else:
+            saltados = self._saltar_ticks(model, enviado)
+            cuadro   = self._cuadro_delta(model, enviado)
+            cuadro["saltados"] = saltados
+        enviado.ultimo = time.perf_counter()
+        return cuadro
+
+    def olvidar(self, cliente):
+        """Descarta la base de un cliente que se desconectó."""
+        self._enviados.pop(cliente, None)
+
+    # ================================
+    # CUADROS
+    # ================================
+
+    def _cuadro_completo(self, model, enviado):
+        indices = np.arange(len(enviado.estado), dtype=np.int32)
+        return {
+            "tipo":    "completo",
+            "ancho":   model.width,
+            "alto":    model.height,
+            "tick":    model.tick_counter,
+            "terreno": base64.b64encode(np.ascontiguousarray(enviado.terreno).tobytes()).decode("ascii"),
+            "colores": [COLORES_TERRENO.get(s, "gray") for s in SIMBOLOS],
+            "colores_agente": [COLORES_ESTADO[e] for e in ESTADOS],
+            "agentes": np.column_stack([indices, enviado.pos, enviado.estado]).ravel().tolist(),
+            "color_brigadista": COLOR_BRIGADISTA,
+            "brigadistas": enviado.brigadistas_vivos(model),
+        }
+
+    def _cuadro_delta(self, model, enviado):
+        vista = model.terreno.vista
+        cambiadas = np.flatnonzero(vista != enviado.terreno)
+        codigos   = vista.reshape(-1)[cambiadas]
+        enviado.terreno.reshape(-1)[cambiadas] = codigos
+
+        pos, estado = estado_agentes(model)
+        movidos = np.flatnonzero((pos != enviado.pos).any(axis=1) | (estado != enviado.estado))
+        enviado.pos[movidos], enviado.estado[movidos] = pos[movidos], estado[movidos]
+        cuadro = {
+            "tipo":    "delta",
+            "tick":    model.tick_counter,
+            "celdas":  np.column_stack([cambiadas, codigos]).ravel().tolist(),
+            "agentes": np.column_stack([movidos, pos[movidos], estado[movidos]]).ravel().tolist(),
+        }
+        if sum(b.vivo for b in model.brigadistas) != enviado.brigadistas:
+            cuadro["brigadistas"] = enviado.brigadistas_vivos(model)
+        return cuadro
+
+    def _saltar_ticks(self, model, enviado):
+        """
+        Si desde el último cuadro enviado a este cliente pasó más tiempo que un
+        tick al ritmo pedido, avanza el modelo los ticks que faltan (hasta
+        salto_maximo). El servidor ya avanzó uno antes de llamar a render().
+        """
+        if not self.ticks_por_segundo or enviado.ultimo is None:
+            return 0
+        atraso = int((time.perf_counter() - enviado.ultimo) * self.ticks_por_segundo) - 1
+        saltados = 0
+        while saltados < min(atraso, self.salto_maximo) and model.running:
+            model.step()
+            saltados += 1
+        return saltados
+
+
+class _Enviado:
+    """Lo último que se le mandó a un cliente: terreno, agentes y brigadistas vivos."""
+
+    def __init__(self, model, anterior=None):
+        """
+        :param model: Modelo del cuadro completo que se le va a mandar
+        :param anterior: Base previa del mismo cliente (se conserva el momento del último cuadro)
+        """
+        self.modelo  = model
+        self.terreno = np.array(model.terreno.vista)
+        pos, estado  = estado_agentes(model)
+        self.pos, self.estado = pos.copy(), estado.copy()
+        self.brigadistas = 0      # Brigadistas vivos enviados
+        self.ultimo  = anterior.ultimo if anterior is not None else None   # Momento del último cuadro
+
+    def brigadistas_vivos(self, model):
+        vivos = [int(c) for b in model.brigadistas if b.vivo for c in b.pos]
+        self.brigadistas = len(vivos) // 2
+        return vivos
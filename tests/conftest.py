@@ -0,0 +1,6 @@
+# conftest.py
+# Los tests importan 'model' desde la raíz del repositorio (no hay paquete instalable)
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,113 @@
+# test_almacen.py
+"""
+Almacén de resultados: la clave del escenario es la misma en cualquier
+proceso y cambia con el terreno y con cada parámetro que entra en ella; al
+pasarse del límite se borran las corridas leídas hace más tiempo, solo hasta
+entrar en el límite, y nunca la recién guardada.
+"""
+
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from model import almacen
+from model.almacen import AlmacenResultados, clave_escenario, _por_defecto
+from model.entorno import MAPA_CENTRO_COMERCIAL
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PARAMETROS = {"probabilidad_fuego": 0.3, "brigadistas": 2, "poblacion": "arreglos"}
+
+# Un valor distinto del de por defecto para cada parámetro que entra en la clave
+OTROS_VALORES = {"probabilidad_fuego": 0.5, "llamas_iniciales": 3, "poblacion": "arreglos",
+                 "longitud_derrumbe": 2, "intervalo_derrumbe": 0, "navegacion": "incremental",
+                 "brigadistas": 4, "radio_brigadista": 3}
+
+
+def clave(**parametros):
+    return clave_escenario(50, 7, 500, 1, parametros)
+
+
+# ================================
+# CLAVE DEL ESCENARIO
+# ================================
+
+def test_clave_estable_entre_procesos():
+    programa = ("from model.almacen import clave_escenario;"
+                f"print(clave_escenario(50, 7, 500, 1, {PARAMETROS!r}))")
+    claves = set()
+    for semilla_hash in ("1", "2", "3"):                 # El orden de los conjuntos cambia entre procesos
+        entorno = {**os.environ, "PYTHONHASHSEED": semilla_hash}
+        salida = subprocess.run([sys.executable, "-c", programa], cwd=RAIZ, env=entorno,
+                                capture_output=True, text=True, check=True)
+        claves.add(salida.stdout.strip())
+    assert claves == {clave(**PARAMETROS)}
+
+
+def test_clave_cambia_con_el_terreno():
+    mapa = list(MAPA_CENTRO_COMERCIAL)
+    mapa[1] = mapa[1][:2] + "#" + mapa[1][3:]
+    assert clave(mapa=mapa) != clave()
+    assert clave(mapa=list(MAPA_CENTRO_COMERCIAL)) == clave()
+
+
+@pytest.mark.parametrize("nombre", sorted(OTROS_VALORES))
+def test_clave_cambia_con_cada_parametro(nombre):
+    assert clave(**{nombre: OTROS_VALORES[nombre]}) != clave()
+    assert clave(**{nombre: _por_defecto()[nombre]}) == clave()
+
+
+def test_todos_los_parametros_tienen_otro_valor_de_prueba():
+    assert set(OTROS_VALORES) == set(_por_defecto()) - {"num_users", "seed"}
+
+
+def test_clave_cambia_con_los_argumentos_de_la_corrida():
+    base = clave_escenario(50, 7, 500, 1, {})
+    assert len({base, clave_escenario(51, 7, 500, 1, {}), clave_escenario(50, 8, 500, 1, {}),
+                clave_escenario(50, 7, 501, 1, {}), clave_escenario(50, 7, 500, 2, {})}) == 5
+
+
+def test_clave_ignora_los_parametros_fuera_de_clave():
+    assert clave(eventos=True, metricas=True) == clave()
+
+
+# ================================
+# DESCARTE DE LAS MENOS USADAS
+# ================================
+
+@pytest.fixture
+def reloj(monkeypatch):
+    """Reloj que avanza un segundo por lectura, para que el orden de uso no dependa de la resolución."""
+    ahora = iter(range(1, 10**6))
+    monkeypatch.setattr(almacen, "time", SimpleNamespace(time=lambda: float(next(ahora))))
+
+
+def resultado(tamano):
+    """Resumen que ocupa exactamente 'tamano' bytes en el almacén."""
+    return {"x": "." * (tamano - len('{"x": ""}'))}
+
+
+def test_descarta_las_leidas_hace_mas_tiempo_hasta_el_limite(tmp_path, reloj):
+    with AlmacenResultados(str(tmp_path / "r.sqlite"), limite=500) as tabla:
+        for nombre in "abcde":
+            tabla.guardar(nombre, resultado(100))
+        assert tabla.tamano() == 500
+        for nombre in "dabe":                            # Orden de uso: c, d, a, b, e
+            assert tabla.buscar(nombre) is not None
+        tabla.guardar("f", resultado(150))               # Sobran 150 bytes: se van c y d
+        assert tabla.tamano() <= tabla.limite
+        assert [n for n in "abcdef" if n in tabla] == ["a", "b", "e", "f"]
+
+
+def test_nunca_descarta_la_recien_guardada(tmp_path, reloj):
+    with AlmacenResultados(str(tmp_path / "r.sqlite"), limite=500) as tabla:
+        for nombre in "abc":
+            tabla.guardar(nombre, resultado(100))
+        tabla.guardar("z", resultado(350))               # Sobran 150 bytes: se van a y b
+        assert [n for n in "abcz" if n in tabla] == ["c", "z"]
+        tabla.guardar("grande", resultado(800))          # Ella sola pasa del límite: queda solo ella
+        assert len(tabla) == 1 and "grande" in tabla
+        assert tabla.buscar("grande")["resultado"] == resultado(800)
@@ -0,0 +1,61 @@
+# test_brigadista.py
+"""
+Brigadistas alcanzados por el fuego o por un derrumbe: mueren, salen del
+activador y no vuelven a instruir a nadie.
+"""
+
+import numpy as np
+import pytest
+
+from model.entorno import ShoppingModel
+from model.instantanea import capturar, restaurar
+from model.terreno import FUEGO, DERRUMBE, PASILLO
+
+USUARIOS = 30
+SEMILLA  = 2
+
+
+def primera_celda(codigo, poblacion):
+    """Tick y primera celda de pasillo que pasa a 'codigo' en una corrida sin brigadistas."""
+    model = ShoppingModel(num_users=USUARIOS, seed=SEMILLA, poblacion=poblacion)
+    antes = model.terreno.vista.copy()
+    while model.running:
+        model.step()
+        nuevas = np.argwhere((model.terreno.vista == codigo) & (antes == PASILLO))
+        if len(nuevas):
+            return model.tick_counter, tuple(nuevas[0].tolist())
+        antes = model.terreno.vista.copy()
+    pytest.fail("el peligro nunca llegó a un pasillo")
+
+
+@pytest.mark.parametrize("poblacion", ["agentes", "arreglos"])
+@pytest.mark.parametrize("codigo, causa", [(FUEGO, "fuego"), (DERRUMBE, "derrumbe")])
+def test_peligro_sobre_un_brigadista(poblacion, codigo, causa):
+    # El fuego y los derrumbes tienen flujos propios: con brigadistas caen en las mismas celdas
+    tick, celda = primera_celda(codigo, poblacion)
+    model = ShoppingModel(num_users=USUARIOS, seed=SEMILLA, poblacion=poblacion, brigadistas=[celda])
+    brigadista = model.brigadistas[0]
+    while model.tick_counter < tick:
+        assert brigadista.vivo
+        model.step()
+
+    assert model.terreno.vista[celda] == codigo
+    assert not brigadista.vivo and brigadista.causa_muerte == causa
+    assert brigadista not in model.schedule.agents
+    restaurado = restaurar(capturar(model))
+    assert restaurado.brigadistas[0].causa_muerte == causa
+    assert restaurado.brigadistas[0] not in restaurado.schedule.agents
+
+    instruidos = brigadista.instruidos
+    while model.running:
+        model.step()
+    assert brigadista.instruidos == instruidos
+
+
+def test_no_instruye_desde_una_celda_intransitable():
+    model = ShoppingModel(num_users=USUARIOS, seed=SEMILLA, brigadistas=1, radio_brigadista=50)
+    brigadista = model.brigadistas[0]
+    model.alarma_activa = True
+    model.terreno.cambiar(brigadista.pos, "F")               # Sin pasar por el modelo: sigue en el activador
+    brigadista.step()
+    assert brigadista.instruidos == 0
@@ -0,0 +1,49 @@
+# test_campo.py
+"""
+Campo de salidas: después de reparar el campo con fuego y derrumbes al azar,
+tanto la distancia como la salida asignada a cada celda coinciden con un
+campo construido desde cero sobre el mismo terreno.
+"""
+
+import random
+import numpy as np
+
+from model.entorno import MAPA_CENTRO_COMERCIAL
+from model.mapas import como_terreno
+from model.campo import CampoSalidas
+from model.derrumbes import DERRUMBABLE
+
+
+def comprobar_campo(campo, terreno):
+    nuevo = CampoSalidas(terreno)
+    assert campo.salidas == nuevo.salidas
+    assert np.array_equal(campo.distancia, nuevo.distancia)
+    assert np.array_equal(campo.salida, nuevo.salida)
+
+
+def test_actualizar_igual_a_construir_con_fuego_y_derrumbes():
+    terreno = como_terreno(MAPA_CENTRO_COMERCIAL)
+    campo   = CampoSalidas(terreno)
+    rng     = random.Random(0)
+    piso    = [tuple(c) for c in np.argwhere(DERRUMBABLE[terreno.vista]).tolist()]
+    for _ in range(150):
+        cambiadas = rng.sample(piso, rng.randint(1, 8))
+        for celda in cambiadas:
+            terreno.cambiar(celda, rng.choice("FFDD."))
+        campo.actualizar(cambiadas)
+        comprobar_campo(campo, terreno)
+
+
+def test_actualizar_con_bloqueos_que_no_cambian_la_distancia():
+    """Bloquear un camino entre dos salidas equidistantes solo cambia la etiqueta."""
+    terreno = como_terreno(["#######",
+                            "S.....S",
+                            "#.###.#",
+                            "#.....#",
+                            "#######"])
+    campo = CampoSalidas(terreno)
+    comprobar_campo(campo, terreno)
+    for celda in [(2, 1), (4, 3), (1, 3)]:
+        terreno.cambiar(celda, "D")
+        campo.actualizar([celda])
+        comprobar_campo(campo, terreno)
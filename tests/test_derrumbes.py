@@ -0,0 +1,62 @@
+# test_derrumbes.py
+"""
+Índice de sitios de derrumbe: con el terreno cambiando (se cierran y se
+reabren celdas), sortear() nunca devuelve un sitio inválido y solo devuelve
+None cuando ya no queda ningún sitio válido.
+"""
+
+import random
+import numpy as np
+
+from model.entorno import MAPA_CENTRO_COMERCIAL
+from model.mapas import como_terreno
+from model.derrumbes import IndiceDerrumbes, DERRUMBABLE
+
+LONGITUD = 4
+
+
+def sitios_validos(terreno):
+    """Sitios válidos calculados desde cero sobre el terreno actual."""
+    return set(IndiceDerrumbes(terreno, LONGITUD)._construir().tolist())
+
+
+def comprobar_sorteo(indice, terreno, rng):
+    validos = sitios_validos(terreno)
+    assert validos <= set(indice.sitios.tolist())          # El índice nunca pierde un sitio válido
+    celdas = indice.sortear(rng)
+    if celdas is None:
+        assert not validos
+        return False
+    assert all(DERRUMBABLE[terreno.vista[c]] for c in celdas)
+    (x, y), (x2, y2) = celdas[0], celdas[1]
+    assert (x * terreno.height + y) * 2 + (0 if x2 != x else 1) in validos
+    return True
+
+
+def test_sortear_con_celdas_que_se_cierran_y_se_reabren():
+    terreno = como_terreno(MAPA_CENTRO_COMERCIAL)
+    indice  = IndiceDerrumbes(terreno, LONGITUD)
+    rng     = random.Random(0)
+    piso    = [tuple(c) for c in np.argwhere(DERRUMBABLE[terreno.vista]).tolist()]
+    for _ in range(200):
+        cambiadas = rng.sample(piso, rng.randint(1, 6))
+        for celda in cambiadas:
+            terreno.cambiar(celda, rng.choice("FDD.L"))
+        indice.actualizar(cambiadas)
+        assert comprobar_sorteo(indice, terreno, rng)
+
+
+def test_sortear_hasta_que_no_queda_ninguno():
+    terreno = como_terreno(MAPA_CENTRO_COMERCIAL)
+    indice  = IndiceDerrumbes(terreno, LONGITUD)
+    rng     = random.Random(1)
+    piso    = [tuple(c) for c in np.argwhere(DERRUMBABLE[terreno.vista]).tolist()]
+    rng.shuffle(piso)
+    quedan = True
+    while piso:
+        cerradas, piso = piso[:5], piso[5:]
+        for celda in cerradas:
+            terreno.cambiar(celda, "F")
+        indice.actualizar(cerradas)
+        quedan = comprobar_sorteo(indice, terreno, rng)
+    assert not quedan and indice.sortear(rng) is None
@@ -0,0 +1,79 @@
+# test_fuego.py
+"""
+Propagación del fuego: el motor por frente activo enciende exactamente las
+mismas celdas que una regla de fuerza bruta que revisa, en cada tick, el
+vecindario de todas las celdas en llamas con el mismo flujo aleatorio. El
+fuego nunca entra en muros ni en salidas.
+"""
+
+import random
+import numpy as np
+import pytest
+
+from model.entorno import MAPA_CENTRO_COMERCIAL
+from model.mapas import como_terreno
+from model.fuego import MotorFuego, MOORE
+from model.terreno import LOCAL, PASILLO, FUEGO, MURO, SALIDA
+from model.derrumbes import DERRUMBABLE
+
+TICKS = 150
+
+
+def propagar_fuerza_bruta(terreno, en_llamas, probabilidad, rng):
+    """
+    Un tick de la regla original: cada celda en llamas con algún vecino combustible,
+    con la probabilidad dada, enciende uno de esos vecinos elegido al azar.
+    'en_llamas' son todas las celdas en llamas, en el orden en que se encendieron.
+    """
+    combustible = []
+    for x, y in en_llamas:
+        vecinos = [(x + dx, y + dy) for dx, dy in MOORE.tolist()]
+        candidatos = [terreno.dentro(v) and terreno.codigo(v) in (LOCAL, PASILLO) for v in vecinos]
+        if any(candidatos):
+            combustible.append((vecinos, candidatos))
+    if not combustible:
+        return []
+    sorteo = rng.random(len(combustible))
+    propagan = [c for c, r in zip(combustible, sorteo) if r < probabilidad]
+    if not propagan:
+        return []
+    claves = rng.random((len(propagan), len(MOORE)))
+    nuevas = []
+    for (vecinos, candidatos), fila in zip(propagan, claves):
+        elegida = max((k for k in range(len(MOORE)) if candidatos[k]), key=lambda k: fila[k])
+        if terreno.codigo(vecinos[elegida]) != FUEGO:
+            terreno.cambiar(vecinos[elegida], "F")
+            nuevas.append(vecinos[elegida])
+    return nuevas
+
+
+@pytest.mark.parametrize("probabilidad", [0.3, 0.9])
+def test_frente_activo_igual_a_fuerza_bruta(probabilidad):
+    original = como_terreno(MAPA_CENTRO_COMERCIAL)
+    frente, bruto = como_terreno(original), como_terreno(original)
+    motor = MotorFuego(frente, probabilidad, np.random.default_rng(4))
+    rng_bruto = np.random.default_rng(4)
+    rng_derrumbes = random.Random(4)
+
+    inicio = [(10, 10), (30, 20), (40, 5)]
+    assert all(original.codigo(celda) in (LOCAL, PASILLO) for celda in inicio)
+    motor.encender(inicio)
+    en_llamas = list(inicio)
+    for celda in inicio:
+        bruto.cambiar(celda, "F")
+
+    for tick in range(TICKS):
+        if tick % 10 == 0:                               # Derrumbes: celdas que dejan de ser combustibles
+            piso = np.argwhere(DERRUMBABLE[bruto.vista]).tolist()
+            for celda in rng_derrumbes.sample(piso, min(3, len(piso))):
+                frente.cambiar(tuple(celda), "D")
+                bruto.cambiar(tuple(celda), "D")
+        nuevas = propagar_fuerza_bruta(bruto, en_llamas, probabilidad, rng_bruto)
+        assert motor.propagar() == nuevas
+        en_llamas.extend(nuevas)
+        assert np.array_equal(frente.vista, bruto.vista)
+        assert motor.en_llamas == len(en_llamas)
+
+    quemadas = frente.vista == FUEGO
+    assert quemadas.sum() > len(inicio)
+    assert not (quemadas & np.isin(original.vista, [MURO, SALIDA])).any()
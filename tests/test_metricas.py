@@ -0,0 +1,55 @@
+# test_metricas.py
+"""
+Métricas: los contadores que se mantienen por transiciones (evacuantes por
+estado, muertos, evacuados por puerta, celdas en llamas y derrumbadas) son
+iguales en cada tick a un recuento hecho desde el estado de la población y
+del terreno.
+"""
+
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from model.entorno import ShoppingModel
+from model.metricas import Metricas
+from model.poblacion import ESTADOS, EVACUATED, MUERTO, estado_agentes
+from model.terreno import SALIDA, FUEGO, DERRUMBE
+
+TICKS = 120
+
+
+def recontar(model):
+    """Contadores calculados desde cero con las posiciones y estados de todos los evacuantes."""
+    pos, estado = estado_agentes(model)
+    puerta_de = {celda: i for i, celdas in enumerate(model.metricas.puertas) for celda in celdas}
+    por_puerta = Counter(puerta_de[tuple(p)] for p in pos[estado == EVACUATED].tolist())
+    codigos = model.terreno.vista
+    return {
+        "estados":     np.bincount(estado, minlength=len(ESTADOS)),
+        "por_puerta":  np.array([por_puerta[i] for i in range(len(model.metricas.puertas))]),
+        "en_llamas":   int(np.count_nonzero(codigos == FUEGO)),
+        "derrumbadas": int(np.count_nonzero(codigos == DERRUMBE)),
+    }
+
+
+@pytest.mark.parametrize("poblacion", ["agentes", "arreglos"])
+def test_contadores_igual_a_recuento_en_cada_tick(poblacion):
+    model = ShoppingModel(num_users=300, seed=3, poblacion=poblacion, intervalo_derrumbe=3,
+                          brigadistas=3, metricas=Metricas(cada=1, capacidad=8))
+    metricas = model.metricas
+    salidas = sorted(map(tuple, np.argwhere(model.terreno.vista == SALIDA).tolist()))
+    assert sorted(c for celdas in metricas.puertas for c in celdas) == salidas
+    for _ in range(TICKS):
+        model.step()
+        cuenta = recontar(model)
+        assert np.array_equal(metricas.estados, cuenta["estados"])
+        assert np.array_equal(metricas.por_puerta, cuenta["por_puerta"])
+        assert model.fuego.en_llamas == cuenta["en_llamas"]
+        assert metricas.derrumbadas == cuenta["derrumbadas"]
+
+    series = metricas.series()
+    assert len(series["tick"]) == TICKS + 1
+    assert series["muerto"][-1] == cuenta["estados"][MUERTO] > 0
+    assert series["evacuated"][-1] == cuenta["estados"][EVACUATED] > 0
+    assert sum(series[f"salida_{i}"].sum() for i in range(len(metricas.puertas))) == cuenta["estados"][EVACUATED]
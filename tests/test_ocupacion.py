@@ -0,0 +1,45 @@
+# test_ocupacion.py
+"""
+Índice de ocupación: después de cada tick (con movimientos, muertes y
+evacuaciones) el conteo por celda es igual a un recuento hecho desde las
+posiciones de los evacuantes que siguen dentro del edificio.
+"""
+
+import numpy as np
+import pytest
+
+from model.entorno import ShoppingModel
+from model.poblacion import EVACUATED, MUERTO, estado_agentes
+
+TICKS = 120
+
+
+def recontar(model):
+    """Evacuantes vivos por celda, contados desde cero."""
+    pos, estado = estado_agentes(model)
+    conteo = np.zeros((model.width, model.height), dtype=np.int32)
+    dentro = pos[estado < EVACUATED]
+    np.add.at(conteo, (dentro[:, 0], dentro[:, 1]), 1)
+    return conteo
+
+
+@pytest.mark.parametrize("poblacion", ["agentes", "arreglos"])
+def test_conteo_igual_a_recuento_en_cada_tick(poblacion):
+    model = ShoppingModel(num_users=300, seed=3, poblacion=poblacion, intervalo_derrumbe=3)
+    ocupacion = model.ocupacion
+    assert np.array_equal(ocupacion.conteo, recontar(model))
+    movimientos = 0
+    for _ in range(TICKS):
+        anterior = estado_agentes(model)[0].copy()
+        model.step()
+        assert np.array_equal(ocupacion.conteo, recontar(model))
+        movimientos += int((estado_agentes(model)[0] != anterior).any(axis=1).sum())
+
+    pos, estado = estado_agentes(model)
+    assert (estado == MUERTO).any() and (estado == EVACUATED).any()
+    assert movimientos > len(pos)
+    conteo = recontar(model)
+    for radio in (0, 2):
+        esperada = np.array([[conteo[max(x - radio, 0):x + radio + 1, max(y - radio, 0):y + radio + 1].sum()
+                              for y in range(model.height)] for x in range(model.width)])
+        assert np.array_equal(ocupacion.densidades(radio), esperada)
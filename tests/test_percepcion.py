@@ -0,0 +1,37 @@
+# test_percepcion.py
+"""
+Percepción: con salidas que se abren y se cierran al azar, la tabla de cada
+radio corregida con actualizar() coincide con la construida desde cero sobre
+el mismo terreno.
+"""
+
+import random
+import numpy as np
+import pytest
+
+from model.entorno import MAPA_CENTRO_COMERCIAL
+from model.mapas import como_terreno
+from model.percepcion import Percepcion
+from model.terreno import SALIDA, MURO
+
+RADIOS = [1, 2, 3, 5, 8]
+
+
+@pytest.mark.parametrize("vision", RADIOS)
+def test_actualizar_igual_a_construir(vision):
+    terreno    = como_terreno(MAPA_CENTRO_COMERCIAL)
+    percepcion = Percepcion(terreno)
+    for radio in RADIOS:                                 # Todas las tablas existen antes de los cambios
+        percepcion.tabla(radio)
+    rng    = random.Random(vision)
+    celdas = [tuple(c) for c in np.argwhere(terreno.vista != MURO).tolist()]
+    for _ in range(100):
+        cambiadas = rng.sample(celdas, rng.randint(1, 5))
+        for celda in cambiadas:
+            if terreno.vista[celda] == SALIDA:
+                terreno.cambiar(celda, rng.choice(".FD"))
+            else:
+                terreno.cambiar(celda, rng.choice("S.FL"))
+        percepcion.actualizar(cambiadas)
+        nueva = Percepcion(terreno)
+        assert np.array_equal(percepcion.tabla(vision), nueva._construir(vision))
@@ -0,0 +1,74 @@
+# test_replanificacion.py
+"""
+Navegación incremental (D* Lite): cada paso planificado es óptimo según una
+BFS sobre el mapa que conoce el evacuante (el plano más lo que vio), antes y
+después de que un derrumbe le corte la ruta que venía siguiendo.
+"""
+
+from collections import deque
+
+from model.mapas import como_terreno
+from model.replanificacion import Plano, PlanificadorIncremental
+
+VISION = 3
+
+MAPA = ["##########",
+        "#........S",
+        "#.######.#",
+        "#........#",
+        "##########"]
+
+
+def distancias_bfs(planificador, terreno):
+    """Distancia a la salida más cercana por celda, sobre el mapa conocido por el planificador."""
+    alto  = terreno.height
+    dist  = {}
+    cola  = deque()
+    for x, y in terreno.posiciones("S"):
+        dist[x * alto + y] = 0
+        cola.append(x * alto + y)
+    while cola:
+        s = cola.popleft()
+        for v in planificador._vecinos(s):
+            if v not in dist and planificador._transitable(v):
+                dist[v] = dist[s] + 1
+                cola.append(v)
+    return dist
+
+
+def avanzar(planificador, terreno, pos):
+    """Un paso planificado; comprueba que baja en uno la distancia de la BFS."""
+    paso = planificador.siguiente_paso(pos, VISION)
+    dist = distancias_bfs(planificador, terreno)
+    alto = terreno.height
+    d    = dist[pos[0] * alto + pos[1]]
+    assert planificador._valor_g(pos[0] * alto + pos[1]) == d
+    if d == 0:
+        assert paso is None
+        return None
+    assert dist[paso[0] * alto + paso[1]] == d - 1
+    return paso
+
+
+def test_pasos_optimos_antes_y_despues_de_un_derrumbe():
+    terreno = como_terreno(MAPA)
+    plano   = Plano(terreno)
+    pos     = (1, 3)
+    planificador = PlanificadorIncremental(plano, pos)
+
+    # Antes del derrumbe: la ruta más corta es el pasillo de arriba
+    pos = avanzar(planificador, terreno, pos)
+    assert pos == (2, 3)
+
+    # Un derrumbe corta el pasillo de arriba a la vista del evacuante
+    for celda in [(4, 3), (5, 3)]:
+        terreno.cambiar(celda, "D")
+    plano.actualizar([(4, 3), (5, 3)])
+
+    recorrido = [pos]
+    while pos is not None:
+        pos = avanzar(planificador, terreno, pos)
+        recorrido.append(pos)
+    assert planificador.reparaciones == 1
+    assert (4, 3) not in recorrido and (1, 1) in recorrido
+    assert recorrido[-2] == (9, 3)
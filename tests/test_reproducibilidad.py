@@ -0,0 +1,105 @@
+# test_reproducibilidad.py
+"""
+Reproducibilidad de las corridas: con la misma semilla y los mismos parámetros,
+la huella del modelo tiene que ser la misma en cada tick, también después de
+restaurar una instantánea y al repartir el paso entre procesos. Además se
+prueba directamente la resolución de conflictos de movimiento, de la que
+depende que el resultado no cambie con el orden de despacho.
+"""
+
+import numpy as np
+import pytest
+
+from model.entorno import ShoppingModel
+from model.movimiento import resolver_conflictos
+from model.instantanea import capturar, restaurar
+from model.mapas import generar_centro_comercial
+from model.particiones import Particiones
+
+USUARIOS = 40
+TICKS    = 40
+
+
+def huellas(model, ticks=TICKS):
+    """Huella del modelo después de cada tick."""
+    resultado = []
+    for _ in range(ticks):
+        model.step()
+        resultado.append(model.huella())
+    return resultado
+
+
+# ================================
+# MISMA SEMILLA
+# ================================
+
+@pytest.mark.parametrize("poblacion", ["agentes", "arreglos"])
+def test_misma_semilla_misma_corrida(poblacion):
+    primera = huellas(ShoppingModel(num_users=USUARIOS, seed=3, poblacion=poblacion, brigadistas=2))
+    segunda = huellas(ShoppingModel(num_users=USUARIOS, seed=3, poblacion=poblacion, brigadistas=2))
+    assert primera == segunda
+
+
+def test_otra_semilla_otra_corrida():
+    assert huellas(ShoppingModel(num_users=USUARIOS, seed=3)) != huellas(ShoppingModel(num_users=USUARIOS, seed=4))
+
+
+# ================================
+# INSTANTÁNEAS
+# ================================
+
+@pytest.mark.parametrize("parametros", [{"poblacion": "agentes"}, {"poblacion": "arreglos"},
+                                        {"navegacion": "incremental", "brigadistas": 2}])
+def test_restaurar_sigue_igual(parametros):
+    model = ShoppingModel(num_users=USUARIOS, seed=5, **parametros)
+    huellas(model, 15)
+    restaurado = restaurar(capturar(model))
+    assert restaurado.huella() == model.huella()
+    assert huellas(restaurado) == huellas(model)
+
+
+# ================================
+# EJECUCIÓN PARTICIONADA
+# ================================
+
+def test_particiones_igual_que_un_proceso():
+    mapa = generar_centro_comercial(60, 40, semilla=2)
+    serial = ShoppingModel(num_users=300, seed=11, mapa=mapa, poblacion="arreglos", brigadistas=4)
+    esperadas = huellas(serial)
+
+    model = ShoppingModel(num_users=300, seed=11, mapa=mapa, poblacion="arreglos", brigadistas=4)
+    with Particiones(model, procesos=3) as particiones:
+        assert len(particiones.franjas) == 3
+        assert huellas(model) == esperadas
+
+
+# ================================
+# RESOLUCIÓN DE CONFLICTOS
+# ================================
+
+def resolver(movimientos, quietos=(), prioridad=None):
+    """resolver_conflictos con celdas planas: 'movimientos' son pares (origen, destino)."""
+    origen  = np.array([o for o, _ in movimientos], dtype=np.int64)
+    destino = np.array([d for _, d in movimientos], dtype=np.int64)
+    prioridad = np.arange(len(movimientos), dtype=float) if prioridad is None else np.array(prioridad, dtype=float)
+    conteo = np.zeros(32, dtype=np.int32)
+    np.add.at(conteo, np.concatenate([origen, np.array(quietos, dtype=np.int64)]), 1)
+    return resolver_conflictos(origen, destino, prioridad, conteo).tolist()
+
+
+def test_conflictos_intercambio():
+    # Dos agentes que quieren cambiar de celda no se mueven ninguno
+    assert resolver([(1, 2), (2, 1)]) == [False, False]
+
+
+def test_conflictos_cadena():
+    # 5 -> 6 -> 7 -> 8, con 8 ocupada por alguien que se queda: se bloquea toda la cadena
+    assert resolver([(5, 6), (6, 7), (7, 8)], quietos=[8]) == [False, False, False]
+    # La misma cadena hacia una celda libre se mueve entera (cada uno entra donde sale el siguiente)
+    assert resolver([(5, 6), (6, 7), (7, 8)]) == [True, True, True]
+
+
+def test_conflictos_misma_celda():
+    # Gana la menor prioridad; el que pierde bloquea al que venía detrás de él
+    assert resolver([(1, 3), (5, 3), (4, 5)], prioridad=[0.7, 0.2, 0.1]) == [False, True, True]
+    assert resolver([(1, 3), (5, 3), (4, 5)], prioridad=[0.1, 0.2, 0.3]) == [True, False, False]
@@ -0,0 +1,57 @@
+# test_visualizacion.py
+"""
+Canvas por deltas: cada cliente arma, con los cuadros que recibe, el mismo
+terreno y los mismos agentes que tiene el modelo, aunque otros clientes
+hayan pedido cuadros entre medio o se conecte tarde.
+"""
+
+import base64
+import numpy as np
+
+from model.entorno import ShoppingModel
+from model.poblacion import estado_agentes
+from model.visualizacion import CanvasDeltas
+
+
+class Vista:
+    """Lo que tiene dibujado un navegador: se arma solo con los cuadros recibidos."""
+
+    def aplicar(self, cuadro):
+        if cuadro["tipo"] == "completo":
+            self.terreno = np.frombuffer(base64.b64decode(cuadro["terreno"]), dtype=np.uint8).copy()
+            self.agentes = {}
+        else:
+            celdas = np.array(cuadro["celdas"], dtype=np.int64).reshape(-1, 2)
+            self.terreno[celdas[:, 0]] = celdas[:, 1]
+        for agente, x, y, estado in np.array(cuadro["agentes"]).reshape(-1, 4).tolist():
+            self.agentes[agente] = (x, y, estado)
+
+    def igual_a(self, model):
+        pos, estado = estado_agentes(model)
+        agentes = {i: (x, y, e) for i, ((x, y), e) in enumerate(zip(pos.tolist(), estado.tolist()))}
+        return np.array_equal(self.terreno, model.terreno.vista.reshape(-1)) and self.agentes == agentes
+
+
+def test_cada_cliente_tiene_su_propia_base():
+    model  = ShoppingModel(num_users=60, seed=2, intervalo_derrumbe=3)
+    canvas = CanvasDeltas(500, 400, model.width, model.height)
+    a, b   = Vista(), Vista()
+
+    a.aplicar(canvas.render(model, "a"))
+    for tick in range(30):
+        model.step()
+        cuadro = canvas.render(model, "a")
+        assert cuadro["tipo"] == "delta"
+        a.aplicar(cuadro)
+        assert a.igual_a(model)
+        if tick == 10:
+            cuadro = canvas.render(model, "b")           # Se conecta tarde: recibe el cuadro completo
+            assert cuadro["tipo"] == "completo"
+            b.aplicar(cuadro)
+        elif tick > 10 and tick % 3 == 0:                # Pide cuadros a otro ritmo que 'a'
+            b.aplicar(canvas.render(model, "b"))
+            assert b.igual_a(model)
+
+    canvas.olvidar("b")
+    assert canvas.render(model, "b")["tipo"] == "completo"   # Reconexión
+    assert canvas.render(ShoppingModel(num_users=60, seed=3), "a")["tipo"] == "completo"   # Reinicio